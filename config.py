@@ -96,9 +96,42 @@ redis_gui_port = get_env_int("REDIS_GUI_PORT", 8001)
 redis_db = get_env_int("REDIS_DB", 1)
 # Build Redis url connection
 redis_url = f"redis://:{redis_encoded_password}@{redis_host}:{redis_server_port}/{redis_db}"
-# Redis max connections per pool
+# Redis max connections (total across all pools and workers)
 redis_max_connections = int(config.get("REDIS", {}).get("redis_connections", 30))
 
+# Named Redis pools: ingest (webhook writes), query (API reads), background (leader jobs/state).
+# Defaults split redis_connections 50/35/15. REDIS_<POOL>_URL (e.g. REDIS_QUERY_URL) points a pool at another endpoint.
+_redis_pool_defaults = {
+    "ingest":     {"share": 0.50, "socket_timeout": 5},
+    "query":      {"share": 0.35, "socket_timeout": 15},
+    "background": {"share": 0.15, "socket_timeout": 30},
+}
+redis_pools = {
+    name: {
+        "connections":    int(config.get("REDIS", {}).get("pools", {}).get(name, {}).get("connections", int(redis_max_connections * d["share"]))),
+        "socket_timeout": float(config.get("REDIS", {}).get("pools", {}).get(name, {}).get("socket_timeout", d["socket_timeout"])),
+        "pool_timeout":   float(config.get("REDIS", {}).get("pools", {}).get(name, {}).get("pool_timeout", 5)),
+        "url":            os.getenv(f"REDIS_{name.upper()}_URL") or redis_url,
+    }
+    for name, d in _redis_pool_defaults.items()
+}
+
+# Redis Cluster: REDIS_HOST/REDIS_SERVER_PORT (or REDIS_<POOL>_URL) point at any cluster node; keys get {area} hash tags
+redis_cluster = str(config.get("REDIS", {}).get("cluster", False)).upper() == "TRUE"
+
+# Optional read replica for API reads. Falls back to the primary when lagging or unreachable.
+# Not used in cluster mode (cluster replicas are managed by the cluster itself).
+redis_replica_url               = None if redis_cluster else os.getenv("REDIS_REPLICA_URL")
+redis_replica_max_lag_seconds   = int(config.get("REDIS", {}).get("replica", {}).get("max_lag_seconds", 10))
+redis_replica_check_interval    = int(config.get("REDIS", {}).get("replica", {}).get("check_interval_seconds", 5))
+if redis_replica_url:
+    redis_pools["replica"] = {
+        "connections":    int(config.get("REDIS", {}).get("replica", {}).get("connections", redis_pools["query"]["connections"])),
+        "socket_timeout": redis_pools["query"]["socket_timeout"],
+        "pool_timeout":   redis_pools["query"]["pool_timeout"],
+        "url":            redis_replica_url,
+    }
+
 # Flusher settings
 pokemon_max_threshold = config.get("flusher", {}).get("pokemon_max_threshold", 10000)
 shiny_max_threshold = config.get("flusher", {}).get("shiny_max_threshold", 10000)
@@ -139,9 +172,120 @@ store_pokemon_tth_timeseries = str(config.get('IN-MEMORY', {}).get('store_pokemo
 store_raids_timeseries = str(config.get('IN-MEMORY', {}).get('store_raids_timeseries', True)).upper() == "TRUE"
 store_invasions_timeseries = str(config.get('IN-MEMORY', {}).get('store_invasions_timeseries', True)).upper() == "TRUE"
 store_quests_timeseries = str(config.get('IN-MEMORY', {}).get('store_quests_timeseries', True)).upper() == "TRUE"
+# "hash" (one field per minute bucket) or "packed" (one 1440-slot u16 string per series and UTC day)
+pokemon_timeseries_storage = str(config.get('IN-MEMORY', {}).get('pokemon_timeseries_storage', "hash")).lower()
+if pokemon_timeseries_storage not in ("hash", "packed"):
+    pokemon_timeseries_storage = "hash"
 
 # Cleanup Redis Timeseries
 cleanup_interval_seconds = int(config.get("CLEAN_REDIS_TS", {}).get("cleanup_interval_seconds", 1800))
+timeseries_field_ttl     = str(config.get("CLEAN_REDIS_TS", {}).get("field_ttl", False)).upper() == "TRUE"
+
+# Counter rollups (ingest writes hourly only; leader compacts hourly -> daily -> weekly)
+counter_rollup_enabled          = str(config.get("COUNTER_ROLLUP", {}).get("enabled", False)).upper() == "TRUE"
+counter_rollup_interval_seconds = int(config.get("COUNTER_ROLLUP", {}).get("interval_seconds", 300))
+counter_rollup_grace_seconds    = int(config.get("COUNTER_ROLLUP", {}).get("grace_seconds", 300))
+
+# Rolling 24h counter windows (ring of the last 24 closed hours + running total per area, kept by the leader)
+counter_window_enabled          = str(config.get("COUNTER_WINDOW", {}).get("enabled", False)).upper() == "TRUE"
+counter_window_interval_seconds = int(config.get("COUNTER_WINDOW", {}).get("interval_seconds", 60))
+counter_window_grace_seconds    = int(config.get("COUNTER_WINDOW", {}).get("grace_seconds", 300))
+
+# Hour-of-day histograms (one hash per area and day mirroring the hourly counters, read by surged queries)
+hour_histograms_enabled         = str(config.get("HOUR_HISTOGRAMS", {}).get("enabled", False)).upper() == "TRUE"
+
+# Timeseries downsampling tiers (minute -> 15 minute -> hourly buckets, compacted by the leader)
+timeseries_tiers_enabled             = str(config.get("TIMESERIES_TIERS", {}).get("enabled", False)).upper() == "TRUE"
+timeseries_tiers_interval_seconds    = int(config.get("TIMESERIES_TIERS", {}).get("interval_seconds", 900))
+timeseries_tiers_grace_seconds       = int(config.get("TIMESERIES_TIERS", {}).get("grace_seconds", 300))
+timeseries_tier_15m_retention_days   = int(config.get("TIMESERIES_TIERS", {}).get("tier_15m_retention_days", 14))
+timeseries_tier_1h_retention_weeks   = int(config.get("TIMESERIES_TIERS", {}).get("tier_1h_retention_weeks", 8))
+
+# Global rollup keys (area "__all__" written next to the per-area keys at ingest)
+global_rollup_enabled  = str(config.get("GLOBAL_ROLLUP", {}).get("enabled", False)).upper() == "TRUE"
+global_rollup_families = {
+    str(f).strip().lower()
+    for f in config.get("GLOBAL_ROLLUP", {}).get("families", ["pokemon", "pokemon_tth", "pokemon_weather", "raids", "invasions", "quests"])
+    if str(f).strip()
+}
+
+# Unique-count sketches (HyperLogLogs of spawnpoints, scanner users, raid gyms and invasion stops per area and hour/day)
+unique_sketches_enabled               = str(config.get("UNIQUE_SKETCHES", {}).get("enabled", False)).upper() == "TRUE"
+unique_sketches_metrics               = {
+    str(m).strip().lower()
+    for m in config.get("UNIQUE_SKETCHES", {}).get("metrics", ["spawnpoints", "users", "raid_gyms", "invasion_stops"])
+    if str(m).strip()
+}
+unique_sketches_hourly_retention_hours = int(config.get("UNIQUE_SKETCHES", {}).get("hourly_retention_hours", 168))
+unique_sketches_daily_retention_days   = int(config.get("UNIQUE_SKETCHES", {}).get("daily_retention_days", 90))
+
+# Top-K leaderboards (sorted sets of species, raid bosses, quest rewards and invasion characters per area and day/week)
+top_k_enabled                = str(config.get("TOP_K", {}).get("enabled", False)).upper() == "TRUE"
+top_k_metrics                = {
+    str(m).strip().lower()
+    for m in config.get("TOP_K", {}).get("metrics", [
+        "pokemon_total", "pokemon_iv100", "pokemon_iv0", "pokemon_pvp_little", "pokemon_pvp_great",
+        "pokemon_pvp_ultra", "pokemon_shiny", "raid_bosses", "quest_rewards", "invasion_characters",
+    ])
+    if str(m).strip()
+}
+top_k_daily_retention_days   = int(config.get("TOP_K", {}).get("daily_retention_days", 30))
+top_k_weekly_retention_weeks = int(config.get("TOP_K", {}).get("weekly_retention_weeks", 12))
+
+# Closed-period result cache for counter and timeseries queries (worker LRU + optional Redis layer)
+result_cache_enabled            = str(config.get("RESULT_CACHE", {}).get("enabled", False)).upper() == "TRUE"
+result_cache_memory_max_mb      = int(config.get("RESULT_CACHE", {}).get("memory_max_mb", 64))
+result_cache_redis_enabled      = str(config.get("RESULT_CACHE", {}).get("redis_enabled", False)).upper() == "TRUE"
+result_cache_redis_ttl_seconds  = int(config.get("RESULT_CACHE", {}).get("redis_ttl_seconds", 604800))
+result_cache_grace_seconds      = int(config.get("RESULT_CACHE", {}).get("grace_seconds", 300))
+
+# Concurrent per-area execution of multi-area API queries (capped at half of the worker's query pool)
+query_fan_out_max_concurrency   = int(config.get("QUERY_FAN_OUT", {}).get("max_concurrency", 8))
+
+# Single-flight coalescing of identical concurrent API queries (per worker, optionally across workers via Redis)
+single_flight_enabled            = str(config.get("SINGLE_FLIGHT", {}).get("enabled", False)).upper() == "TRUE"
+single_flight_redis_enabled      = str(config.get("SINGLE_FLIGHT", {}).get("redis_enabled", False)).upper() == "TRUE"
+single_flight_wait_seconds       = int(config.get("SINGLE_FLIGHT", {}).get("wait_seconds", 30))
+single_flight_result_ttl_seconds = int(config.get("SINGLE_FLIGHT", {}).get("result_ttl_seconds", 10))
+
+# Conditional GET (ETag / Last-Modified, 304 Not Modified) on the data endpoints
+conditional_get_enabled = str(config.get("CONDITIONAL_GET", {}).get("enabled", False)).upper() == "TRUE"
+
+# Batch endpoint (POST /api/batch): several data queries in one request, sharing one fan-out budget
+batch_enabled         = str(config.get("BATCH", {}).get("enabled", False)).upper() == "TRUE"
+batch_max_queries     = int(config.get("BATCH", {}).get("max_queries", 100))
+batch_max_concurrency = int(config.get("BATCH", {}).get("max_concurrency", 4))
+
+# Live counter stream: ingest XADDs to live:events, API workers push per-minute deltas over SSE
+live_stream_enabled         = str(config.get("LIVE_STREAM", {}).get("enabled", False)).upper() == "TRUE"
+live_stream_max_len         = int(config.get("LIVE_STREAM", {}).get("max_len", 100000))
+live_stream_flush_seconds   = float(config.get("LIVE_STREAM", {}).get("flush_seconds", 5))
+live_stream_queue_size      = int(config.get("LIVE_STREAM", {}).get("queue_size", 100))
+live_stream_max_subscribers = int(config.get("LIVE_STREAM", {}).get("max_subscribers", 100))
+
+# Admission control: cost estimates of counter/timeseries queries, limits for heavy ones (per worker)
+admission_enabled              = str(config.get("ADMISSION", {}).get("enabled", False)).upper() == "TRUE"
+admission_max_fields           = int(config.get("ADMISSION", {}).get("max_fields", 50000000))
+admission_heavy_fields         = int(config.get("ADMISSION", {}).get("heavy_fields", 5000000))
+admission_max_heavy_global     = int(config.get("ADMISSION", {}).get("max_heavy_global", 2))
+admission_max_heavy_per_client = int(config.get("ADMISSION", {}).get("max_heavy_per_client", 1))
+admission_queue_seconds        = float(config.get("ADMISSION", {}).get("queue_seconds", 10))
+
+# Response compression (gzip, br, zstd by Accept-Encoding) of API responses above min_bytes
+compression_enabled        = str(config.get("COMPRESSION", {}).get("enabled", False)).upper() == "TRUE"
+compression_min_bytes      = int(config.get("COMPRESSION", {}).get("min_bytes", 1024))
+compression_encodings      = [e.strip().lower() for e in str(config.get("COMPRESSION", {}).get("encodings", "zstd,br,gzip")).split(",") if e.strip()]
+compression_gzip_level     = int(config.get("COMPRESSION", {}).get("gzip_level", 6))
+compression_brotli_quality = int(config.get("COMPRESSION", {}).get("brotli_quality", 5))
+compression_zstd_level     = int(config.get("COMPRESSION", {}).get("zstd_level", 3))
+compression_memo_max_mb    = int(config.get("COMPRESSION", {}).get("memo_max_mb", 32))
+
+# Redis memory accounting (leader samples key sizes per family and area)
+memory_report_enabled           = str(config.get("MEMORY_REPORT", {}).get("enabled", False)).upper() == "TRUE"
+memory_report_interval_seconds  = int(config.get("MEMORY_REPORT", {}).get("interval_seconds", 3600))
+memory_report_samples_per_group = int(config.get("MEMORY_REPORT", {}).get("samples_per_group", 20))
+memory_report_scan_count        = int(config.get("MEMORY_REPORT", {}).get("scan_count", 1000))
+memory_report_history           = int(config.get("MEMORY_REPORT", {}).get("history", 24))
 
 # Redis MySQL Backup
 redis_mysql_backups          = str(config.get("IN-MEMORY", {}).get("REDIS_MYSQL_BACKUPS", False)).upper() == "TRUE"
@@ -14,6 +14,7 @@ from dashboard.utils import (
     get_global_quests_task,
     get_global_pokestops_task,
     get_global_areas_task,
+    rolling_day_params,
 )
 
 # Relative path to data/ folder
@@ -69,7 +70,7 @@ TASK_CONFIG = {
     "invasions_daily": {
         "func": get_global_invasions_task,
         "file": os.path.join(DATA_DIR, 'global_invasions.json'),
-        "params": {
+        "params": rolling_day_params({
             "counter_type": "totals",
             "interval": "hourly",
             "start_time": "24 hours",
@@ -81,13 +82,13 @@ TASK_CONFIG = {
             "character": "all",
             "grunt": "all",
             "confirmed": "all"
-        },
+        }),
         "task_interval": DEFAULT_INTERVAL
     },
     "quests_daily": {
         "func": get_global_quests_task,
         "file": os.path.join(DATA_DIR, 'global_quests.json'),
-        "params": {
+        "params": rolling_day_params({
             "counter_type": "totals",
             "interval": "hourly",
             "start_time": "24 hours",
@@ -101,7 +102,7 @@ TASK_CONFIG = {
             "normal_type": "all", "reward_normal_type": "all",
             "reward_normal_item_id": "all", "reward_normal_item_amount": "all",
             "reward_normal_poke_id": "all", "reward_normal_poke_form": "all"
-        },
+        }),
         "task_interval": DEFAULT_INTERVAL
     },
     # Slow refresh tasks
@@ -5,9 +5,10 @@ import config as AppConfig
 from urllib.parse import quote
 import json
 import os
+import threading
 import time
 from pathlib import Path
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
 from utils.logger import logger
@@ -21,6 +22,20 @@ REWARD_CACHE_DIR = Path(__file__).parent / "assets" / "reward_icons"
 INVASION_ICONS_DIR = Path(__file__).parent / "assets" / "invasion_icons"
 GLOBAL_AREAS_FILE = Path(__file__).parent / "data" / "global_areas.json"
 
+# Global rollup keys (GLOBAL_ROLLUP in config.json): one request with area=__all__ instead of one per area
+GLOBAL_ROLLUP_AREA = "__all__"
+GLOBAL_ROLLUP_ENDPOINTS = {
+    "/api/redis/get_pokemon_counterseries": {"totals": "pokemon", "tth": "pokemon_tth", "weather": "pokemon_weather"},
+    "/api/redis/get_pokemon_timeseries": "pokemon",
+    "/api/redis/get_pokemon_tth_timeseries": "pokemon_tth",
+    "/api/redis/get_raids_counterseries": "raids",
+    "/api/redis/get_raid_timeseries": "raids",
+    "/api/redis/get_invasions_counterseries": "invasions",
+    "/api/redis/get_invasion_timeseries": "invasions",
+    "/api/redis/get_quest_counterseries": "quests",
+    "/api/redis/get_quest_timeseries": "quests",
+}
+
 # Ensure cache directories exist
 ICON_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 REWARD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
@@ -50,11 +65,54 @@ def get_api_headers():
         headers[AppConfig.api_header_name] = AppConfig.api_header_secret
     return headers
 
+# Last response per API request, revalidated with If-None-Match on the next poll (CONDITIONAL_GET)
+CONDITIONAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_conditional_cache = OrderedDict()
+_conditional_cache_bytes = 0
+_conditional_lock = threading.Lock()
+
+def _remember_response(key, response):
+    global _conditional_cache_bytes
+    size = len(response.content)
+    if size > CONDITIONAL_CACHE_MAX_BYTES:
+        return
+    with _conditional_lock:
+        old = _conditional_cache.pop(key, None)
+        if old is not None:
+            _conditional_cache_bytes -= len(old.content)
+        _conditional_cache[key] = response
+        _conditional_cache_bytes += size
+        while _conditional_cache_bytes > CONDITIONAL_CACHE_MAX_BYTES:
+            _, evicted = _conditional_cache.popitem(last=False)
+            _conditional_cache_bytes -= len(evicted.content)
+
+def api_get(url, headers=None, params=None, timeout=None):
+    """
+    requests.get() for API endpoints that revalidates the last response to the same request:
+    its ETag is sent as If-None-Match, and on 304 Not Modified that stored response is returned.
+    """
+    key = (url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+    with _conditional_lock:
+        cached = _conditional_cache.get(key)
+        if cached is not None:
+            _conditional_cache.move_to_end(key)
+
+    request_headers = dict(headers or {})
+    if cached is not None:
+        request_headers["If-None-Match"] = cached.headers["ETag"]
+    response = requests.get(url, headers=request_headers, params=params, timeout=timeout)
+
+    if response.status_code == 304 and cached is not None:
+        return cached
+    if response.status_code == 200 and response.headers.get("ETag"):
+        _remember_response(key, response)
+    return response
+
 def get_cached_geofences():
     """Fetch geofences from the FastAPI endpoint."""
     try:
         url = f"{API_BASE_URL}/api/redis/get_cached_geofences"
-        response = requests.get(url, headers=get_api_headers(), params={"response_format": "json"})
+        response = api_get(url, headers=get_api_headers(), params={"response_format": "json"})
         if response.status_code == 200:
             return response.json()
     except Exception as e:
@@ -145,7 +203,7 @@ def _fetch_single_area(endpoint, params, area_name, headers, max_retries=2):
         try:
             area_params = params.copy()
             area_params["area"] = area_name
-            response = requests.get(endpoint, headers=headers, params=area_params, timeout=60)
+            response = api_get(endpoint, headers=headers, params=area_params, timeout=60)
 
             if response.status_code == 200:
                 data = response.json()
@@ -193,12 +251,45 @@ def _fetch_single_area(endpoint, params, area_name, headers, max_retries=2):
     return (area_name, None, last_error)
 
 
+def _global_rollup_family(endpoint, params):
+    """Rollup family an endpoint reads, or None when it has no global rollup keys enabled."""
+    if not AppConfig.global_rollup_enabled:
+        return None
+    family = next((f for path, f in GLOBAL_ROLLUP_ENDPOINTS.items() if endpoint.endswith(path)), None)
+    if isinstance(family, dict):
+        family = family.get(str(params.get("counter_type", "totals")).lower())
+    return family if family in AppConfig.global_rollup_families else None
+
+
+def rolling_day_params(params):
+    """
+    Daily background-task params: with COUNTER_WINDOW enabled the "last 24 hours" hourly query
+    becomes last_hours=24, which the API serves from the materialized per-area window.
+    """
+    if not AppConfig.counter_window_enabled or params.get("interval") != "hourly":
+        return params
+    params = {k: v for k, v in params.items() if k not in ("start_time", "end_time")}
+    params["last_hours"] = 24
+    return params
+
+
 def fetch_all_areas_parallel(endpoint, params, max_workers=5):
     """
     Fetches data from all areas in parallel and returns a dict of {area_name: data}.
     Uses global_areas.json for the list of areas.
     Logs failed areas with their failure reasons.
+
+    With the global rollup enabled for the endpoint's family, a single area=__all__ request
+    replaces the per-area fan-out and the result is {"__all__": data}.
     """
+    family = _global_rollup_family(endpoint, params)
+    if family:
+        area_name, data, error_reason = _fetch_single_area(endpoint, params, GLOBAL_ROLLUP_AREA, get_api_headers())
+        if data:
+            logger.info(f"Fetched global rollup data for {family} in a single request")
+            return {area_name: data}
+        logger.warning(f"Global rollup request for {family} returned no data ({error_reason or 'empty'}) - fetching per area")
+
     areas = load_global_areas()
     if not areas:
         logger.warning("No areas found in global_areas.json - falling back to empty result")
@@ -276,7 +367,7 @@ def get_pokemon_stats(endpoint_type="counter", params=None):
 
     try:
         url = f"{API_BASE_URL}{endpoint}"
-        response = requests.get(url, headers=get_api_headers(), params=params)
+        response = api_get(url, headers=get_api_headers(), params=params)
         if response.status_code == 200:
             data = response.json()
             if isinstance(data, dict):
@@ -287,6 +378,34 @@ def get_pokemon_stats(endpoint_type="counter", params=None):
     return {}
 
 
+def fetch_batch(endpoint, params_list, fallback):
+    """
+    Results of several queries to one endpoint, in order, fetched with a single POST /api/batch.
+    Each result is unwrapped like the get_*_stats fetchers do ({} for a failed query).
+    If the batch request itself fails, every query goes through fallback(params) instead.
+    """
+    if not params_list:
+        return []
+    queries = [{"id": str(i), "endpoint": endpoint, "params": params} for i, params in enumerate(params_list)]
+    try:
+        response = requests.post(f"{API_BASE_URL}/api/batch", headers=get_api_headers(),
+                                 json={"queries": queries}, timeout=120)
+        if response.status_code == 200:
+            results = response.json().get("data", {})
+            out = []
+            for query in queries:
+                entry = results.get(query["id"], {})
+                if "error" in entry:
+                    logger.info(f"Batch query {query['id']} to {endpoint} failed: {entry['error']}")
+                data = entry.get("result", {})
+                out.append(data.get("data", data) if isinstance(data, dict) else data)
+            return out
+        logger.info(f"Batch request to {endpoint} returned HTTP {response.status_code}, fetching one by one")
+    except Exception as e:
+        logger.info(f"Error fetching batch for {endpoint}: {e}, fetching one by one")
+    return [fallback(params) for params in params_list]
+
+
 def get_pokemon_daily_timeseries(start_date, end_date, area, counter_type="totals"):
     """
     Fetch daily sum data for a date range and build a timeseries.
@@ -335,6 +454,7 @@ def get_pokemon_daily_timeseries(start_date, end_date, area, counter_type="total
 
     dates = []
     daily_data = []
+    day_params = []
 
     # Fetch data for each day
     current = start
@@ -352,8 +472,11 @@ def get_pokemon_daily_timeseries(start_date, end_date, area, counter_type="total
             "response_format": "json"
         }
 
-        data = get_pokemon_stats("counter", params)
+        day_params.append(params)
+        current += timedelta(days=1)
 
+    # All days in one batch request (one request per day against servers without /api/batch)
+    for data in fetch_batch("/api/redis/get_pokemon_counterseries", day_params, lambda p: get_pokemon_stats("counter", p)):
         # Handle area-wrapped response
         if isinstance(data, dict):
             # Check if response is wrapped by area name
@@ -364,7 +487,6 @@ def get_pokemon_daily_timeseries(start_date, end_date, area, counter_type="total
                 data = data["data"]
 
         daily_data.append(data if isinstance(data, dict) else {})
-        current += timedelta(days=1)
 
     # Build timeseries structure
     # Collect all unique metrics across all days
@@ -439,6 +561,7 @@ def get_raids_daily_timeseries(start_date, end_date, area):
 
     dates = []
     daily_data = []
+    day_params = []
 
     current = start
     while current <= end:
@@ -455,8 +578,11 @@ def get_raids_daily_timeseries(start_date, end_date, area):
             "response_format": "json"
         }
 
-        data = get_raids_stats("counter", params)
+        day_params.append(params)
+        current += timedelta(days=1)
 
+    # All days in one batch request (one request per day against servers without /api/batch)
+    for data in fetch_batch("/api/redis/get_raids_counterseries", day_params, lambda p: get_raids_stats("counter", p)):
         # Handle area-wrapped response
         if isinstance(data, dict):
             if area in data:
@@ -465,7 +591,6 @@ def get_raids_daily_timeseries(start_date, end_date, area):
                 data = data["data"]
 
         daily_data.append(data if isinstance(data, dict) else {})
-        current += timedelta(days=1)
 
     # Build metrics from raid data structure
     # Raw format: {"total": X, "raid_level": {"1": Y, "3": Z, ...}}
@@ -543,6 +668,7 @@ def get_invasions_daily_timeseries(start_date, end_date, area):
 
     dates = []
     daily_data = []
+    day_params = []
 
     current = start
     while current <= end:
@@ -559,8 +685,11 @@ def get_invasions_daily_timeseries(start_date, end_date, area):
             "response_format": "json"
         }
 
-        data = get_invasions_stats("counter", params)
+        day_params.append(params)
+        current += timedelta(days=1)
 
+    # All days in one batch request (one request per day against servers without /api/batch)
+    for data in fetch_batch("/api/redis/get_invasions_counterseries", day_params, lambda p: get_invasions_stats("counter", p)):
         # Handle area-wrapped response
         if isinstance(data, dict):
             if area in data:
@@ -569,7 +698,6 @@ def get_invasions_daily_timeseries(start_date, end_date, area):
                 data = data["data"]
 
         daily_data.append(data if isinstance(data, dict) else {})
-        current += timedelta(days=1)
 
     # Build metrics from invasion data structure
     # Raw format: {"total": X, "confirmed": {"0": Y, "1": Z}}
@@ -637,6 +765,7 @@ def get_quests_daily_timeseries(start_date, end_date, area):
 
     dates = []
     daily_data = []
+    day_params = []
 
     current = start
     while current <= end:
@@ -653,8 +782,11 @@ def get_quests_daily_timeseries(start_date, end_date, area):
             "response_format": "json"
         }
 
-        data = get_quests_stats("counter", params)
+        day_params.append(params)
+        current += timedelta(days=1)
 
+    # All days in one batch request (one request per day against servers without /api/batch)
+    for data in fetch_batch("/api/redis/get_quest_counterseries", day_params, lambda p: get_quests_stats("counter", p)):
         # Handle area-wrapped response
         if isinstance(data, dict):
             if area in data:
@@ -663,7 +795,6 @@ def get_quests_daily_timeseries(start_date, end_date, area):
                 data = data["data"]
 
         daily_data.append(data if isinstance(data, dict) else {})
-        current += timedelta(days=1)
 
     # Build metrics from quest data structure
     # Raw format: {"total": X, "quest_mode": {"ar": Y, "normal": Z}}
@@ -723,7 +854,7 @@ def get_raids_stats(endpoint_type="counter", params=None):
 
     try:
         url = f"{API_BASE_URL}{endpoint}"
-        response = requests.get(url, headers=get_api_headers(), params=params)
+        response = api_get(url, headers=get_api_headers(), params=params)
         if response.status_code == 200:
             data = response.json()
             if isinstance(data, dict):
@@ -755,7 +886,7 @@ def get_invasions_stats(endpoint_type="counter", params=None):
 
     try:
         url = f"{API_BASE_URL}{endpoint}"
-        response = requests.get(url, headers=get_api_headers(), params=params)
+        response = api_get(url, headers=get_api_headers(), params=params)
         if response.status_code == 200:
             data = response.json()
             if isinstance(data, dict):
@@ -787,7 +918,7 @@ def get_quests_stats(endpoint_type="counter", params=None):
 
     try:
         url = f"{API_BASE_URL}{endpoint}"
-        response = requests.get(url, headers=get_api_headers(), params=params)
+        response = api_get(url, headers=get_api_headers(), params=params)
         if response.status_code == 200:
             data = response.json()
             if isinstance(data, dict):
@@ -1246,7 +1377,7 @@ def get_global_pokemon_task(endpoint_type="counter", params=None):
 
     # Setup Defaults for Background Task if needed
     if params is None:
-        params = {
+        params = rolling_day_params({
             "counter_type": "totals",
             "area": "global",
             "start_time": "24 hours",
@@ -1257,7 +1388,7 @@ def get_global_pokemon_task(endpoint_type="counter", params=None):
             "pokemon_id": "all",
             "form_id": "all",
             "response_format": "json"
-        }
+        })
 
     if "area" not in params: params["area"] = "global"
     if "response_format" not in params: params["response_format"] = "json"
@@ -1283,7 +1414,7 @@ def get_global_pokemon_task(endpoint_type="counter", params=None):
         else:
             # Single area request
             url = f"{API_BASE_URL}{endpoint}"
-            response = requests.get(url, headers=get_api_headers(), params=params)
+            response = api_get(url, headers=get_api_headers(), params=params)
 
             if response.status_code != 200:
                 logger.info(f"Error fetching pokemon: HTTP {response.status_code}")
@@ -1331,7 +1462,7 @@ def get_global_raids_task(endpoint_type="counter", params=None):
     """
 
     if params is None:
-        params = {
+        params = rolling_day_params({
             "counter_type": "totals",
             "area": "global",
             "start_time": "24 hours",
@@ -1342,7 +1473,7 @@ def get_global_raids_task(endpoint_type="counter", params=None):
             "raid_form": "all",
             "raid_level": "all",
             "response_format": "json"
-        }
+        })
 
     if "area" not in params: params["area"] = "global"
     if "response_format" not in params: params["response_format"] = "json"
@@ -1364,7 +1495,7 @@ def get_global_raids_task(endpoint_type="counter", params=None):
         else:
             # Single area request
             url = f"{API_BASE_URL}{endpoint}"
-            response = requests.get(url, headers=get_api_headers(), params=params)
+            response = api_get(url, headers=get_api_headers(), params=params)
 
             if response.status_code != 200:
                 logger.info(f"Error fetching raids: HTTP {response.status_code}")
@@ -1451,7 +1582,7 @@ def get_global_invasions_task(endpoint_type="counter", params=None):
         else:
             # Single area request
             url = f"{API_BASE_URL}{endpoint}"
-            response = requests.get(url, headers=get_api_headers(), params=params)
+            response = api_get(url, headers=get_api_headers(), params=params)
 
             if response.status_code != 200:
                 logger.info(f"Error fetching invasions: HTTP {response.status_code}")
@@ -1578,7 +1709,7 @@ def get_global_pokestops_task(params=None):
 
     try:
         url = f"{API_BASE_URL}{endpoint}"
-        response = requests.get(url, headers=get_api_headers(), params=params)
+        response = api_get(url, headers=get_api_headers(), params=params)
 
         if response.status_code != 200:
             logger.info(f"Error fetching global pokestops: HTTP {response.status_code}")
@@ -1781,7 +1912,7 @@ def get_global_quests_task(endpoint_type="counter", params=None):
         if params.get("area") == "global":
             raw_data = fetch_all_areas_parallel(url, params, max_workers=5)
         else:
-            response = requests.get(url, headers=get_api_headers(), params=params)
+            response = api_get(url, headers=get_api_headers(), params=params)
             if response.status_code != 200:
                 logger.info(f"Error fetching quests: HTTP {response.status_code}")
                 return None
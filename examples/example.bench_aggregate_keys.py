@@ -0,0 +1,87 @@
+import asyncio
+import random
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import redis.asyncio as redis
+import config as AppConfig
+from my_redis.utils import filtering_keys
+
+# Synthetic data shaped like counter:pokemon_daily:{area}:{YYYYMMDD}
+BENCH_PREFIX = "bench:aggregate"
+
+
+def prompt_for_parameters():
+    print("Configure benchmark. Press Enter to accept the default value shown in quotes.")
+    areas = int(input("Number of areas (default '150'): ") or 150)
+    days = int(input("Number of days per area (default '30'): ") or 30)
+    fields = int(input("Fields per hash (default '300'): ") or 300)
+    rounds = int(input("Rounds per strategy (default '3'): ") or 3)
+    return areas, days, fields, rounds
+
+
+async def seed_keys(client, areas: int, days: int, fields: int) -> list[str]:
+    keys = []
+    async with client.pipeline(transaction=False) as pipe:
+        for a in range(areas):
+            for d in range(days):
+                key = f"{BENCH_PREFIX}:Area{a}:202501{d + 1:02d}"
+                keys.append(key)
+                mapping = {
+                    f"{pid}:0:total": random.randint(1, 50)
+                    for pid in random.sample(range(1, 1000), fields)
+                }
+                pipe.hset(key, mapping=mapping)
+        await pipe.execute()
+    return keys
+
+
+async def cleanup_keys(client, keys: list[str]):
+    for i in range(0, len(keys), 1000):
+        await client.delete(*keys[i:i + 1000])
+
+
+async def bench_strategy(client, keys, mode, strategy, rounds):
+    timings = []
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = await filtering_keys.aggregate_keys(keys, mode, strategy=strategy, client=client)
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings), result
+
+
+async def main():
+    areas, days, fields, rounds = prompt_for_parameters()
+    client = redis.from_url(AppConfig.redis_url, decode_responses=True, max_connections=32)
+
+    print(f"🌱 Seeding {areas * days} keys with {fields} fields each...")
+    keys = await seed_keys(client, areas, days, fields)
+
+    try:
+        for mode in ("sum", "grouped"):
+            print(f"\n📊 mode={mode} keys={len(keys)} "
+                  f"(auto strategy: {filtering_keys.choose_aggregation_strategy(len(keys), mode)})")
+            baseline = None
+            for strategy in filtering_keys.AGGREGATION_STRATEGIES:
+                if strategy == "lua" and mode != "sum":
+                    continue
+                best, avg, result = await bench_strategy(client, keys, mode, strategy, rounds)
+                if baseline is None:
+                    baseline = (best, result)
+                    speedup = "baseline"
+                else:
+                    speedup = f"{baseline[0] / best:.1f}x"
+                    if result != baseline[1]:
+                        print(f"❌ {strategy} result differs from loop baseline!")
+                print(f"  {strategy:<11} best={best:.3f}s avg={avg:.3f}s {speedup}")
+    finally:
+        await cleanup_keys(client, keys)
+        await client.aclose()
+        print("\n🧹 Benchmark keys removed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
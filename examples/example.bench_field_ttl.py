@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import redis.asyncio as redis
+import config as AppConfig
+from my_redis.utils import expire_timeseries
+from my_redis.utils.field_ttl import detect_field_ttl_support
+
+# Synthetic data shaped like ts:pokemon:total:{area}:{pokemon_id}:{form}, one field per minute bucket
+BENCH_PREFIX = "bench:field_ttl"
+RETENTION_SEC = 72 * 3600
+
+
+def prompt_for_parameters():
+    print("Configure benchmark. Press Enter to accept the default value shown in quotes.")
+    keys = int(input("Number of timeseries hashes (default '2000'): ") or 2000)
+    old_fields = int(input("Expired minute buckets per hash (default '200'): ") or 200)
+    live_fields = int(input("Live minute buckets per hash (default '200'): ") or 200)
+    return keys, old_fields, live_fields
+
+
+async def server_cpu(client) -> float:
+    info = await client.info("cpu")
+    return float(info["used_cpu_sys"]) + float(info["used_cpu_user"])
+
+
+async def seed(client, keys: int, old_fields: int, live_fields: int, ttl_at: int = None) -> list[str]:
+    """
+    Write hashes with `old_fields` buckets past retention and `live_fields` recent ones.
+    With ttl_at, the old buckets get HEXPIREAT ttl_at (what ingest would have set back then).
+    """
+    now = int(time.time()) // 60 * 60
+    names = []
+    async with client.pipeline(transaction=False) as pipe:
+        for k in range(keys):
+            key = f"{BENCH_PREFIX}:Area{k % 50}:{k}:0"
+            names.append(key)
+            old = [str(now - RETENTION_SEC - 60 * (i + 1)) for i in range(old_fields)]
+            live = [str(now - 60 * i) for i in range(live_fields)]
+            pipe.hset(key, mapping={f: random.randint(1, 9) for f in old + live})
+            if ttl_at:
+                if old:
+                    pipe.hexpireat(key, ttl_at, *old)
+                if live:
+                    pipe.hexpireat(key, int(now) + RETENTION_SEC, *live)
+            if k % 200 == 199:
+                await pipe.execute()
+        await pipe.execute()
+    return names
+
+
+async def total_fields(client, names: list[str]) -> int:
+    async with client.pipeline(transaction=False) as pipe:
+        for key in names:
+            pipe.hlen(key)
+        return sum(await pipe.execute())
+
+
+async def cleanup_keys(client, names: list[str]):
+    for i in range(0, len(names), 1000):
+        await client.delete(*names[i:i + 1000])
+
+
+async def bench_lua(client, names: list[str]):
+    cutoff = int(time.time()) - RETENTION_SEC
+    chunks = [names[i:i + expire_timeseries.CHUNK_SIZE_DEFAULT]
+              for i in range(0, len(names), expire_timeseries.CHUNK_SIZE_DEFAULT)]
+    cpu_before = await server_cpu(client)
+    start = time.perf_counter()
+    removed = 0
+    for chunk in chunks:
+        r, _ = await expire_timeseries._clean_keys_chunk(client, chunk, cutoff)
+        removed += r
+    wall = time.perf_counter() - start
+    return await server_cpu(client) - cpu_before, wall, removed
+
+
+async def idle_cpu(client, seconds: float) -> float:
+    before = await server_cpu(client)
+    await asyncio.sleep(seconds)
+    return await server_cpu(client) - before
+
+
+async def bench_field_ttl(client, names: list[str], expected: int, timeout: float = 120):
+    """CPU spent while Redis expires the old buckets on its own, minus an idle baseline."""
+    cpu_before = await server_cpu(client)
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        await asyncio.sleep(1)
+        if await total_fields(client, names) <= expected:
+            break
+    wall = time.perf_counter() - start
+    used = await server_cpu(client) - cpu_before
+    return used, wall, await total_fields(client, names)
+
+
+async def main():
+    keys, old_fields, live_fields = prompt_for_parameters()
+    client = redis.from_url(AppConfig.redis_url, decode_responses=True)
+
+    names = []
+    try:
+        print(f"🌱 Seeding {keys} hashes ({old_fields} expired + {live_fields} live buckets each)...")
+        names = await seed(client, keys, old_fields, live_fields)
+        cpu, wall, removed = await bench_lua(client, names)
+        print(f"  lua cleanup  cpu={cpu:.3f}s wall={wall:.3f}s fields removed={removed}")
+        await cleanup_keys(client, names)
+
+        # Detect HEXPIRE support the way a worker does at startup, whatever CLEAN_REDIS_TS says
+        AppConfig.timeseries_field_ttl = True
+        if not await detect_field_ttl_support(client):
+            print("⚠️ This Redis has no HEXPIRE; field TTL run skipped")
+            return
+
+        # Old buckets expire a few seconds after seeding, as if they just crossed retention
+        names = await seed(client, keys, old_fields, live_fields, ttl_at=int(time.time()) + 3)
+        cpu, wall, left = await bench_field_ttl(client, names, keys * live_fields)
+        baseline = await idle_cpu(client, wall)
+        print(f"  field ttl    cpu={max(cpu - baseline, 0):.3f}s (raw {cpu:.3f}s, idle {baseline:.3f}s) "
+              f"wall={wall:.1f}s fields left={left} (expected {keys * live_fields})")
+    finally:
+        await cleanup_keys(client, names)
+        await client.aclose()
+        print("\n🧹 Benchmark keys removed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
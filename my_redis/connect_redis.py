@@ -1,4 +1,6 @@
 import redis.asyncio as redis
+from redis.asyncio.cluster import RedisCluster
+from redis.exceptions import ConnectionError as RedisConnectionError
 import config as AppConfig
 from utils.logger import logger
 import asyncio
@@ -7,35 +9,137 @@ from typing import Optional
 from contextlib import asynccontextmanager
 from time import monotonic
 
+# Named pools: each has its own connection budget, timeouts and optional endpoint (config REDIS.pools)
+POOL_INGEST     = "ingest"      # webhook writes (parser_data, updates/*, SQL buffers)
+POOL_QUERY      = "query"       # API reads (gets/*, aggregate_keys)
+POOL_BACKGROUND = "background"  # leader jobs, cleanup, backups, leader election, global state
+POOL_REPLICA    = "replica"     # optional read replica for API reads (REDIS_REPLICA_URL), see get_read_client()
+
+# Per-worker connection floor of a pool when its budget divided by the workers comes out lower
+MIN_CONNECTIONS_PER_WORKER = {POOL_INGEST: 10}
+
+
+class MeteredConnectionPool(redis.BlockingConnectionPool):
+    """
+    Blocking pool (callers wait up to `timeout` for a free connection instead of failing at once)
+    that keeps simple counters for utilization reporting.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquired = 0
+        self.wait_timeouts = 0
+        self.connect_errors = 0
+        self.peak_in_use = 0
+
+    async def get_connection(self, *args, **kwargs):
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except RedisConnectionError as e:
+            # BlockingConnectionPool raises "No connection available." when `timeout` runs out;
+            # anything else is a failure to reach Redis, not a wait for the pool
+            if "No connection available" in str(e):
+                self.wait_timeouts += 1
+            else:
+                self.connect_errors += 1
+            raise
+        self.acquired += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use())
+        return connection
+
+    def in_use(self) -> int:
+        return len(getattr(self, "_in_use_connections", ()))
+
+    def idle(self) -> int:
+        return len(getattr(self, "_available_connections", ()))
+
+
 class RedisManager:
-    """Enhanced Redis connection manager with smart reconnection logic and multi-worker support."""
-    redis_url = AppConfig.redis_url
-    _instance = None
-    _last_successful_ping = 0
-    _connection_attempts = 0
+    """
+    Enhanced Redis connection manager with smart reconnection logic and multi-worker support.
+    One singleton per named pool: RedisManager(POOL_INGEST), RedisManager(POOL_QUERY), RedisManager(POOL_BACKGROUND).
+    """
+    _instances: dict[str, "RedisManager"] = {}
     MAX_RETRY_INTERVAL = 30  # Maximum seconds between retries
     HEALTH_CHECK_INTERVAL = 15  # Seconds between proactive health checks (reduced for sustained load)
-    _reconnect_in_progress = False  # Prevent thundering herd
 
-    @classmethod
-    def _get_per_worker_max_connections(cls) -> int:
+    def _get_per_worker_max_connections(self) -> int:
         """
-        Calculate max connections per worker to prevent exhausting Redis.
-        Divides total configured connections by number of workers, with a minimum floor.
+        Calculate max connections per worker for this pool to prevent exhausting Redis.
+        Divides the pool's configured connections by number of workers, with a minimum floor.
         """
-        total_max = AppConfig.redis_max_connections
+        total_max = self.pool_config["connections"]
         workers = max(1, AppConfig.uvicorn_workers)
-        # Each worker gets a share of connections, with a minimum of 10
-        per_worker = max(10, total_max // workers)
+        # Each worker gets a share of connections, with a minimum of 2 (10 for ingest, the floor the
+        # single shared pool had, so webhook writes don't queue on a small budget)
+        per_worker = max(MIN_CONNECTIONS_PER_WORKER.get(self.pool_name, 2), total_max // workers)
         return per_worker
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.redis_client = None
-            cls._instance._connection_lock = None  # Lazily created to avoid semaphore leaks
-            cls._instance._connection_state = "disconnected"
-        return cls._instance
+    def connection_budget(self) -> int:
+        """Connections this worker may hold in this pool."""
+        return self._get_per_worker_max_connections()
+
+    def __new__(cls, pool: str = POOL_BACKGROUND):
+        if pool not in AppConfig.redis_pools:
+            raise ValueError(f"Unknown Redis pool '{pool}'. Expected one of: {', '.join(AppConfig.redis_pools)}")
+        if pool not in cls._instances:
+            instance = super().__new__(cls)
+            instance.pool_name = pool
+            instance.pool_config = AppConfig.redis_pools[pool]
+            instance.redis_url = instance.pool_config["url"]
+            instance.redis_client = None
+            instance._connection_lock = None  # Lazily created to avoid semaphore leaks
+            instance._connection_state = "disconnected"
+            instance._last_successful_ping = 0
+            instance._connection_attempts = 0
+            instance._reconnect_in_progress = False  # Prevent thundering herd
+            instance._replica_fresh = False
+            instance._replica_checked_at = 0
+            instance._replica_reconnect = None  # Background init_redis() task of the replica pool
+            cls._instances[pool] = instance
+        return cls._instances[pool]
+
+    @classmethod
+    async def init_pools(cls) -> bool:
+        """Initialize every configured pool. Returns False if any required pool failed to connect."""
+        results = [await cls(pool).init_redis() for pool in AppConfig.redis_pools if pool != POOL_REPLICA]
+        if POOL_REPLICA in AppConfig.redis_pools and not await cls(POOL_REPLICA).init_redis():
+            # The replica is optional: get_read_client() falls back to the primary until it is reachable
+            logger.warning("⚠️ Redis replica unavailable at startup — API reads will use the primary")
+        return all(results)
+
+    @classmethod
+    async def close_pools(cls) -> None:
+        for manager in list(cls._instances.values()):
+            await manager.close_redis()
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        """Per-pool utilization for this worker."""
+        stats = {}
+        for pool in AppConfig.redis_pools:
+            manager = cls._instances.get(pool)
+            client = manager.redis_client if manager else None
+            conn_pool = getattr(client, "connection_pool", None)
+            max_connections = manager._get_per_worker_max_connections() if manager else 0
+            if not isinstance(conn_pool, MeteredConnectionPool):
+                stats[pool] = {"state": manager._connection_state if manager else "unused", "max_connections": max_connections}
+                continue
+            in_use = conn_pool.in_use()
+            stats[pool] = {
+                "state": manager._connection_state,
+                "endpoint": f"{conn_pool.connection_kwargs.get('host')}:{conn_pool.connection_kwargs.get('port')}",
+                "max_connections": max_connections,
+                "in_use": in_use,
+                "idle": conn_pool.idle(),
+                "peak_in_use": conn_pool.peak_in_use,
+                "utilization": round(in_use / max_connections, 3) if max_connections else 0.0,
+                "acquired": conn_pool.acquired,
+                "wait_timeouts": conn_pool.wait_timeouts,
+                "connect_errors": conn_pool.connect_errors,
+            }
+            if pool == POOL_REPLICA:
+                stats[pool]["fresh"] = manager._replica_fresh
+        return stats
 
     def _get_connection_lock(self) -> asyncio.Lock:
         """Lazily create the connection lock in the worker's event loop."""
@@ -55,22 +159,38 @@ class RedisManager:
 
             try:
                 per_worker_max = self._get_per_worker_max_connections()
-                logger.info(f"🔃 Establishing Redis connection (max_connections={per_worker_max} for this worker)...")
-                self.redis_client = await redis.from_url(
-                    self.redis_url,
-                    decode_responses=True,
-                    socket_keepalive=True,
-                    socket_timeout=5,
-                    max_connections=per_worker_max,
-                    health_check_interval=30,
-                    retry_on_timeout=True,
-                    socket_connect_timeout=5,
-                )
+                logger.info(f"🔃 Establishing Redis '{self.pool_name}' pool (max_connections={per_worker_max} for this worker)...")
+                if AppConfig.redis_cluster:
+                    # Cluster client discovers all shards from this node; max_connections applies per node
+                    self.redis_client = RedisCluster.from_url(
+                        self.redis_url,
+                        decode_responses=True,
+                        socket_keepalive=True,
+                        socket_timeout=self.pool_config["socket_timeout"],
+                        max_connections=per_worker_max,
+                        health_check_interval=30,
+                        retry_on_timeout=True,
+                        socket_connect_timeout=5,
+                    )
+                    await self.redis_client.initialize()
+                else:
+                    pool = MeteredConnectionPool.from_url(
+                        self.redis_url,
+                        decode_responses=True,
+                        socket_keepalive=True,
+                        socket_timeout=self.pool_config["socket_timeout"],
+                        max_connections=per_worker_max,
+                        timeout=self.pool_config["pool_timeout"],
+                        health_check_interval=30,
+                        retry_on_timeout=True,
+                        socket_connect_timeout=5,
+                    )
+                    self.redis_client = redis.Redis.from_pool(pool)
 
                 if await self._verified_ping():
                     self._connection_attempts = 0
                     self._last_successful_ping = monotonic()
-                    logger.success(f"✅ Redis connection established (pool size: {per_worker_max})")
+                    logger.success(f"✅ Redis '{self.pool_name}' pool established (pool size: {per_worker_max})")
                     self._connection_state = "connected"
                     return True
 
@@ -84,6 +204,63 @@ class RedisManager:
                 self._connection_state = "disconnected"
                 return False
 
+    async def _replica_is_fresh(self) -> bool:
+        """
+        True when the replica is linked to its primary and has heard from it within
+        REDIS.replica.max_lag_seconds. The result is cached for check_interval_seconds.
+        """
+        if (monotonic() - self._replica_checked_at) < AppConfig.redis_replica_check_interval:
+            return self._replica_fresh
+
+        self._replica_checked_at = monotonic()
+        fresh = False
+        if self.redis_client is None or self._connection_state != "connected":
+            # Never reconnect on the read path: that waits in check_redis_connection()'s backoff
+            self._reconnect_replica_in_background()
+        else:
+            try:
+                # One bounded call doubles as the liveness probe
+                info = await asyncio.wait_for(self.redis_client.info("replication"), timeout=2)
+                self._last_successful_ping = monotonic()
+                last_io = info.get("master_last_io_seconds_ago", -1)
+                fresh = (
+                    info.get("role") == "slave"
+                    and info.get("master_link_status") == "up"
+                    and 0 <= int(last_io) <= AppConfig.redis_replica_max_lag_seconds
+                )
+                if not fresh:
+                    logger.warning(
+                        f"⚠️ Redis replica is stale or unlinked (role={info.get('role')}, "
+                        f"link={info.get('master_link_status')}, last_io={last_io}s) — reading from primary"
+                    )
+            except Exception as e:
+                logger.warning(f"⚠️ Redis replica health check failed: {e} — reading from primary")
+                self._connection_state = "disconnected"
+                self._reconnect_replica_in_background()
+
+        if fresh and not self._replica_fresh:
+            logger.info("✅ Redis replica is fresh — routing API reads to the replica")
+        self._replica_fresh = fresh
+        return fresh
+
+    def _reconnect_replica_in_background(self) -> None:
+        """Re-establish the replica pool outside the request path; one attempt at a time."""
+        if self._replica_reconnect is None or self._replica_reconnect.done():
+            self._replica_reconnect = asyncio.create_task(self.init_redis())
+
+    async def get_read_client(self):
+        """
+        Client for read-only analytics (KEYS/SCAN/HGETALL/read-only EVALSHA).
+        Uses the replica pool when REDIS_REPLICA_URL is set and the replica is within the staleness
+        tolerance, otherwise falls back to this manager's own pool on the primary.
+        Never use the returned client for writes.
+        """
+        if POOL_REPLICA in AppConfig.redis_pools:
+            replica = RedisManager(POOL_REPLICA)
+            if await replica._replica_is_fresh() and replica.redis_client is not None:
+                return replica.redis_client
+        return await self.check_redis_connection()
+
     async def check_redis_connection(self):
         """
         Smart connection checker with exponential backoff and circuit breaker.
@@ -244,7 +421,7 @@ class RedisManager:
             if self.redis_client:
                 try:
                     await self.redis_client.close()
-                    logger.success("✅ Redis connection closed cleanly")
+                    logger.success(f"✅ Redis '{self.pool_name}' pool closed cleanly")
                 except Exception as e:
                     logger.error(f"⚠️ Error closing Redis connection: {str(e)}")
                 finally:
@@ -13,8 +13,8 @@ async def _get_client_with_retry(redis_client: Redis | None, max_attempts: int =
     Try to get a working Redis client with retry logic.
     First tries the provided client, then falls back to getting a fresh connection.
     """
-    from my_redis.connect_redis import RedisManager
-    redis_manager = RedisManager()
+    from my_redis.connect_redis import RedisManager, POOL_INGEST
+    redis_manager = RedisManager(POOL_INGEST)
 
     for attempt in range(1, max_attempts + 1):
         # Try provided client first
@@ -1,10 +1,11 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils import cluster_keys, counter_window, global_rollup, hour_histograms
 from utils.logger import logger
 from my_redis.utils import filtering_keys
 from my_redis.utils.counter_transformer import CounterTransformer
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_QUERY)
 
 class InvasionCounterRetrieval(CounterTransformer):
     def __init__(
@@ -17,10 +18,14 @@ class InvasionCounterRetrieval(CounterTransformer):
         character: str | set[str] | None = "all",
         grunt: str | set[str] | None = "all",
         confirmed: str = "all",  # keep scalar
+        last_hours: int | None = None,
     ):
         self.area = area
         self.start = start
         self.end = end
+        # Serve hourly queries as the last N closed hours (see counter_window)
+        self.last_hours = last_hours
+        self.window = None
         self.mode = mode.lower()
 
         def _norm_set(x):
@@ -62,16 +67,18 @@ class InvasionCounterRetrieval(CounterTransformer):
         Retrieve weekly invasion totals.
         Key format: "counter:invasion:{area}:{YYYYMMDD}"
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d"
-        pattern = "counter:invasion:*" if self.area.lower() in ["global", "all"] \
-                  else f"counter:invasion:{self.area}:*"
+        area = global_rollup.area_glob(self.area, "invasions")
+        pattern = f"counter:invasion:{area}:*"
 
-        keys = await client.keys(pattern)
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
         if not keys:
             return {"mode": self.mode, "data": {}}
@@ -106,16 +113,18 @@ class InvasionCounterRetrieval(CounterTransformer):
         Retrieve daily invasion totals.
         Key format: "counter:invasion_daily:{area}:{YYYYMMDD}"
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d"
-        pattern = "counter:invasion_daily:*" if self.area.lower() in ["global", "all"] \
-                  else f"counter:invasion_daily:{self.area}:*"
+        area = global_rollup.area_glob(self.area, "invasions")
+        pattern = f"counter:invasion_daily:{area}:*"
 
-        keys = await client.keys(pattern)
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
         if not keys:
             return {"mode": self.mode, "data": {}}
@@ -149,21 +158,34 @@ class InvasionCounterRetrieval(CounterTransformer):
         Retrieve hourly invasion totals.
         Key format: "counter:invasion_hourly:{area}:{YYYYMMDDHH}"
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d%H"
-        pattern = "counter:invasion_hourly:*" if self.area.lower() in ["global", "all"] \
-                  else f"counter:invasion_hourly:{self.area}:*"
+        if self.last_hours:
+            raw_aggregated, self.window = await counter_window.aggregate_last_hours(
+                client, "invasion", self.area, self.last_hours, self.mode, per_hour=self.mode == "surged"
+            )
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
+        elif self.mode == "surged" and hour_histograms.histograms_enabled():
+            raw_aggregated = await hour_histograms.aggregate_surged(client, "invasion", self.area, self.start, self.end)
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
+        else:
+            area = global_rollup.area_glob(self.area, "invasions")
+            pattern = f"counter:invasion_hourly:{area}:*"
 
-        keys = await client.keys(pattern)
-        keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
-        if not keys:
-            return {"mode": self.mode, "data": {}}
+            keys = await cluster_keys.scan_keys(client, pattern)
+            if area == "*":
+                keys = global_rollup.drop_global_keys(keys)
+            keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+            if not keys:
+                return {"mode": self.mode, "data": {}}
 
-        raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+            raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
 
         if self.mode in ["sum", "grouped"]:
             if self.mode == "grouped" and isinstance(raw_aggregated, dict):
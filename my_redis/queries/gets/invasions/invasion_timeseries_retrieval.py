@@ -2,10 +2,11 @@ import asyncio
 import time
 from datetime import datetime
 from typing import Dict, Any, Iterable, Union
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils import cluster_keys, global_rollup, timeseries_tiers
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_QUERY)
 
 # Chunked Lua script for Invasion timeseries
 TIMESERIES_INVASION_CHUNK_SCRIPT = """
@@ -160,18 +161,15 @@ class InvasionTimeSeries:
             logger.debug(f"Lua script 🕴️ loaded with SHA: {self.script_sha}")
         return self.script_sha
 
-    async def _scan_keys_by_patterns(self, client) -> list[str]:
-        """SCAN for all matching keys (non-blocking, fast)"""
+    async def _scan_keys_by_patterns(self, client, prefix: str = "ts") -> list[str]:
+        """SCAN for all matching keys of one storage tier (non-blocking, fast)"""
         scan_start = time.monotonic()
         all_keys = []
 
-        for pattern in self._build_key_patterns():
-            cursor = 0
-            while True:
-                cursor, keys = await client.scan(cursor, match=pattern, count=1000)
-                all_keys.extend(k.decode() if isinstance(k, bytes) else k for k in keys)
-                if cursor == 0:
-                    break
+        for pattern in self._build_key_patterns(prefix):
+            all_keys.extend(await cluster_keys.scan_keys(client, pattern))
+        if global_rollup.area_glob(self.area, "invasions") == "*":
+            all_keys = global_rollup.drop_global_keys(all_keys)
 
         scan_elapsed = time.monotonic() - scan_start
         logger.info(f"🕴️ SCAN collected {len(all_keys)} keys in {scan_elapsed:.3f}s")
@@ -206,12 +204,12 @@ class InvasionTimeSeries:
                 for hour, count in hours.items():
                     bucket[hour] = bucket.get(hour, 0) + int(count)
 
-    def _build_key_patterns(self) -> list[str]:
+    def _build_key_patterns(self, prefix: str = "ts") -> list[str]:
         """
         Build cartesian patterns.
         Key: ts:invasion:total:{area}:{display}:{grunt}:{confirmed}
         """
-        area = "*" if self.area.lower() in ["all", "global"] else self.area
+        area = global_rollup.area_glob(self.area, "invasions")
         displays = list(self.displays) if self.displays is not None else ["*"]
         grunts   = list(self.grunts)   if self.grunts   is not None else ["*"]
         confirmed = "*" if str(self.confirmed).lower() == "all" else str(self.confirmed)
@@ -219,13 +217,13 @@ class InvasionTimeSeries:
         patterns = []
         for d in displays:
             for g in grunts:
-                patterns.append(f"ts:invasion:total:{area}:{d}:{g}:{confirmed}")
+                patterns.append(f"{prefix}:invasion:total:{area}:{d}:{g}:{confirmed}")
         logger.debug(f"Built 🕴️ Invasion {len(patterns)} key pattern(s): {patterns[:5]}{'...' if len(patterns)>5 else ''}")
         return patterns
 
     async def invasion_retrieve_timeseries(self) -> Dict[str, Any]:
         """Retrieve timeseries using chunked Lua scripts with yield points"""
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection failed")
             return {"mode": self.mode, "data": {}}
@@ -233,8 +231,16 @@ class InvasionTimeSeries:
         total_start = time.monotonic()
 
         try:
-            # Step 1: SCAN for all keys
-            all_keys = await self._scan_keys_by_patterns(client)
+            start_ts = int(self.start.timestamp())
+            end_ts   = int(self.end.timestamp())
+
+            # Step 1: SCAN the keys of every storage tier the range is read from
+            segments = await timeseries_tiers.plan_segments(client, "invasion", start_ts, end_ts)
+            all_keys, chunks = [], []  # chunks: (keys, segment start, segment end)
+            for seg in segments:
+                seg_keys = await self._scan_keys_by_patterns(client, seg.prefix)
+                all_keys.extend(seg_keys)
+                chunks.extend((c, seg.start, seg.end) for c in cluster_keys.slot_chunks(seg_keys, self.chunk_size))
 
             if not all_keys:
                 logger.info("🕴️ No keys found matching patterns")
@@ -243,8 +249,7 @@ class InvasionTimeSeries:
             # Step 2: Load Lua script
             sha = await self._load_script(client)
 
-            # Step 3: Split keys into chunks
-            chunks = [all_keys[i:i+self.chunk_size] for i in range(0, len(all_keys), self.chunk_size)]
+            # Step 3: Keys are split into chunks per tier segment
             logger.info(f"🕴️ Processing {len(all_keys)} keys in {len(chunks)} chunks of ~{self.chunk_size} keys")
 
             # Accumulators
@@ -253,23 +258,25 @@ class InvasionTimeSeries:
             acc_grouped: Dict[str, Dict[str, int]] = {}
             acc_surged: Dict[str, Dict[str, int]] = {}
 
-            start_ts = int(self.start.timestamp())
-            end_ts   = int(self.end.timestamp())
-
             # Step 4: Process chunks with sleep intervals
             chunk_start = time.monotonic()
-            for i, chunk in enumerate(chunks):
+
+            async def _eval_chunk(item):
+                chunk, seg_start, seg_end = item
+                return await client.evalsha(sha, len(chunk), *chunk, str(seg_start), str(seg_end), self.mode)
+
+            # Cluster: chunks map to different shards, so evaluate them concurrently instead of one by one
+            prefetched = await cluster_keys.gather_chunks(chunks, _eval_chunk) if cluster_keys.cluster_enabled() else None
+
+            for i, item in enumerate(chunks):
+                chunk = item[0]
                 chunk_iter_start = time.monotonic()
 
-                # Run Lua script on this chunk
-                raw = await client.evalsha(
-                    sha,
-                    len(chunk),
-                    *chunk,
-                    str(start_ts),
-                    str(end_ts),
-                    self.mode
-                )
+                if prefetched is not None:
+                    raw = prefetched[i]
+                else:
+                    # Run Lua script on this chunk
+                    raw = await _eval_chunk(item)
 
                 chunk_data = self._convert_redis_result(raw)
                 self._merge_results(acc_total, acc_confirmed, acc_grouped, acc_surged, chunk_data)
@@ -278,7 +285,7 @@ class InvasionTimeSeries:
                 logger.info(f"🕴️ Chunk {i+1}/{len(chunks)} processed {len(chunk)} keys in {chunk_iter_elapsed:.3f}s")
 
                 # Sleep between chunks to allow writes
-                if i < len(chunks) - 1:
+                if prefetched is None and i < len(chunks) - 1:
                     await asyncio.sleep(self.chunk_sleep)
 
             chunk_elapsed = time.monotonic() - chunk_start
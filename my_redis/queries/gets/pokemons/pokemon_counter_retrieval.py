@@ -1,11 +1,12 @@
 from datetime import datetime, timedelta
 from typing import final
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils import cluster_keys, counter_window, global_rollup, hour_histograms
 from utils.logger import logger
-from my_redis.utils import filtering_keys
+from my_redis.utils import filtering_keys, counter_rollup
 from my_redis.utils.counter_transformer import CounterTransformer
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_QUERY)
 
 class PokemonCounterRetrieval(CounterTransformer):
     def __init__(
@@ -17,10 +18,14 @@ class PokemonCounterRetrieval(CounterTransformer):
         pokemon_id: str | set[str] | None = "all",
         form: str | set[str] | None = "all",
         metric: str | set[str] | None = "all",
+        last_hours: int | None = None,
     ):
         self.area = area
         self.start = start
         self.end = end
+        # Serve hourly queries as the last N closed hours (see counter_window)
+        self.last_hours = last_hours
+        self.window = None
         self.mode = mode
 
         def _norm(x):
@@ -119,25 +124,46 @@ class PokemonCounterRetrieval(CounterTransformer):
 
     # --- Retrieval functions for totals ---
 
+    async def _with_pending_rollups(self, client, keys: list, family: str, level: str) -> tuple[list, dict]:
+        """
+        With counter rollups enabled, add the hourly/daily keys not yet merged into `level`.
+        Returns the extended key list and the {source_key: target_key} map for counter_rollup.fold_pending().
+        """
+        if not counter_rollup.rollup_enabled():
+            return keys, {}
+        pending = await counter_rollup.pending_rollup_keys(client, self.area, family, level, self.start, self.end)
+        return keys + list(pending), pending
+
     async def retrieve_totals_hourly(self) -> dict:
         """
         Retrieve hourly totals for Pokémon counters.
         Key format: "counter:pokemon_total:{area}:{YYYYMMDDHH}"
         """
         time_format = "%Y%m%d%H"
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection not available")
             return {"mode": self.mode, "data": {}}
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:pokemon_hourly:*"
+        if self.last_hours:
+            raw_aggregated, self.window = await counter_window.aggregate_last_hours(
+                client, "pokemon", self.area, self.last_hours, self.mode, per_hour=self.mode == "surged"
+            )
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
+        elif self.mode == "surged" and hour_histograms.histograms_enabled():
+            raw_aggregated = await hour_histograms.aggregate_surged(client, "pokemon", self.area, self.start, self.end)
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
         else:
-            pattern = f"counter:pokemon_hourly:{self.area}:*"
-        keys = await client.keys(pattern)
-        keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
-        if not keys:
-            return {"mode": self.mode, "data": {}}
-        raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+            area = global_rollup.area_glob(self.area, "pokemon")
+            pattern = f"counter:pokemon_hourly:{area}:*"
+            keys = await cluster_keys.scan_keys(client, pattern)
+            if area == "*":
+                keys = global_rollup.drop_global_keys(keys)
+            keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+            if not keys:
+                return {"mode": self.mode, "data": {}}
+            raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
         # Apply filtering by pokemon_id and form
         raw_aggregated = self._filter_aggregated_data(raw_aggregated)
         if self.mode in ["sum", "grouped"]:
@@ -159,22 +185,24 @@ class PokemonCounterRetrieval(CounterTransformer):
         keyed by the full field (e.g., "1:163:total") summing counts across keys, then sorts
         the final result by pokemon_id (the first component).
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d"
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:pokemon_total:*"
-        else:
-            pattern = f"counter:pokemon_total:{self.area}:*"
-        keys = await client.keys(pattern)
+        area = global_rollup.area_glob(self.area, "pokemon")
+        pattern = f"counter:pokemon_total:{area}:*"
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+        keys, pending = await self._with_pending_rollups(client, keys, "pokemon", "weekly")
         if not keys:
             return {"mode": self.mode, "data": {}}
 
         raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+        raw_aggregated = counter_rollup.fold_pending(raw_aggregated, pending, self.mode)
         raw_aggregated = self._filter_aggregated_data(raw_aggregated)
         final_data = self.transform_aggregated_totals(raw_aggregated, self.mode)
         return {"mode": self.mode, "data": final_data}
@@ -192,22 +220,33 @@ class PokemonCounterRetrieval(CounterTransformer):
         In "surged" mode, data is grouped by the actual hour of day (e.g. "18") across all keys (regardless of date).
         """
         time_format = "%Y%m%d%H"
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection not available")
             return {"mode": self.mode, "data": {}}
 
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:tth_pokemon_hourly:*"
+        if self.last_hours:
+            raw_aggregated, self.window = await counter_window.aggregate_last_hours(
+                client, "tth_pokemon", self.area, self.last_hours, self.mode, per_hour=self.mode in ["grouped", "surged"]
+            )
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
+        elif self.mode == "surged" and hour_histograms.histograms_enabled():
+            raw_aggregated = await hour_histograms.aggregate_surged(client, "tth_pokemon", self.area, self.start, self.end)
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
         else:
-            pattern = f"counter:tth_pokemon_hourly:{self.area}:*"
+            area = global_rollup.area_glob(self.area, "pokemon_tth")
+            pattern = f"counter:tth_pokemon_hourly:{area}:*"
 
-        keys = await client.keys(pattern)
-        keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
-        if not keys:
-            return {"mode": self.mode, "data": {}}
+            keys = await cluster_keys.scan_keys(client, pattern)
+            if area == "*":
+                keys = global_rollup.drop_global_keys(keys)
+            keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+            if not keys:
+                return {"mode": self.mode, "data": {}}
 
-        raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+            raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
 
         if self.mode in ["sum", "grouped"]:
             final_data = self.transform_aggregated_tth(raw_aggregated, self.mode)
@@ -229,22 +268,24 @@ class PokemonCounterRetrieval(CounterTransformer):
         Always returns a complete timeline (each day in the requested range).
         """
         time_format = "%Y%m%d"
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection not available")
             return {"mode": self.mode, "data": {}}
 
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:tth_pokemon:*"
-        else:
-            pattern = f"counter:tth_pokemon:{self.area}:*"
+        area = global_rollup.area_glob(self.area, "pokemon_tth")
+        pattern = f"counter:tth_pokemon:{area}:*"
 
-        keys = await client.keys(pattern)
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+        keys, pending = await self._with_pending_rollups(client, keys, "tth_pokemon", "weekly")
         if not keys:
             return {"mode": self.mode, "data": {}}
 
         raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+        raw_aggregated = counter_rollup.fold_pending(raw_aggregated, pending, self.mode)
         final_data = self.transform_aggregated_tth(raw_aggregated, self.mode, self.start, self.end)
         final_data = self._filter_tth_data(final_data)
         return {"mode": self.mode, "data": final_data}
@@ -254,22 +295,24 @@ class PokemonCounterRetrieval(CounterTransformer):
         Retrieve daily totals for Pokémon counters.
         Key format: "counter:pokemon_daily:{area}:{YYYYMMDD}"  (actual calendar date)
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d"
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:pokemon_daily:*"
-        else:
-            pattern = f"counter:pokemon_daily:{self.area}:*"
-        keys = await client.keys(pattern)
+        area = global_rollup.area_glob(self.area, "pokemon")
+        pattern = f"counter:pokemon_daily:{area}:*"
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+        keys, pending = await self._with_pending_rollups(client, keys, "pokemon", "daily")
         if not keys:
             return {"mode": self.mode, "data": {}}
 
         raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+        raw_aggregated = counter_rollup.fold_pending(raw_aggregated, pending, self.mode)
         raw_aggregated = self._filter_aggregated_data(raw_aggregated)
         final_data = self.transform_aggregated_totals(raw_aggregated, self.mode)
         return {"mode": self.mode, "data": final_data}
@@ -280,22 +323,24 @@ class PokemonCounterRetrieval(CounterTransformer):
         Key format: "counter:tth_pokemon_daily:{area}:{YYYYMMDD}"  (actual calendar date)
         """
         time_format = "%Y%m%d"
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection not available")
             return {"mode": self.mode, "data": {}}
 
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:tth_pokemon_daily:*"
-        else:
-            pattern = f"counter:tth_pokemon_daily:{self.area}:*"
+        area = global_rollup.area_glob(self.area, "pokemon_tth")
+        pattern = f"counter:tth_pokemon_daily:{area}:*"
 
-        keys = await client.keys(pattern)
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+        keys, pending = await self._with_pending_rollups(client, keys, "tth_pokemon", "daily")
         if not keys:
             return {"mode": self.mode, "data": {}}
 
         raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+        raw_aggregated = counter_rollup.fold_pending(raw_aggregated, pending, self.mode)
         final_data = self.transform_aggregated_tth(raw_aggregated, self.mode, self.start, self.end)
         final_data = self._filter_tth_data(final_data)
         return {"mode": self.mode, "data": final_data}
@@ -313,31 +358,34 @@ class PokemonCounterRetrieval(CounterTransformer):
         Returns a dictionary with aggregated data.
         """
         time_format = "%Y%m"
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection not available")
             return {"mode": self.mode, "data": {}}
 
-        pattern = "counter:pokemon_weather_iv:*" if self.area.lower() in ["global", "all"] \
-                  else f"counter:pokemon_weather_iv:{self.area}:*"
+        area = global_rollup.area_glob(self.area, "pokemon_weather")
+        pattern = f"counter:pokemon_weather_iv:{area}:*"
 
-        keys = await client.keys(pattern)
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end, component_index=-2)
         if not keys:
             return {"mode": self.mode, "data": {}}
 
+        def _selected(key):
+            parts = key.split(":")
+            if len(parts) < 5:
+                return False
+            # filter by selected weather flags
+            return self.metrics is None or parts[-1] in self.metrics
+
+        fetched = await filtering_keys.hgetall_many(client, [k for k in keys if _selected(k)])
+
         if self.mode == "sum":
             aggregated = {}
-            for key in keys:
-                parts = key.split(":")
-                if len(parts) < 5:
-                    continue
-                weather_boost = parts[-1]  # "0".."9"
-                # filter by selected weather flags
-                if self.metrics is not None and weather_boost not in self.metrics:
-                    continue
-
-                data = await client.hgetall(key)
+            for key, data in fetched:
+                weather_boost = key.split(":")[-1]  # "0".."9"
                 data = {k: int(v) for k, v in data.items()}
                 data = self._filter_weather_fields(data)
 
@@ -349,17 +397,12 @@ class PokemonCounterRetrieval(CounterTransformer):
 
         elif self.mode == "grouped":
             grouped = {}
-            for key in keys:
+            for key, data in fetched:
                 parts = key.split(":")
-                if len(parts) < 5:
-                    continue
                 month = parts[-2]
                 weather_boost = parts[-1]
-                if self.metrics is not None and weather_boost not in self.metrics:
-                    continue
 
                 composite_key = f"{month}:{weather_boost}"
-                data = await client.hgetall(key)
                 data = {k: int(v) for k, v in data.items()}
                 data = self._filter_weather_fields(data)
 
@@ -3,14 +3,16 @@ import re
 import time
 from datetime import datetime
 from typing import Dict, Any, Union, Iterable
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils import cluster_keys, global_rollup, packed_series, timeseries_tiers
 from utils.logger import logger
+import config as AppConfig
 try:
     from dateutil.relativedelta import relativedelta
 except ImportError:
     relativedelta = None
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_QUERY)
 
 # Chunked Lua script - processes only specified keys (no SCAN)
 TIMESERIES_CHUNK_SCRIPT = """
@@ -141,18 +143,15 @@ class PokemonTimeSeries:
             logger.debug(f"Lua script 👻 loaded with SHA: {self.script_sha}")
         return self.script_sha
 
-    async def _scan_keys_by_patterns(self, client) -> list[str]:
-        """SCAN for all matching keys (non-blocking, fast)"""
+    async def _scan_keys_by_patterns(self, client, prefix: str = "ts") -> list[str]:
+        """SCAN for all matching keys of one storage tier (non-blocking, fast)"""
         scan_start = time.monotonic()
         all_keys = []
 
-        for pattern in self._build_key_patterns():
-            cursor = 0
-            while True:
-                cursor, keys = await client.scan(cursor, match=pattern, count=1000)
-                all_keys.extend(k.decode() if isinstance(k, bytes) else k for k in keys)
-                if cursor == 0:
-                    break
+        for pattern in self._build_key_patterns(prefix):
+            all_keys.extend(await cluster_keys.scan_keys(client, pattern))
+        if global_rollup.area_glob(self.area, "pokemon") == "*":
+            all_keys = global_rollup.drop_global_keys(all_keys)
 
         scan_elapsed = time.monotonic() - scan_start
         logger.info(f"👻 SCAN collected {len(all_keys)} keys in {scan_elapsed:.3f}s")
@@ -185,7 +184,7 @@ class PokemonTimeSeries:
 
     async def retrieve_timeseries(self) -> Dict:
         """Retrieve timeseries using chunked Lua scripts with yield points"""
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Redis connection failed")
             return {"mode": self.mode, "data": {}}
@@ -193,20 +192,6 @@ class PokemonTimeSeries:
         total_start = time.monotonic()
 
         try:
-            # Step 1: SCAN for all keys (non-blocking, ~0.1s)
-            all_keys = await self._scan_keys_by_patterns(client)
-
-            if not all_keys:
-                logger.info("No keys found matching patterns")
-                return {"mode": self.mode, "data": {}}
-
-            # Step 2: Load Lua script
-            sha = await self._load_script(client)
-
-            # Step 3: Split keys into chunks
-            chunks = [all_keys[i:i+self.chunk_size] for i in range(0, len(all_keys), self.chunk_size)]
-            logger.info(f"👻 Processing {len(all_keys)} keys in {len(chunks)} chunks of ~{self.chunk_size} keys")
-
             # Accumulators
             acc_sum: Dict[str, int] = {}
             acc_grouped: Dict[str, Dict[str, int]] = {}
@@ -215,20 +200,48 @@ class PokemonTimeSeries:
             start_ts = int(self.start.timestamp())
             end_ts   = int(self.end.timestamp())
 
+            # Packed day series (still reads the hash keys below while they drain after a switch)
+            packed_found = 0
+            if AppConfig.pokemon_timeseries_storage == "packed":
+                packed_found = await self._merge_packed(client, start_ts, end_ts, acc_sum, acc_grouped, acc_surged)
+
+            # Step 1: SCAN the keys of every storage tier the range is read from (non-blocking, ~0.1s)
+            segments = await timeseries_tiers.plan_segments(client, "pokemon", start_ts, end_ts)
+            all_keys, chunks = [], []  # chunks: (keys, segment start, segment end)
+            for seg in segments:
+                seg_keys = await self._scan_keys_by_patterns(client, seg.prefix)
+                all_keys.extend(seg_keys)
+                chunks.extend((c, seg.start, seg.end) for c in cluster_keys.slot_chunks(seg_keys, self.chunk_size))
+
+            if not all_keys and not packed_found:
+                logger.info("No keys found matching patterns")
+                return {"mode": self.mode, "data": {}}
+
+            # Step 2: Load Lua script
+            sha = await self._load_script(client) if all_keys else None
+
+            # Step 3: Keys are split into chunks per tier segment
+            logger.info(f"👻 Processing {len(all_keys)} keys in {len(chunks)} chunks of ~{self.chunk_size} keys")
+
             # Step 4: Process chunks with sleep intervals
             chunk_start = time.monotonic()
-            for i, chunk in enumerate(chunks):
+
+            async def _eval_chunk(item):
+                chunk, seg_start, seg_end = item
+                return await client.evalsha(sha, len(chunk), *chunk, str(seg_start), str(seg_end), self.mode)
+
+            # Cluster: chunks map to different shards, so evaluate them concurrently instead of one by one
+            prefetched = await cluster_keys.gather_chunks(chunks, _eval_chunk) if cluster_keys.cluster_enabled() else None
+
+            for i, item in enumerate(chunks):
+                chunk = item[0]
                 chunk_iter_start = time.monotonic()
 
-                # Run Lua script on this chunk
-                raw = await client.evalsha(
-                    sha,
-                    len(chunk),  # Number of KEYS
-                    *chunk,      # KEYS array
-                    str(start_ts),  # ARGV[1]
-                    str(end_ts),    # ARGV[2]
-                    self.mode       # ARGV[3]
-                )
+                if prefetched is not None:
+                    raw = prefetched[i]
+                else:
+                    # Run Lua script on this chunk
+                    raw = await _eval_chunk(item)
 
                 chunk_data = self._convert_redis_result(raw)
                 self._merge_results(acc_sum, acc_grouped, acc_surged, chunk_data)
@@ -237,7 +250,7 @@ class PokemonTimeSeries:
                 logger.info(f"👻 Chunk {i+1}/{len(chunks)} processed {len(chunk)} keys in {chunk_iter_elapsed:.3f}s")
 
                 # Sleep between chunks to allow writes (except last chunk)
-                if i < len(chunks) - 1:
+                if prefetched is None and i < len(chunks) - 1:
                     await asyncio.sleep(self.chunk_sleep)
 
             chunk_elapsed = time.monotonic() - chunk_start
@@ -277,13 +290,68 @@ class PokemonTimeSeries:
             logger.error(f"❌ Chunked Lua script execution failed: {e}")
             return {"mode": self.mode, "data": {}}
 
-    def _build_key_patterns(self) -> list[str]:
+    async def _merge_packed(self, client, start_ts: int, end_ts: int, acc_sum, acc_grouped, acc_surged) -> int:
+        """
+        Read packed day series (ts:pokemon_packed:*) overlapping [start_ts, end_ts) with pipelined
+        GETRANGE and aggregate them with NumPy into the accumulators. Returns the number of keys read.
+        """
+        first_day, _ = packed_series.day_and_slot(start_ts)
+        last_day, _  = packed_series.day_and_slot(max(end_ts - 1, start_ts))
+
+        wanted = []
+        for pattern in self._build_key_patterns(packed=True):
+            keys = await cluster_keys.scan_keys(client, pattern)
+            if global_rollup.area_glob(self.area, "pokemon") == "*":
+                keys = global_rollup.drop_global_keys(keys)
+            for key in keys:
+                day = key.rsplit(":", 1)[-1]
+                if first_day <= day <= last_day:
+                    lo, hi = packed_series.slot_range(day, start_ts, end_ts)
+                    if lo < hi:
+                        wanted.append((key, lo, hi))
+        if not wanted:
+            return 0
+
+        packed_start = time.monotonic()
+        for i in range(0, len(wanted), self.chunk_size):
+            chunk = wanted[i:i + self.chunk_size]
+            async with client.pipeline(transaction=False) as pipe:
+                for key, lo, hi in chunk:
+                    packed_series.queue_getrange(pipe, key, lo, hi)
+                payloads = await pipe.execute()
+
+            for (key, lo, _), raw in zip(chunk, payloads):
+                counts = packed_series.decode_slots(raw)
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # ts:pokemon_packed:{metric}:{area}:{pokemon_id}:{form}:{day}
+                parts = key.split(":")
+                metric, pokemon_id, form = parts[2], parts[4], parts[5]
+
+                if self.mode == "sum":
+                    acc_sum[metric] = acc_sum.get(metric, 0) + total
+                elif self.mode == "grouped":
+                    bucket = acc_grouped.setdefault(metric, {})
+                    group_key = f"{pokemon_id}:{form}"
+                    bucket[group_key] = bucket.get(group_key, 0) + total
+                elif self.mode == "surged":
+                    bucket = acc_surged.setdefault(metric, {})
+                    for hour, v in enumerate(packed_series.hourly_sums(counts, lo)):
+                        if v:
+                            bucket[str(hour)] = bucket.get(str(hour), 0) + int(v)
+
+        logger.info(f"👻 Packed series: {len(wanted)} day keys read in {time.monotonic() - packed_start:.3f}s")
+        return len(wanted)
+
+    def _build_key_patterns(self, prefix: str = "ts", packed: bool = False) -> list[str]:
         """
         Build a list of Redis MATCH patterns for SCAN.
         Key format: ts:pokemon:{metric}:{area}:{pokemon_id}:{form}
+        Packed:     ts:pokemon_packed:{metric}:{area}:{pokemon_id}:{form}:{YYYYMMDD}
         """
         metric = "*"
-        area = "*" if self.area.lower() in ["all", "global"] else self.area
+        area = global_rollup.area_glob(self.area, "pokemon")
 
         pids  = list(self.pokemon_ids) if self.pokemon_ids is not None else ["*"]
         forms = list(self.forms)       if self.forms is not None       else ["*"]
@@ -291,7 +359,10 @@ class PokemonTimeSeries:
         patterns = []
         for pid in pids:
             for frm in forms:
-                patterns.append(f"ts:pokemon:{metric}:{area}:{pid}:{frm}")
+                if packed:
+                    patterns.append(f"ts:pokemon_packed:{metric}:{area}:{pid}:{frm}:*")
+                else:
+                    patterns.append(f"{prefix}:pokemon:{metric}:{area}:{pid}:{frm}")
 
         logger.debug(f"Built {len(patterns)} key pattern(s): {patterns[:5]}{'...' if len(patterns)>5 else ''}")
         return patterns
@@ -1,10 +1,11 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils import cluster_keys, counter_window, global_rollup, hour_histograms
 from my_redis.utils.counter_transformer import CounterTransformer
 from utils.logger import logger
 from my_redis.utils import filtering_keys
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_QUERY)
 
 class QuestCounterRetrieval(CounterTransformer):
     def __init__(
@@ -28,10 +29,14 @@ class QuestCounterRetrieval(CounterTransformer):
         reward_normal_item_amount: str | set[str] | None = "all",
         reward_normal_poke_id: str | set[str] | None = "all",
         reward_normal_poke_form: str | set[str] | None = "all",
+        last_hours: int | None = None,
     ):
         self.area = area
         self.start = start
         self.end = end
+        # Serve hourly queries as the last N closed hours (see counter_window)
+        self.last_hours = last_hours
+        self.window = None
         self.mode = mode.lower()
         self.with_ar = with_ar  # leave scalar
 
@@ -111,18 +116,18 @@ class QuestCounterRetrieval(CounterTransformer):
         return False
 
     async def quest_retrieve_totals_weekly(self) -> dict:
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d"
 
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:quest:*"
-        else:
-            pattern = f"counter:quest:{self.area}:*"
-        keys = await client.keys(pattern)
+        area = global_rollup.area_glob(self.area, "quests")
+        pattern = f"counter:quest:{area}:*"
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
         if not keys:
             return {"mode": self.mode, "data": {}}
@@ -143,17 +148,17 @@ class QuestCounterRetrieval(CounterTransformer):
         Retrieve daily quest totals.
         Key format: "counter:quest_daily:{area}:{YYYYMMDD}"
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d"
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:quest_daily:*"
-        else:
-            pattern = f"counter:quest_daily:{self.area}:*"
-        keys = await client.keys(pattern)
+        area = global_rollup.area_glob(self.area, "quests")
+        pattern = f"counter:quest_daily:{area}:*"
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
         if not keys:
             return {"mode": self.mode, "data": {}}
@@ -181,22 +186,33 @@ class QuestCounterRetrieval(CounterTransformer):
         In "surged" mode (if desired), you could implement similar logic to group by the actual hour across days.
         Here, for demonstration, we'll support "sum" and "grouped".
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d%H"
-        if self.area.lower() in ["global", "all"]:
-            pattern = "counter:quest_hourly:*"
+        if self.last_hours:
+            raw_aggregated, self.window = await counter_window.aggregate_last_hours(
+                client, "quest", self.area, self.last_hours, self.mode, per_hour=self.mode in ["grouped", "surged"]
+            )
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
+        elif self.mode == "surged" and hour_histograms.histograms_enabled():
+            raw_aggregated = await hour_histograms.aggregate_surged(client, "quest", self.area, self.start, self.end)
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
         else:
-            pattern = f"counter:quest_hourly:{self.area}:*"
-        keys = await client.keys(pattern)
-        keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
-        if not keys:
-            return {"mode": self.mode, "data": {}}
-
-        raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+            area = global_rollup.area_glob(self.area, "quests")
+            pattern = f"counter:quest_hourly:{area}:*"
+            keys = await cluster_keys.scan_keys(client, pattern)
+            if area == "*":
+                keys = global_rollup.drop_global_keys(keys)
+            keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+            if not keys:
+                return {"mode": self.mode, "data": {}}
+
+            raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
         if self.mode == "sum":
             logger.debug("▶️ Transforming hourly 🔎 quest_totals SUM")
             final_data = self.transform_quest_totals_new_sum(raw_aggregated)
@@ -1,10 +1,11 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils import cluster_keys, counter_window, global_rollup, hour_histograms
 from my_redis.utils.counter_transformer import CounterTransformer
 from utils.logger import logger
 from my_redis.utils import filtering_keys
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_QUERY)
 
 class RaidCounterRetrieval(CounterTransformer):
     def __init__(
@@ -19,10 +20,14 @@ class RaidCounterRetrieval(CounterTransformer):
         raid_costume: str | set[str] | None = "all",
         raid_is_exclusive: str | set[str] | None = "all",
         raid_ex_eligible: str | set[str] | None = "all",
+        last_hours: int | None = None,
     ):
         self.area = area
         self.start = start
         self.end = end
+        # Serve hourly queries as the last N closed hours (see counter_window)
+        self.last_hours = last_hours
+        self.window = None
         self.mode = mode.lower()
 
         def _norm(x):
@@ -81,16 +86,18 @@ class RaidCounterRetrieval(CounterTransformer):
         Retrieve weekly raid totals.
         Key format: "counter:raid_total:{area}:{YYYYMMDD}"
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d"
-        pattern = "counter:raid_total:*" if self.area.lower() in ["global", "all"] \
-                  else f"counter:raid_total:{self.area}:*"
+        area = global_rollup.area_glob(self.area, "raids")
+        pattern = f"counter:raid_total:{area}:*"
 
-        keys = await client.keys(pattern)
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
         if not keys:
             return {"mode": self.mode, "data": {}}
@@ -116,16 +123,18 @@ class RaidCounterRetrieval(CounterTransformer):
         Retrieve daily raid totals.
         Key format: "counter:raid_daily:{area}:{YYYYMMDD}"
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d"
-        pattern = "counter:raid_daily:*" if self.area.lower() in ["global", "all"] \
-                  else f"counter:raid_daily:{self.area}:*"
+        area = global_rollup.area_glob(self.area, "raids")
+        pattern = f"counter:raid_daily:{area}:*"
 
-        keys = await client.keys(pattern)
+        keys = await cluster_keys.scan_keys(client, pattern)
+        if area == "*":
+            keys = global_rollup.drop_global_keys(keys)
         keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
         if not keys:
             return {"mode": self.mode, "data": {}}
@@ -151,21 +160,34 @@ class RaidCounterRetrieval(CounterTransformer):
         Retrieve hourly raid totals.
         Key format: "counter:raid_hourly:{area}:{YYYYMMDDHH}"
         """
-        client = await redis_manager.check_redis_connection()
+        client = await redis_manager.get_read_client()
         if not client:
             logger.error("❌ Retrieval pool connection not available")
             return {"mode": self.mode, "data": {}}
 
         time_format = "%Y%m%d%H"
-        pattern = "counter:raid_hourly:*" if self.area.lower() in ["global", "all"] \
-                else f"counter:raid_hourly:{self.area}:*"
+        if self.last_hours:
+            raw_aggregated, self.window = await counter_window.aggregate_last_hours(
+                client, "raid", self.area, self.last_hours, self.mode, per_hour=self.mode == "surged"
+            )
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
+        elif self.mode == "surged" and hour_histograms.histograms_enabled():
+            raw_aggregated = await hour_histograms.aggregate_surged(client, "raid", self.area, self.start, self.end)
+            if not raw_aggregated:
+                return {"mode": self.mode, "data": {}}
+        else:
+            area = global_rollup.area_glob(self.area, "raids")
+            pattern = f"counter:raid_hourly:{area}:*"
 
-        keys = await client.keys(pattern)
-        keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
-        if not keys:
-            return {"mode": self.mode, "data": {}}
+            keys = await cluster_keys.scan_keys(client, pattern)
+            if area == "*":
+                keys = global_rollup.drop_global_keys(keys)
+            keys = filtering_keys.filter_keys_by_time(keys, time_format, self.start, self.end)
+            if not keys:
+                return {"mode": self.mode, "data": {}}
 
-        raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
+            raw_aggregated = await filtering_keys.aggregate_keys(keys, self.mode)
         logger.debug(f"Hourly raid 👹 raw aggregated data (mode={self.mode}): {type(raw_aggregated)}")
 
         if self.mode in ["sum", "grouped"]:
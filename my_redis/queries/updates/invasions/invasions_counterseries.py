@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_invasion_counter(data, pipe=None):
     """
@@ -36,7 +37,7 @@ async def update_invasion_counter(data, pipe=None):
     confirmed = int(bool(data["invasion_confirmed"]))
 
     # Construct the hash key for the area and date
-    hash_key = f"counter:invasion:{area}:{date_str}"
+    hash_key = f"counter:invasion:{area_tag(area)}:{date_str}"
 
     # Construct field name for each metric
     field_name = f"{display_type}:{character}:{grunt}:{confirmed}:total"
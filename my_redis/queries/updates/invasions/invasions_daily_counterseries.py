@@ -1,8 +1,9 @@
 from datetime import datetime
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_invasion_daily_counter(data, pipe=None):
     """
@@ -25,7 +26,7 @@ async def update_invasion_daily_counter(data, pipe=None):
     grunt        = data["invasion_grunt_type"]
     confirmed    = int(bool(data["invasion_confirmed"]))
 
-    hash_key   = f"counter:invasion_daily:{area}:{date_str}"
+    hash_key   = f"counter:invasion_daily:{area_tag(area)}:{date_str}"
     field_name = f"{display_type}:{character}:{grunt}:{confirmed}:total"
 
     updated_fields = {}
@@ -1,8 +1,10 @@
 from datetime import datetime
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.hour_histograms import hincrby_hourly
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_invasion_hourly_counter(data, pipe=None):
     """
@@ -28,7 +30,7 @@ async def update_invasion_hourly_counter(data, pipe=None):
     confirmed = int(bool(data["invasion_confirmed"]))
 
     # Construct the hash key for the area and hour
-    hash_key = f"counter:invasion_hourly:{area}:{date_hour}"
+    hash_key = f"counter:invasion_hourly:{area_tag(area)}:{date_hour}"
 
     # Construct field name for each metric
     field_name = f"{display_type}:{character}:{grunt}:{confirmed}:total"
@@ -36,11 +38,11 @@ async def update_invasion_hourly_counter(data, pipe=None):
     updated_fields = {}
 
     if pipe:
-        pipe.hincrby(hash_key, field_name, 1)
+        hincrby_hourly(pipe, hash_key, field_name, 1)
         updated_fields[field_name] = "OK"
     else:
         async with client.pipeline() as pipe:
-            pipe.hincrby(hash_key, field_name, 1)
+            hincrby_hourly(pipe, hash_key, field_name, 1)
             await pipe.execute()
         updated_fields[field_name] = "OK"
 
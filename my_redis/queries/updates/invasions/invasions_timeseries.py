@@ -1,8 +1,12 @@
 import config as AppConfig
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.field_ttl import hincrby_bucket
 from utils.logger import logger
 
-redis_manager = RedisManager()
+BUCKET_RETENTION_SEC = AppConfig.invasion_timeseries_retention_ms // 1000
+
+redis_manager = RedisManager(POOL_INGEST)
 
 async def add_timeseries_invasion_event(data, pipe=None):
     """
@@ -30,18 +34,18 @@ async def add_timeseries_invasion_event(data, pipe=None):
 
     # Construct key in the format:
     # ts:invasion:total:{area}:{invasion_type}:{grunt}:{confirmed}
-    key_total = f"ts:invasion:total:{area}:{display_type}:{grunt}:{confirmed}"
+    key_total = f"ts:invasion:total:{area_tag(area)}:{display_type}:{grunt}:{confirmed}"
     logger.debug(f"🔑 Constructed Invasion key: {key_total}")
 
     inc_total = 1  # Always add 1 for total.
     updated_fields = {}
 
     if pipe:
-        pipe.hincrby(key_total, bucket, inc_total)
+        hincrby_bucket(pipe, key_total, bucket, inc_total, BUCKET_RETENTION_SEC)
         updated_fields["total"] = "OK"
     else:
         async with client.pipeline() as pipe:
-            pipe.hincrby(key_total, bucket, inc_total)
+            hincrby_bucket(pipe, key_total, bucket, inc_total, BUCKET_RETENTION_SEC)
             updated_fields["total"] = "OK"
             await pipe.execute()
 
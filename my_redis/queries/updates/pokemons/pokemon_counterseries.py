@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_total_pokemon_counter(data, pipe=None):
     """
@@ -29,7 +30,7 @@ async def update_total_pokemon_counter(data, pipe=None):
     form = data.get("form", 0)
 
     # Construct the hash key for the area and date
-    hash_key = f"counter:pokemon_total:{area}:{date_str}"
+    hash_key = f"counter:pokemon_total:{area_tag(area)}:{date_str}"
 
     # Construct field names for each metric
     field_total      = f"{pokemon_id}:{form}:total"
@@ -1,8 +1,9 @@
 from datetime import datetime
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_daily_pokemon_counter(data, pipe=None):
     """
@@ -23,7 +24,7 @@ async def update_daily_pokemon_counter(data, pipe=None):
     pokemon_id = data["pokemon_id"]
     form = data.get("form", 0)
 
-    hash_key = f"counter:pokemon_daily:{area}:{date_str}"
+    hash_key = f"counter:pokemon_daily:{area_tag(area)}:{date_str}"
 
     field_total      = f"{pokemon_id}:{form}:total"
     field_iv100      = f"{pokemon_id}:{form}:iv100"
@@ -1,8 +1,10 @@
 from datetime import datetime
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.hour_histograms import hincrby_hourly
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_pokemon_hourly_counter(data, pipe=None):
     """
@@ -34,7 +36,7 @@ async def update_pokemon_hourly_counter(data, pipe=None):
     form = data.get("form", 0)
 
     # Construct the hash key for the area and date
-    hash_key = f"counter:pokemon_hourly:{area}:{date_hour}"
+    hash_key = f"counter:pokemon_hourly:{area_tag(area)}:{date_hour}"
 
     # Construct field names for each metric
     field_total      = f"{pokemon_id}:{form}:total"
@@ -56,52 +58,53 @@ async def update_pokemon_hourly_counter(data, pipe=None):
 
     updated_fields = {}
 
+    # total is always incremented, so it carries the histogram expiry for the event
     if pipe:
         # Add commands to the provided pipeline
         if inc_total:
-            pipe.hincrby(hash_key, field_total, inc_total)
+            hincrby_hourly(pipe, hash_key, field_total, inc_total)
             updated_fields["total"] = "OK"
         if inc_iv100:
-            pipe.hincrby(hash_key, field_iv100, inc_iv100)
+            hincrby_hourly(pipe, hash_key, field_iv100, inc_iv100, expire=False)
             updated_fields["iv100"] = "OK"
         if inc_iv0:
-            pipe.hincrby(hash_key, field_iv0, inc_iv0)
+            hincrby_hourly(pipe, hash_key, field_iv0, inc_iv0, expire=False)
             updated_fields["iv0"] = "OK"
         if inc_pvp_little:
-            pipe.hincrby(hash_key, field_pvp_little, inc_pvp_little)
+            hincrby_hourly(pipe, hash_key, field_pvp_little, inc_pvp_little, expire=False)
             updated_fields["pvp_little"] = "OK"
         if inc_pvp_great:
-            pipe.hincrby(hash_key, field_pvp_great, inc_pvp_great)
+            hincrby_hourly(pipe, hash_key, field_pvp_great, inc_pvp_great, expire=False)
             updated_fields["pvp_great"] = "OK"
         if inc_pvp_ultra:
-            pipe.hincrby(hash_key, field_pvp_ultra, inc_pvp_ultra)
+            hincrby_hourly(pipe, hash_key, field_pvp_ultra, inc_pvp_ultra, expire=False)
             updated_fields["pvp_ultra"] = "OK"
         if inc_shiny:
-            pipe.hincrby(hash_key, field_shiny, inc_shiny)
+            hincrby_hourly(pipe, hash_key, field_shiny, inc_shiny, expire=False)
             updated_fields["shiny"] = "OK"
     else:
         # Execute pipeline transaction if no external pipeline is passed
         async with client.pipeline() as pipe:
             if inc_total:
-                pipe.hincrby(hash_key, field_total, inc_total)
+                hincrby_hourly(pipe, hash_key, field_total, inc_total)
                 updated_fields["total"] = "OK"
             if inc_iv100:
-                pipe.hincrby(hash_key, field_iv100, inc_iv100)
+                hincrby_hourly(pipe, hash_key, field_iv100, inc_iv100, expire=False)
                 updated_fields["iv100"] = "OK"
             if inc_iv0:
-                pipe.hincrby(hash_key, field_iv0, inc_iv0)
+                hincrby_hourly(pipe, hash_key, field_iv0, inc_iv0, expire=False)
                 updated_fields["iv0"] = "OK"
             if inc_pvp_little:
-                pipe.hincrby(hash_key, field_pvp_little, inc_pvp_little)
+                hincrby_hourly(pipe, hash_key, field_pvp_little, inc_pvp_little, expire=False)
                 updated_fields["pvp_little"] = "OK"
             if inc_pvp_great:
-                pipe.hincrby(hash_key, field_pvp_great, inc_pvp_great)
+                hincrby_hourly(pipe, hash_key, field_pvp_great, inc_pvp_great, expire=False)
                 updated_fields["pvp_great"] = "OK"
             if inc_pvp_ultra:
-                pipe.hincrby(hash_key, field_pvp_ultra, inc_pvp_ultra)
+                hincrby_hourly(pipe, hash_key, field_pvp_ultra, inc_pvp_ultra, expire=False)
                 updated_fields["pvp_ultra"] = "OK"
             if inc_shiny:
-                pipe.hincrby(hash_key, field_shiny, inc_shiny)
+                hincrby_hourly(pipe, hash_key, field_shiny, inc_shiny, expire=False)
                 updated_fields["shiny"] = "OK"
             await pipe.execute()  # Execute pipeline
 
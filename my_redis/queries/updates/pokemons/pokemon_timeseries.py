@@ -3,12 +3,17 @@ import asyncio
 from datetime import datetime
 from typing import Dict, Any, Union, Literal
 
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.field_ttl import hincrby_bucket
+from my_redis.utils import packed_series
 from utils.logger import logger
 from my_redis.utils.filtering_keys import parse_time_input
 import config as AppConfig
 
-redis_manager = RedisManager()
+BUCKET_RETENTION_SEC = AppConfig.timeseries_pokemon_retention_ms // 1000
+
+redis_manager = RedisManager(POOL_INGEST)
 
 
 def build_hash_key(data_type: str, metric: str, area: str, entity: str, form: Union[str, int]) -> str:
@@ -18,7 +23,17 @@ def build_hash_key(data_type: str, metric: str, area: str, entity: str, form: Un
     Format:
       ts:pokemon:total:Matosinhos:422:0
     """
-    return f"ts:{data_type}:{metric}:{area}:{entity}:{form}"
+    return f"ts:{data_type}:{metric}:{area_tag(area)}:{entity}:{form}"
+
+
+def build_packed_key(data_type: str, metric: str, area: str, entity: str, form: Union[str, int], day: str) -> str:
+    """
+    Build a packed day series key (1440 u16 minute slots, see packed_series).
+
+    Format:
+      ts:pokemon_packed:total:Matosinhos:422:0:20250101
+    """
+    return f"ts:{data_type}_packed:{metric}:{area_tag(area)}:{entity}:{form}:{day}"
 
 
 def get_time_bucket(first_seen: int) -> str:
@@ -77,20 +92,29 @@ async def add_pokemon_timeseries_event(data: Dict[str, Any], pipe=None) -> Dict[
         "pvp_ultra": inc_pvp_ultra
     }
 
-    updated_fields = {}
-    if pipe:
+    packed = AppConfig.pokemon_timeseries_storage == "packed"
+    if packed:
+        day, slot = packed_series.day_and_slot(bucket)
+        expire_at = packed_series.day_start(day) + 86400 + BUCKET_RETENTION_SEC if BUCKET_RETENTION_SEC else None
+
+    def _queue_metrics(p):
         for metric, inc in metrics.items():
-            if inc:
+            if not inc:
+                continue
+            if packed:
+                key = build_packed_key(data_type, metric, area, entity, form, day)
+                packed_series.incr_slot(p, key, slot, inc, expire_at)
+            else:
                 key = build_hash_key(data_type, metric, area, entity, form)
-                pipe.hincrby(key, bucket, inc)
-                updated_fields[metric] = "OK"
+                hincrby_bucket(p, key, bucket, inc, BUCKET_RETENTION_SEC)
+            updated_fields[metric] = "OK"
+
+    updated_fields = {}
+    if pipe:
+        _queue_metrics(pipe)
     else:
         async with client.pipeline() as pipe:
-            for metric, inc in metrics.items():
-                if inc:
-                    key = build_hash_key(data_type, metric, area, entity, form)
-                    pipe.hincrby(key, bucket, inc)
-                    updated_fields[metric] = "OK"
+            _queue_metrics(pipe)
             await pipe.execute()
 
     logger.debug(f"✅ Added event for {data_type} {entity} in {area} (form: {form}) bucket {bucket}")
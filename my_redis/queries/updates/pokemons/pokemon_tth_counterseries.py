@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 # Define TTH Ranges
 TTH_BUCKETS = [(0, 5), (5, 10), (10, 15), (15, 20), (20, 25),
@@ -60,7 +61,7 @@ async def update_tth_pokemon_counter(data, pipe=None):
         return "IGNORED"
 
     # Construct Redis key for the area and date
-    hash_key = f"counter:tth_pokemon:{area}:{date_str}"
+    hash_key = f"counter:tth_pokemon:{area_tag(area)}:{date_str}"
     field_name = f"{tth_bucket}"
 
     logger.debug(f"🔑 Hash Key: {hash_key}, Field: {field_name}")
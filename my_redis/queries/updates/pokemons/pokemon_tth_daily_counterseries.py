@@ -1,8 +1,9 @@
 from datetime import datetime
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 TTH_BUCKETS = [(0, 5), (5, 10), (10, 15), (15, 20), (20, 25),
                (25, 30), (30, 35), (35, 40), (40, 45), (45, 50),
@@ -47,7 +48,7 @@ async def update_tth_pokemon_daily_counter(data, pipe=None):
         logger.warning(f"❌ Ignoring Pokémon with out-of-range despawn timer: {despawn_timer}s")
         return "IGNORED"
 
-    hash_key = f"counter:tth_pokemon_daily:{area}:{date_str}"
+    hash_key = f"counter:tth_pokemon_daily:{area_tag(area)}:{date_str}"
     field_name = f"{tth_bucket}"
 
     logger.debug(f"🔑 Hash Key: {hash_key}, Field: {field_name}")
@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.hour_histograms import hincrby_hourly
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 # Define TTH Ranges
 TTH_BUCKETS = [(0, 5), (5, 10), (10, 15), (15, 20), (20, 25),
@@ -53,7 +55,7 @@ async def update_tth_pokemon_hourly_counter(data, pipe=None):
         return "IGNORED"
 
     # Construct Redis key for the area and date
-    hash_key = f"counter:tth_pokemon_hourly:{area}:{date_hour}"
+    hash_key = f"counter:tth_pokemon_hourly:{area_tag(area)}:{date_hour}"
     field_name = f"{tth_bucket}"
 
     logger.debug(f"🔑 Hash Key: {hash_key}, Field: {field_name}")
@@ -61,11 +63,11 @@ async def update_tth_pokemon_hourly_counter(data, pipe=None):
     updated_fields = {}
 
     if pipe:
-        pipe.hincrby(hash_key, field_name, 1)  # Add command to pipeline
+        hincrby_hourly(pipe, hash_key, field_name, 1)  # Add command to pipeline
         updated_fields[tth_bucket] = "OK"
     else:
         async with client.pipeline() as pipe:
-            pipe.hincrby(hash_key, field_name, 1)
+            hincrby_hourly(pipe, hash_key, field_name, 1)
             await pipe.execute()  # Execute pipeline transaction
 
         updated_fields[tth_bucket] = "OK"
@@ -1,9 +1,13 @@
 import dis
 import config as AppConfig
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.field_ttl import hincrby_bucket
 from utils.logger import logger
 
-redis_manager = RedisManager()
+BUCKET_RETENTION_SEC = AppConfig.tth_timeseries_retention_ms // 1000
+
+redis_manager = RedisManager(POOL_INGEST)
 
 # Define the TTH buckets (in minutes).
 TTH_BUCKETS = [
@@ -29,7 +33,7 @@ def build_tth_key(area: str, tth_bucket: str) -> str:
     Build a plain text key for TTH timeseries.
     Example: ts:tth_pokemon:Saarlouis:10_15
     """
-    return f"ts:tth_pokemon:{area}:{tth_bucket}"
+    return f"ts:tth_pokemon:{area_tag(area)}:{tth_bucket}"
 
 def get_time_bucket(first_seen: int) -> str:
     """
@@ -80,10 +84,12 @@ async def add_tth_timeseries_pokemon_event(data, pipe=None):
 
     updated_fields = {}
     if pipe:
-        pipe.hincrby(key, bucket_field, 1)
+        hincrby_bucket(pipe, key, bucket_field, 1, BUCKET_RETENTION_SEC)
         updated_fields[tth_bucket] = "OK"
     else:
-        await client.hincrby(key, bucket_field, 1)
+        async with client.pipeline() as pipe:
+            hincrby_bucket(pipe, key, bucket_field, 1, BUCKET_RETENTION_SEC)
+            await pipe.execute()
         updated_fields[tth_bucket] = "OK"
 
     logger.debug(f"✅ Added Pokémon TTH event to hash: {key}")
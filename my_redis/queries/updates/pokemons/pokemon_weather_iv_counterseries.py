@@ -1,9 +1,10 @@
 from datetime import datetime
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 from utils.calc_iv_bucket import get_iv_bucket
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_pokemon_weather_iv(data, pipe=None):
     """
@@ -51,7 +52,7 @@ async def update_pokemon_weather_iv(data, pipe=None):
 
     # Construct Redis hash key. For example:
     # "counter:pokemon_weather_iv:Saarlouirs:20250310:1"
-    hash_key = f"counter:pokemon_weather_iv:{area}:{date_str}:{weather_boost}"
+    hash_key = f"counter:pokemon_weather_iv:{area_tag(area)}:{date_str}:{weather_boost}"
     field_name = iv_range
 
     logger.debug(f"🔑 Constructed Hash Key: {hash_key}, Field: {field_name}")
@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_quest_counter(data, pipe=None):
     """
@@ -53,7 +54,7 @@ async def update_quest_counter(data, pipe=None):
         reward_normal_poke_form = data.get("reward_normal_poke_form", "")
         field_details = f"{normal_type}:{reward_normal_type}:{reward_normal_item_id}:{reward_normal_item_amount}:{reward_normal_poke_id}:{reward_normal_poke_form}"
 
-    hash_key = f"counter:quest:{area}:{date_str}"
+    hash_key = f"counter:quest:{area_tag(area)}:{date_str}"
     field_name = f"{mode}:{field_details}:total"
 
     updated_fields = {}
@@ -1,8 +1,10 @@
 from datetime import datetime
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.hour_histograms import hincrby_hourly
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_quest_hourly_counter(data, pipe=None):
     """
@@ -45,16 +47,16 @@ async def update_quest_hourly_counter(data, pipe=None):
         reward_normal_poke_form = data.get("reward_normal_poke_form", "")
         field_details = f"{normal_type}:{reward_normal_type}:{reward_normal_item_id}:{reward_normal_item_amount}:{reward_normal_poke_id}:{reward_normal_poke_form}"
 
-    hash_key = f"counter:quest_hourly:{area}:{date_hour}"
+    hash_key = f"counter:quest_hourly:{area_tag(area)}:{date_hour}"
     field_name = f"{mode}:{field_details}:total"
 
     updated_fields = {}
     if pipe:
-        pipe.hincrby(hash_key, field_name, 1)
+        hincrby_hourly(pipe, hash_key, field_name, 1)
         updated_fields[field_name] = "OK"
     else:
         async with client.pipeline() as pipe:
-            pipe.hincrby(hash_key, field_name, 1)
+            hincrby_hourly(pipe, hash_key, field_name, 1)
             await pipe.execute()
         updated_fields[field_name] = "OK"
 
@@ -3,12 +3,16 @@ import asyncio
 from datetime import datetime
 from typing import Dict, Any, Union, Literal
 
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.field_ttl import hincrby_bucket
 from utils.logger import logger
 from my_redis.utils.filtering_keys import parse_time_input
 import config as AppConfig
 
-redis_manager = RedisManager()
+BUCKET_RETENTION_SEC = AppConfig.quests_timeseries_retention_ms // 1000
+
+redis_manager = RedisManager(POOL_INGEST)
 
 def get_time_bucket(first_seen: int) -> str:
     """
@@ -71,18 +75,18 @@ async def add_timeseries_quest_event(data: Dict[str, Any], pipe=None) -> Dict[st
         field_details = f"{normal_type}:{reward_normal_type}:{reward_normal_item_id}:{reward_normal_item_amount}:{reward_normal_poke_id}:{reward_normal_poke_form}"
 
     # Build the new key using the new format.
-    key = f"ts:quests_total:{mode}:{area}:{field_details}"
+    key = f"ts:quests_total:{mode}:{area_tag(area)}:{field_details}"
     logger.debug(f"Built Quest key: {key}")
 
     # Increment the value in the hash for the given time bucket.
     inc = 1
     updated_fields = {}
     if pipe:
-        pipe.hincrby(key, bucket, inc)
+        hincrby_bucket(pipe, key, bucket, inc, BUCKET_RETENTION_SEC)
         updated_fields["status"] = "OK"
     else:
         async with client.pipeline() as pipe:
-            pipe.hincrby(key, bucket, inc)
+            hincrby_bucket(pipe, key, bucket, inc, BUCKET_RETENTION_SEC)
             updated_fields["status"] = "OK"
             await pipe.execute()
 
@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_raid_counter(raid_data, pipe=None):
     """
@@ -33,7 +34,7 @@ async def update_raid_counter(raid_data, pipe=None):
     raid_ex_eligible = raid_data["raid_ex_raid_eligible"]
 
     # Construct the hash key for the area and date
-    hash_key = f"counter:raid_total:{area}:{date_str}"
+    hash_key = f"counter:raid_total:{area_tag(area)}:{date_str}"
 
     # Construct field names for each metric
     field_name = f"{raid_pokemon}:{raid_level}:{raid_form}:{raid_costume}:{raid_is_exclusive}:{raid_ex_eligible}:total"
@@ -1,8 +1,10 @@
 from datetime import datetime
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.hour_histograms import hincrby_hourly
 from utils.logger import logger
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 
 async def update_raid_hourly_counter(raid_data, pipe=None):
     """
@@ -32,16 +34,16 @@ async def update_raid_hourly_counter(raid_data, pipe=None):
     raid_is_exclusive = raid_data["raid_is_exclusive"]
     raid_ex_eligible = raid_data["raid_ex_raid_eligible"]
 
-    hash_key = f"counter:raid_hourly:{area}:{date_hour}"
+    hash_key = f"counter:raid_hourly:{area_tag(area)}:{date_hour}"
     field_name = f"{raid_pokemon}:{raid_level}:{raid_form}:{raid_costume}:{raid_is_exclusive}:{raid_ex_eligible}:total"
 
     updated_fields = {}
     if pipe:
-        pipe.hincrby(hash_key, field_name, 1)
+        hincrby_hourly(pipe, hash_key, field_name, 1)
         updated_fields[field_name] = "OK"
     else:
         async with client.pipeline() as pipe:
-            pipe.hincrby(hash_key, field_name, 1)
+            hincrby_hourly(pipe, hash_key, field_name, 1)
             await pipe.execute()
         updated_fields[field_name] = "OK"
 
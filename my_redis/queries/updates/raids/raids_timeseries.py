@@ -1,8 +1,12 @@
 import config as AppConfig
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.field_ttl import hincrby_bucket
 from utils.logger import logger
 
-redis_manager = RedisManager()
+BUCKET_RETENTION_SEC = AppConfig.raid_timeseries_retention_ms // 1000
+
+redis_manager = RedisManager(POOL_INGEST)
 
 async def add_raid_timeseries_event(data, pipe=None):
     """
@@ -36,10 +40,10 @@ async def add_raid_timeseries_event(data, pipe=None):
     raid_ex_raid_eligible = data["raid_ex_raid_eligible"]
 
     # Build keys using a human‑readable format.
-    key_total = f"ts:raids_total:total:{area}:{raid_pokemon}:{raid_level}:{raid_form}"
-    key_costume = f"ts:raids_total:costume:{area}:{raid_pokemon}:{raid_level}:{raid_form}"
-    key_exclusive = f"ts:raids_total:exclusive:{area}:{raid_pokemon}:{raid_level}:{raid_form}"
-    key_ex_raid_eligible = f"ts:raids_total:ex_raid_eligible:{area}:{raid_pokemon}:{raid_level}:{raid_form}"
+    key_total = f"ts:raids_total:total:{area_tag(area)}:{raid_pokemon}:{raid_level}:{raid_form}"
+    key_costume = f"ts:raids_total:costume:{area_tag(area)}:{raid_pokemon}:{raid_level}:{raid_form}"
+    key_exclusive = f"ts:raids_total:exclusive:{area_tag(area)}:{raid_pokemon}:{raid_level}:{raid_form}"
+    key_ex_raid_eligible = f"ts:raids_total:ex_raid_eligible:{area_tag(area)}:{raid_pokemon}:{raid_level}:{raid_form}"
 
     logger.debug(f"🔑 Constructed Raid key: {key_total}")
 
@@ -51,29 +55,29 @@ async def add_raid_timeseries_event(data, pipe=None):
 
     updated_fields = {}
     if pipe:
-        pipe.hincrby(key_total, bucket, inc_total)
+        hincrby_bucket(pipe, key_total, bucket, inc_total, BUCKET_RETENTION_SEC)
         updated_fields["total"] = "OK"
         if inc_costume:
-            pipe.hincrby(key_costume, bucket, inc_costume)
+            hincrby_bucket(pipe, key_costume, bucket, inc_costume, BUCKET_RETENTION_SEC)
             updated_fields["costume"] = "OK"
         if inc_exclusive:
-            pipe.hincrby(key_exclusive, bucket, inc_exclusive)
+            hincrby_bucket(pipe, key_exclusive, bucket, inc_exclusive, BUCKET_RETENTION_SEC)
             updated_fields["exclusive"] = "OK"
         if inc_ex_raid_eligible:
-            pipe.hincrby(key_ex_raid_eligible, bucket, inc_ex_raid_eligible)
+            hincrby_bucket(pipe, key_ex_raid_eligible, bucket, inc_ex_raid_eligible, BUCKET_RETENTION_SEC)
             updated_fields["ex_raid_eligible"] = "OK"
     else:
         async with client.pipeline() as pipe:
-            pipe.hincrby(key_total, bucket, inc_total)
+            hincrby_bucket(pipe, key_total, bucket, inc_total, BUCKET_RETENTION_SEC)
             updated_fields["total"] = "OK"
             if inc_costume:
-                pipe.hincrby(key_costume, bucket, inc_costume)
+                hincrby_bucket(pipe, key_costume, bucket, inc_costume, BUCKET_RETENTION_SEC)
                 updated_fields["costume"] = "OK"
             if inc_exclusive:
-                pipe.hincrby(key_exclusive, bucket, inc_exclusive)
+                hincrby_bucket(pipe, key_exclusive, bucket, inc_exclusive, BUCKET_RETENTION_SEC)
                 updated_fields["exclusive"] = "OK"
             if inc_ex_raid_eligible:
-                pipe.hincrby(key_ex_raid_eligible, bucket, inc_ex_raid_eligible)
+                hincrby_bucket(pipe, key_ex_raid_eligible, bucket, inc_ex_raid_eligible, BUCKET_RETENTION_SEC)
                 updated_fields["ex_raid_eligible"] = "OK"
             await pipe.execute()
 
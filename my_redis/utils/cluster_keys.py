@@ -0,0 +1,82 @@
+"""
+Redis Cluster helpers (REDIS.cluster in config.json).
+
+With cluster mode on, every per-area key wraps the area in a hash tag, e.g.
+  counter:pokemon_daily:{Lisbon}:20250101
+  ts:pokemon:total:{Lisbon}:25:0
+so all keys of one area live on the same shard. Multi-key Lua scripts are
+only ever called with keys from a single slot (see slot_chunks()).
+
+With cluster mode off the helpers are no-ops and key names are unchanged.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+import config as AppConfig
+from redis.crc import key_slot
+
+T = TypeVar("T")
+
+# Max concurrent per-shard Lua calls for one query in cluster mode
+CLUSTER_MAX_INFLIGHT = 8
+
+
+def cluster_enabled() -> bool:
+    return AppConfig.redis_cluster
+
+
+def area_tag(area: str) -> str:
+    """Area component for key names and SCAN patterns: `{area}` in cluster mode, `area` otherwise."""
+    if not cluster_enabled() or area in (None, "*") or area.startswith("{"):
+        return area
+    return f"{{{area}}}"
+
+
+def untag(area: str) -> str:
+    """Area name from a key component, with the cluster hash tag removed."""
+    if area and area.startswith("{") and area.endswith("}"):
+        return area[1:-1]
+    return area
+
+
+async def scan_keys(client, match: str, count: int = 1000) -> list[str]:
+    """
+    SCAN for all keys matching `match`. On a cluster client scan_iter() walks every primary,
+    on a single instance it is the usual cursor loop.
+    """
+    return [
+        k.decode() if isinstance(k, bytes) else k
+        async for k in client.scan_iter(match=match, count=count)
+    ]
+
+
+def slot_chunks(keys: Iterable[str], chunk_size: int) -> list[list[str]]:
+    """
+    Split keys into chunks for multi-key commands and Lua scripts.
+    In cluster mode every chunk holds keys of a single hash slot only.
+    """
+    keys = list(keys)
+    if not cluster_enabled():
+        return [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+
+    by_slot: dict[int, list[str]] = {}
+    for key in keys:
+        by_slot.setdefault(key_slot(key.encode()), []).append(key)
+
+    chunks = []
+    for slot_keys in by_slot.values():
+        chunks.extend(slot_keys[i:i + chunk_size] for i in range(0, len(slot_keys), chunk_size))
+    return chunks
+
+
+async def gather_chunks(chunks: list[list[str]], fn: Callable[[list[str]], Awaitable[T]],
+                        max_inflight: int = CLUSTER_MAX_INFLIGHT) -> list[T]:
+    """Run `fn` for every chunk concurrently (bounded), preserving chunk order in the result."""
+    semaphore = asyncio.Semaphore(max_inflight)
+
+    async def _run(chunk):
+        async with semaphore:
+            return await fn(chunk)
+
+    return await asyncio.gather(*[_run(c) for c in chunks])
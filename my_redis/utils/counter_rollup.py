@@ -0,0 +1,360 @@
+"""
+Hierarchical counter rollups (optional, COUNTER_ROLLUP.enabled in config.json).
+
+With rollups enabled the Pokémon ingest path only writes the hourly counters:
+  counter:pokemon_hourly:{area}:{YYYYMMDDHH}
+  counter:tth_pokemon_hourly:{area}:{YYYYMMDDHH}
+
+The leader runs CounterRollupService, which compacts closed hours into the
+daily hashes and closed days into the weekly hashes with a server-side merge
+script. Progress is tracked per area with a watermark hash:
+  counter:rollup:watermark:{area}  ->  {source_family: last merged time tag}
+
+Everything newer than the watermark is still "pending" and the retrieval
+classes fold those keys back in (see pending_rollup_keys), so queries over
+the open day/week keep returning the same numbers as the triple-write path.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
+from my_redis.utils import cluster_keys, global_rollup
+from my_redis.utils.cluster_keys import untag
+from my_redis.utils.expire_timeseries import is_noscript_error
+from server_fastapi import global_state
+from utils.logger import logger
+
+redis_manager = RedisManager(POOL_BACKGROUND)
+
+STATE_KEY = "counter:rollup:state"
+WATERMARK_KEY = "counter:rollup:watermark:{area}"  # area as it appears in the counter keys (hash-tagged in cluster mode)
+LOCK_KEY = "rollup:counters:lock"  # string key, kept outside counter:* which the MySQL backup reads as hashes
+LOCK_TTL_SEC = 300
+
+# family -> (hourly prefix, daily prefix, weekly prefix)
+ROLLUP_CHAINS: Dict[str, tuple[str, str, str]] = {
+    "pokemon":     ("counter:pokemon_hourly",     "counter:pokemon_daily",     "counter:pokemon_total"),
+    "tth_pokemon": ("counter:tth_pokemon_hourly", "counter:tth_pokemon_daily", "counter:tth_pokemon"),
+}
+
+# ROLLUP_CHAINS family -> GLOBAL_ROLLUP family
+GLOBAL_ROLLUP_FAMILIES = {"pokemon": "pokemon", "tth_pokemon": "pokemon_tth"}
+
+HOUR_FORMAT = "%Y%m%d%H"
+DAY_FORMAT = "%Y%m%d"
+
+_MERGE_SHA: Optional[str] = None
+
+# KEYS[1]   : destination hash
+# KEYS[2]   : watermark hash
+# KEYS[3..] : source hashes, ascending by time tag
+# ARGV[1]   : watermark field
+# ARGV[2..] : time tag of each source (same order as KEYS[3..])
+# Sources at or below the stored watermark are skipped, so re-running a merge is a no-op.
+ROLLUP_MERGE_SCRIPT = r"""
+local watermark = redis.call('HGET', KEYS[2], ARGV[1]) or ''
+local last = watermark
+local merged_sources = 0
+local merged_fields = 0
+
+for i = 3, #KEYS do
+    local tag = ARGV[i - 1]
+    if tag > watermark then
+        local flat = redis.call('HGETALL', KEYS[i])
+        for j = 1, #flat, 2 do
+            local value = math.floor(tonumber(flat[j + 1]) or 0)
+            if value ~= 0 then
+                redis.call('HINCRBY', KEYS[1], flat[j], value)
+                merged_fields = merged_fields + 1
+            end
+        end
+        merged_sources = merged_sources + 1
+        if tag > last then
+            last = tag
+        end
+    end
+end
+
+if last ~= watermark then
+    redis.call('HSET', KEYS[2], ARGV[1], last)
+end
+return { merged_sources, merged_fields }
+"""
+
+
+def rollup_enabled() -> bool:
+    return AppConfig.counter_rollup_enabled
+
+
+def _family_name(prefix: str) -> str:
+    """counter:pokemon_hourly -> pokemon_hourly (used as the watermark field)."""
+    return prefix.split(":", 1)[1]
+
+
+def _week_start(day: datetime) -> datetime:
+    return day - timedelta(days=day.weekday())
+
+
+def _split_key(key: str) -> tuple[str, str] | None:
+    """counter:{family}:{area}:{tag} -> (area, tag)"""
+    parts = key.split(":")
+    if len(parts) < 4:
+        return None
+    return ":".join(parts[2:-1]), parts[-1]
+
+
+def _area_offsets() -> Dict[str, int]:
+    """
+    Offset per area. __all__ buckets mix every area's shifted time, so they close with the area
+    furthest behind UTC.
+    """
+    offsets = {g["name"]: g.get("offset", 0) for g in (global_state.geofences or [])}
+    offsets[global_rollup.GLOBAL_AREA] = global_rollup.min_area_offset()
+    return offsets
+
+
+def _area_now(offset_hours: int, grace_seconds: int = 0) -> datetime:
+    """
+    Current time in the same basis as the counter key tags.
+    Ingest stores first_seen as true UTC shifted by the area offset and formats it with fromtimestamp().
+    """
+    return datetime.fromtimestamp(time.time() + offset_hours * 3600 - grace_seconds)
+
+
+async def _get_watermarks(client, areas, field: str, time_format: str) -> Dict[str, str]:
+    """Watermark per area; areas the leader has not visited yet use the same starting point it will pick."""
+    areas = list(areas)
+    if not areas:
+        return {}
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.hget(STATE_KEY, "enabled_at")
+        for area in areas:
+            pipe.hget(WATERMARK_KEY.format(area=area), field)
+        enabled_at, *values = await pipe.execute()
+    offsets = _area_offsets()
+    return {
+        area: value or _initial_watermark(enabled_at, offsets.get(untag(area), 0), time_format)
+        for area, value in zip(areas, values)
+    }
+
+
+async def pending_rollup_keys(client, area: str, family: str, level: str, start: datetime, end: datetime) -> Dict[str, str]:
+    """
+    Keys that have not been merged into `level` ("daily" or "weekly") yet, mapped to the key they will be merged into.
+    Only keys whose target bucket falls inside [start, end) are returned.
+    """
+    hourly_prefix, daily_prefix, weekly_prefix = ROLLUP_CHAINS[family]
+    area_glob = global_rollup.area_glob(area, GLOBAL_ROLLUP_FAMILIES[family])
+
+    sources = [(hourly_prefix, HOUR_FORMAT)]
+    if level == "weekly":
+        sources.append((daily_prefix, DAY_FORMAT))
+
+    pending: Dict[str, str] = {}
+    for prefix, time_format in sources:
+        keys = await cluster_keys.scan_keys(client, f"{prefix}:{area_glob}:*")
+        if area_glob == "*":
+            keys = global_rollup.drop_global_keys(keys)
+        parsed = [(k, _split_key(k)) for k in keys]
+        parsed = [(k, p) for k, p in parsed if p]
+        watermarks = await _get_watermarks(client, {p[0] for _, p in parsed}, _family_name(prefix), time_format)
+
+        for key, (key_area, tag) in parsed:
+            if tag <= watermarks.get(key_area, ""):
+                continue
+            try:
+                dt = datetime.strptime(tag, time_format)
+            except ValueError:
+                continue
+            day = dt.replace(hour=0)
+            if level == "daily":
+                bucket = day
+                target = f"{daily_prefix}:{key_area}:{day.strftime(DAY_FORMAT)}"
+            else:
+                bucket = _week_start(day)
+                target = f"{weekly_prefix}:{key_area}:{bucket.strftime(DAY_FORMAT)}"
+            if start <= bucket < end:
+                pending[key] = target
+
+    logger.debug(f"🧮 {len(pending)} pending rollup key(s) for {family}/{level} area={area}")
+    return pending
+
+
+def fold_pending(raw_aggregated: dict, pending: Dict[str, str], mode: str) -> dict:
+    """
+    Re-label pending source keys as the rollup key they belong to so per-key transforms
+    (grouped TTH averages, surged hour buckets) see the same shape as fully rolled data.
+    Sum mode is already flat and needs no folding.
+    """
+    if mode == "sum" or not pending:
+        return raw_aggregated
+    for source, target in pending.items():
+        fields = raw_aggregated.pop(source, None)
+        if not fields:
+            continue
+        bucket = raw_aggregated.setdefault(target, {})
+        for field, value in fields.items():
+            bucket[field] = bucket.get(field, 0) + value
+    return raw_aggregated
+
+
+async def _ensure_merge_script(client) -> str:
+    global _MERGE_SHA
+    if not _MERGE_SHA:
+        _MERGE_SHA = await client.script_load(ROLLUP_MERGE_SCRIPT)
+        logger.debug(f"🧮 Rollup merge script loaded with SHA: {_MERGE_SHA}")
+    return _MERGE_SHA
+
+
+async def _merge(client, dest: str, area: str, field: str, sources: list[tuple[str, str]]) -> tuple[int, int]:
+    global _MERGE_SHA
+    sources = sorted(sources, key=lambda s: s[1])
+    keys = [dest, WATERMARK_KEY.format(area=area)] + [k for k, _ in sources]
+    args = [field] + [tag for _, tag in sources]
+    sha = await _ensure_merge_script(client)
+    try:
+        merged, fields = await client.evalsha(sha, len(keys), *keys, *args)
+    except Exception as e:
+        if not is_noscript_error(e):
+            raise
+        _MERGE_SHA = None
+        sha = await _ensure_merge_script(client)
+        merged, fields = await client.evalsha(sha, len(keys), *keys, *args)
+    return int(merged or 0), int(fields or 0)
+
+
+def _initial_watermark(enabled_at, offset: int, time_format: str) -> str:
+    """
+    First time an area is seen, start from the last bucket closed before rollups were enabled:
+    everything older was already written to daily/weekly by the legacy ingest path.
+    """
+    enabled_ts = float(enabled_at) if enabled_at else time.time()
+    enabled_dt = datetime.fromtimestamp(enabled_ts + offset * 3600)
+    step = timedelta(hours=1) if time_format == HOUR_FORMAT else timedelta(days=1)
+    return (enabled_dt - step).strftime(time_format)
+
+
+async def _rollup_level(client, source_prefix: str, target_prefix: str, time_format: str,
+                        offsets: Dict[str, int], grace_seconds: int, enabled_at) -> tuple[int, int]:
+    """Merge every closed source bucket above the area watermark into its target bucket."""
+    field = _family_name(source_prefix)
+    keys = await cluster_keys.scan_keys(client, f"{source_prefix}:*")
+
+    by_area: Dict[str, list[tuple[str, str]]] = {}
+    for key in keys:
+        parsed = _split_key(key)
+        if parsed:
+            by_area.setdefault(parsed[0], []).append((key, parsed[1]))
+
+    total_sources = total_fields = 0
+    for area, entries in by_area.items():
+        offset = offsets.get(untag(area), 0)
+        closed_before = _area_now(offset, grace_seconds).strftime(time_format)
+        wm_key = WATERMARK_KEY.format(area=area)
+        if not await client.hexists(wm_key, field):
+            await client.hsetnx(wm_key, field, _initial_watermark(enabled_at, offset, time_format))
+        watermark = await client.hget(wm_key, field) or ""
+
+        groups: Dict[str, list[tuple[str, str]]] = {}
+        for key, tag in entries:
+            if tag <= watermark or tag >= closed_before:
+                continue
+            try:
+                dt = datetime.strptime(tag, time_format)
+            except ValueError:
+                continue
+            if time_format == HOUR_FORMAT:
+                target_tag = dt.strftime(DAY_FORMAT)
+            else:
+                target_tag = _week_start(dt).strftime(DAY_FORMAT)
+            groups.setdefault(target_tag, []).append((key, tag))
+
+        # Ascending target order keeps the watermark monotonic
+        for target_tag in sorted(groups):
+            merged, fields = await _merge(client, f"{target_prefix}:{area}:{target_tag}", area, field, groups[target_tag])
+            total_sources += merged
+            total_fields += fields
+        await asyncio.sleep(0)
+
+    return total_sources, total_fields
+
+
+async def run_rollup_once(client) -> None:
+    if not await client.set(LOCK_KEY, str(time.time()), nx=True, ex=LOCK_TTL_SEC):
+        logger.info("🔒 Another counter rollup is in progress; skipping this cycle.")
+        return
+    try:
+        await client.hsetnx(STATE_KEY, "enabled_at", str(int(time.time())))
+        enabled_at = await client.hget(STATE_KEY, "enabled_at")
+        offsets = _area_offsets()
+        grace = AppConfig.counter_rollup_grace_seconds
+
+        for family, (hourly_prefix, daily_prefix, weekly_prefix) in ROLLUP_CHAINS.items():
+            t0 = time.perf_counter()
+            hours, hour_fields = await _rollup_level(client, hourly_prefix, daily_prefix, HOUR_FORMAT, offsets, grace, enabled_at)
+            days, day_fields = await _rollup_level(client, daily_prefix, weekly_prefix, DAY_FORMAT, offsets, grace, enabled_at)
+            logger.info(
+                f"🧮 Rollup {family}: {hours} hour(s) -> daily ({hour_fields} fields), "
+                f"{days} day(s) -> weekly ({day_fields} fields) in {time.perf_counter() - t0:.2f}s"
+            )
+    finally:
+        await client.delete(LOCK_KEY)
+
+
+async def clear_rollup_state(client) -> None:
+    """
+    Drop rollup progress when the mode is turned off. The legacy path writes daily/weekly directly again,
+    so stale watermarks would otherwise cause double merges if rollups are re-enabled later.
+    """
+    keys = [STATE_KEY] + await cluster_keys.scan_keys(client, "counter:rollup:watermark:*")
+    await client.delete(*keys)
+
+
+class CounterRollupService:
+    def __init__(self, redis_manager: RedisManager, interval: int = 300):
+        self._redis_manager = redis_manager
+        self._interval      = interval
+        self._running       = False
+        self._task: asyncio.Task | None = None
+
+    async def _rollup_loop(self) -> None:
+        self._running = True
+        logger.info(f"⏳ Counter rollup service started — interval: {self._interval}s")
+
+        while self._running:
+            try:
+                client = await self._redis_manager.check_redis_connection()
+                if not client:
+                    logger.warning("⚠️ Counter rollup: connection unavailable, skipping cycle")
+                else:
+                    await run_rollup_once(client)
+            except asyncio.CancelledError:
+                logger.info("🛑 Counter rollup loop cancelled")
+                break
+            except Exception as e:
+                logger.error(f"❌ Counter rollup cycle failed: {e}")
+
+            await asyncio.sleep(self._interval)
+
+    async def start(self) -> None:
+        if self._running:
+            logger.warning("⚠️ Counter rollup service already running")
+            return
+        self._task = asyncio.create_task(self._rollup_loop())
+        logger.info("🚀 Started counter rollup service")
+
+    async def stop(self) -> None:
+        if not self._running:
+            logger.warning("⚠️ Counter rollup service already stopped")
+            return
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
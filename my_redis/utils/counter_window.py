@@ -0,0 +1,350 @@
+"""
+Rolling 24 hour counter windows (COUNTER_WINDOW.enabled in config.json).
+
+For every area and hourly counter family the leader keeps a ring of the last 24 closed
+hours plus their running total:
+  window:{family}:{area}        sum of the 24 ring slots
+  window:{family}:{area}:{HH}   copy of counter:{family}_hourly:{area}:{tag} for hour HH
+  window:state:{area}           {family: tag (YYYYMMDDHH) of the newest hour in the ring}
+
+Every time an hour closes, WINDOW_ADVANCE_SCRIPT subtracts the ring slot that falls out,
+copies the new hour into it and adds it to the total, so the total never drifts even if late
+events land in an hourly key after it was copied.
+
+Hour boundaries: tags are area-local like the counter keys. "Last N hours" means the N
+closed hours ending at the last hour that closed more than grace_seconds ago; the running
+hour is never included. A query for N hours costs one HGETALL for N = 24 and at most 12
+otherwise. When the window is not (yet) at that hour, the hourly keys are read by name instead,
+with the same boundaries.
+
+The keys live outside counter:* so the MySQL backup does not copy them; they are rebuilt
+from the hourly keys after a restore.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager
+from my_redis.utils import cluster_keys, global_rollup
+from my_redis.utils.cluster_keys import area_tag
+from my_redis.utils.expire_timeseries import is_noscript_error
+from server_fastapi import global_state
+from utils.logger import logger
+
+WINDOW_HOURS = 24
+HOUR_FORMAT = "%Y%m%d%H"
+LOCK_KEY = "window:counters:lock"
+LOCK_TTL_SEC = 300
+
+# window family -> (hourly counter prefix, GLOBAL_ROLLUP family)
+FAMILIES: Dict[str, tuple[str, str]] = {
+    "pokemon":     ("counter:pokemon_hourly",     "pokemon"),
+    "tth_pokemon": ("counter:tth_pokemon_hourly", "pokemon_tth"),
+    "raid":        ("counter:raid_hourly",        "raids"),
+    "invasion":    ("counter:invasion_hourly",    "invasions"),
+    "quest":       ("counter:quest_hourly",       "quests"),
+}
+
+_ADVANCE_SHA: Optional[str] = None
+
+# KEYS[1]      : window total
+# KEYS[2]      : window state hash
+# KEYS[3..]    : (hourly source, ring slot) pairs, oldest hour first
+# ARGV[1]      : state field (family)
+# ARGV[2]      : expected current state ('' = none); anything else means another pass got here first
+# ARGV[3]      : '1' = rebuild (drop the total, don't subtract the old slots)
+# ARGV[4]      : tag of the newest hour after this call
+WINDOW_ADVANCE_SCRIPT = r"""
+local current = redis.call('HGET', KEYS[2], ARGV[1]) or ''
+if current ~= ARGV[2] then
+    return -1
+end
+local rebuild = ARGV[3] == '1'
+if rebuild then
+    redis.call('DEL', KEYS[1])
+end
+
+local copied = 0
+for i = 3, #KEYS, 2 do
+    local slot = KEYS[i + 1]
+    if not rebuild then
+        local old = redis.call('HGETALL', slot)
+        for j = 1, #old, 2 do
+            local left = redis.call('HINCRBY', KEYS[1], old[j], -tonumber(old[j + 1]))
+            if left <= 0 then
+                redis.call('HDEL', KEYS[1], old[j])
+            end
+        end
+    end
+    redis.call('DEL', slot)
+
+    local new = redis.call('HGETALL', KEYS[i])
+    for j = 1, #new, 1000 do
+        redis.call('HSET', slot, unpack(new, j, math.min(j + 999, #new)))
+    end
+    for j = 1, #new, 2 do
+        redis.call('HINCRBY', KEYS[1], new[j], new[j + 1])
+    end
+    if #new > 0 then
+        copied = copied + 1
+    end
+end
+
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[4])
+return copied
+"""
+
+
+def window_enabled() -> bool:
+    return AppConfig.counter_window_enabled
+
+
+def total_key(family: str, area: str) -> str:
+    return f"window:{family}:{area_tag(area)}"
+
+
+def slot_key(family: str, area: str, tag: str) -> str:
+    return f"window:{family}:{area_tag(area)}:{tag[-2:]}"
+
+
+def state_key(area: str) -> str:
+    return f"window:state:{area_tag(area)}"
+
+
+def _area_offset(area: str) -> int:
+    # __all__ hours mix every area's shifted time: closed once the area furthest behind UTC has left them
+    if global_rollup.is_global_area(area):
+        return global_rollup.min_area_offset()
+    for g in global_state.geofences or []:
+        if g["name"] == area:
+            return g.get("offset", 0)
+    return 0
+
+
+def last_closed_hour(offset_hours: int, grace_seconds: int) -> str:
+    """
+    Tag of the newest hour that closed more than grace_seconds ago, in the same basis as the
+    counter key tags (first_seen shifted by the area offset, formatted with fromtimestamp()).
+    """
+    now = datetime.fromtimestamp(time.time() + offset_hours * 3600 - grace_seconds)
+    return (now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)).strftime(HOUR_FORMAT)
+
+
+def hour_tags(newest: str, hours: int) -> list[str]:
+    """The `hours` hour tags ending at `newest`, oldest first."""
+    end = datetime.strptime(newest, HOUR_FORMAT)
+    return [(end - timedelta(hours=h)).strftime(HOUR_FORMAT) for h in range(hours - 1, -1, -1)]
+
+
+def _hours_between(older: str, newer: str) -> int:
+    delta = datetime.strptime(newer, HOUR_FORMAT) - datetime.strptime(older, HOUR_FORMAT)
+    return int(delta.total_seconds() // 3600)
+
+
+def window_areas() -> Dict[str, list[str]]:
+    """Areas to maintain per family: every geofence, plus __all__ where the global rollup is on."""
+    names = [g["name"] for g in (global_state.geofences or [])]
+    return {
+        family: names + ([global_rollup.GLOBAL_AREA] if global_rollup.global_rollup_enabled(rollup_family) else [])
+        for family, (_, rollup_family) in FAMILIES.items()
+    }
+
+
+async def _ensure_advance_script(client) -> str:
+    global _ADVANCE_SHA
+    if not _ADVANCE_SHA:
+        _ADVANCE_SHA = await client.script_load(WINDOW_ADVANCE_SCRIPT)
+        logger.debug(f"🪟 Window advance script loaded with SHA: {_ADVANCE_SHA}")
+    return _ADVANCE_SHA
+
+
+async def _advance(client, family: str, area: str, current: str, target: str) -> int:
+    """Move the (family, area) window from `current` to `target`. Returns hours copied, -1 on a lost race."""
+    global _ADVANCE_SHA
+    prefix = FAMILIES[family][0]
+    gap = _hours_between(current, target) if current else WINDOW_HOURS
+    rebuild = not current or gap <= 0 or gap >= WINDOW_HOURS
+    tags = hour_tags(target, WINDOW_HOURS if rebuild else gap)
+
+    keys = [total_key(family, area), state_key(area)]
+    for tag in tags:
+        keys += [f"{prefix}:{area_tag(area)}:{tag}", slot_key(family, area, tag)]
+    args = [family, current or "", "1" if rebuild else "0", target]
+
+    sha = await _ensure_advance_script(client)
+    try:
+        return int(await client.evalsha(sha, len(keys), *keys, *args))
+    except Exception as e:
+        if not is_noscript_error(e):
+            raise
+        _ADVANCE_SHA = None
+        sha = await _ensure_advance_script(client)
+        return int(await client.evalsha(sha, len(keys), *keys, *args))
+
+
+async def run_window_once(client) -> None:
+    if not await client.set(LOCK_KEY, str(time.time()), nx=True, ex=LOCK_TTL_SEC):
+        logger.info("🔒 Another counter window pass is in progress; skipping this cycle.")
+        return
+    try:
+        grace = AppConfig.counter_window_grace_seconds
+        for family, areas in window_areas().items():
+            if not areas:
+                continue
+            t0 = time.perf_counter()
+            async with client.pipeline(transaction=False) as pipe:
+                for area in areas:
+                    pipe.hget(state_key(area), family)
+                states = await pipe.execute()
+
+            advanced = copied = 0
+            for area, current in zip(areas, states):
+                target = last_closed_hour(_area_offset(area), grace)
+                if current == target:
+                    continue
+                result = await _advance(client, family, area, current, target)
+                if result >= 0:
+                    advanced += 1
+                    copied += result
+                await asyncio.sleep(0)
+            if advanced:
+                logger.info(
+                    f"🪟 Window {family}: {advanced} area(s) advanced, {copied} hour(s) copied "
+                    f"in {time.perf_counter() - t0:.2f}s"
+                )
+    finally:
+        await client.delete(LOCK_KEY)
+
+
+def _merge(aggregated: dict, key: str, data: dict, mode: str, sign: int = 1) -> None:
+    """Fold one hash into the accumulator in the shape filtering_keys.aggregate_keys() returns."""
+    if mode == "sum":
+        for field, value in data.items():
+            aggregated[field] = aggregated.get(field, 0) + sign * int(value)
+    else:
+        bucket = aggregated.setdefault(key, {})
+        for field, value in data.items():
+            bucket[field] = bucket.get(field, 0) + sign * int(value)
+
+
+async def _read_window(client, family: str, area: str, newest: str, hours: int, mode: str) -> Optional[dict]:
+    """
+    Last `hours` hours as total minus the ring slots that are too old.
+    None if the window is not at `newest` (not maintained, lagging, or advanced mid-read).
+    """
+    old_tags = hour_tags(newest, WINDOW_HOURS)[:WINDOW_HOURS - hours]
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.hget(state_key(area), family)
+        pipe.hgetall(total_key(family, area))
+        for tag in old_tags:
+            pipe.hgetall(slot_key(family, area, tag))
+        pipe.hget(state_key(area), family)
+        before, total, *slots, after = await pipe.execute()
+    if before != newest or after != newest:
+        return None
+
+    key = total_key(family, area)
+    aggregated: dict = {}
+    _merge(aggregated, key, total, mode)
+    for data in slots:
+        _merge(aggregated, key, data, mode, sign=-1)
+    if mode == "sum":
+        return {f: v for f, v in aggregated.items() if v > 0}
+    aggregated[key] = {f: v for f, v in aggregated.get(key, {}).items() if v > 0}
+    return aggregated if aggregated[key] else {}
+
+
+async def aggregate_last_hours(client, family: str, area: str, hours: int, mode: str,
+                               per_hour: bool = False) -> tuple[dict, dict]:
+    """
+    Aggregate the last `hours` closed hours (1-24) of an hourly counter family for one area.
+
+    Returns (raw_aggregated, window) where raw_aggregated has the same shape as
+    filtering_keys.aggregate_keys() and window describes the hours covered.
+    With per_hour, every hour stays a separate entry keyed by its hourly key name (for surged
+    and per-hour grouped transforms), so the hourly keys are read directly.
+    """
+    if area.lower() in ["global", "all"]:
+        if not global_rollup.global_rollup_enabled(FAMILIES[family][1]):
+            raise ValueError("last_hours needs a single area or the global rollup")
+        area = global_rollup.GLOBAL_AREA
+
+    hours = max(1, min(WINDOW_HOURS, int(hours)))
+    newest = last_closed_hour(_area_offset(area), AppConfig.counter_window_grace_seconds)
+    tags = hour_tags(newest, hours)
+    window = {"hours": hours, "start": tags[0], "end": newest}
+
+    # Total minus old slots is only cheaper than reading the hours themselves for long windows
+    if window_enabled() and not per_hour and hours > WINDOW_HOURS // 2:
+        aggregated = await _read_window(client, family, area, newest, hours, mode)
+        if aggregated is not None:
+            return aggregated, {**window, "source": "window"}
+
+    prefix = FAMILIES[family][0]
+    keys = [f"{prefix}:{area_tag(area)}:{tag}" for tag in tags]
+    async with client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.hgetall(key)
+        results = await pipe.execute()
+
+    aggregated: dict = {}
+    for key, data in zip(keys, results):
+        if data:
+            _merge(aggregated, key if per_hour else prefix, data, mode)
+    return aggregated, {**window, "source": "hourly"}
+
+
+async def clear_window_state(client) -> None:
+    """Drop the window keys when the feature is turned off, so they don't sit in memory going stale."""
+    keys = await cluster_keys.scan_keys(client, "window:*")
+    for i in range(0, len(keys), 500):
+        await client.delete(*keys[i:i + 500])
+
+
+class CounterWindowService:
+    def __init__(self, redis_manager: RedisManager, interval: int = 60):
+        self._redis_manager = redis_manager
+        self._interval      = interval
+        self._running       = False
+        self._task: asyncio.Task | None = None
+
+    async def _window_loop(self) -> None:
+        self._running = True
+        logger.info(f"⏳ Counter window service started — interval: {self._interval}s")
+
+        while self._running:
+            try:
+                client = await self._redis_manager.check_redis_connection()
+                if not client:
+                    logger.warning("⚠️ Counter window: connection unavailable, skipping cycle")
+                else:
+                    await run_window_once(client)
+            except asyncio.CancelledError:
+                logger.info("🛑 Counter window loop cancelled")
+                break
+            except Exception as e:
+                logger.error(f"❌ Counter window cycle failed: {e}")
+
+            await asyncio.sleep(self._interval)
+
+    async def start(self) -> None:
+        if self._running:
+            logger.warning("⚠️ Counter window service already running")
+            return
+        self._task = asyncio.create_task(self._window_loop())
+        logger.info("🚀 Started counter window service")
+
+    async def stop(self) -> None:
+        if not self._running:
+            logger.warning("⚠️ Counter window service already stopped")
+            return
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -3,11 +3,12 @@ import asyncio
 import time
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
+from my_redis.utils import cluster_keys, field_ttl, timeseries_tiers
 from utils.logger import logger
 import config as AppConfig
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_BACKGROUND)
 
 # Config knobs for chunked cleanup
 SCAN_COUNT_DEFAULT       = 1000       # keys per scan step
@@ -138,14 +139,7 @@ async def _release_lock(client):
 async def _scan_keys_by_pattern(client, pattern: str) -> list[str]:
     """SCAN for all matching keys (non-blocking, fast)"""
     scan_start = time.monotonic()
-    all_keys = []
-
-    cursor = 0
-    while True:
-        cursor, keys = await client.scan(cursor, match=pattern, count=SCAN_COUNT_DEFAULT)
-        all_keys.extend(k.decode() if isinstance(k, bytes) else k for k in keys)
-        if cursor == 0:
-            break
+    all_keys = await cluster_keys.scan_keys(client, pattern, SCAN_COUNT_DEFAULT)
 
     scan_elapsed = time.monotonic() - scan_start
     logger.debug(f"♻️ SCAN collected {len(all_keys)} keys for pattern '{pattern}' in {scan_elapsed:.3f}s")
@@ -201,19 +195,16 @@ async def cleanup_counter_hourly_for_pattern(client, pattern: str, retention_hou
 
     cutoff  = datetime.utcnow() - timedelta(hours=retention_hours)
     deleted = 0
-    cursor  = 0
-
-    while True:
-        cursor, keys = await client.scan(cursor, match=pattern, count=SCAN_COUNT_DEFAULT)
+    keys    = await cluster_keys.scan_keys(client, pattern, SCAN_COUNT_DEFAULT)
 
+    for page_start in range(0, len(keys), SCAN_COUNT_DEFAULT):
         to_delete = []
-        for key in keys:
-            key_str  = key.decode() if isinstance(key, bytes) else key
+        for key_str in keys[page_start:page_start + SCAN_COUNT_DEFAULT]:
             date_str = key_str.rsplit(":", 1)[-1]
             if len(date_str) == 10 and date_str.isdigit():
                 try:
                     if datetime.strptime(date_str, "%Y%m%d%H") < cutoff:
-                        to_delete.append(key)
+                        to_delete.append(key_str)
                 except ValueError:
                     pass
 
@@ -225,9 +216,6 @@ async def cleanup_counter_hourly_for_pattern(client, pattern: str, retention_hou
 
         await asyncio.sleep(0)   # yield between scan pages
 
-        if cursor == 0:
-            break
-
     logger.info(f"♻️ Counter hourly cleanup {pattern}: {deleted} keys deleted")
     return deleted
 
@@ -265,19 +253,16 @@ async def cleanup_counter_daily_for_pattern(client, pattern: str, retention_days
 
     cutoff  = datetime.utcnow() - timedelta(days=retention_days)
     deleted = 0
-    cursor  = 0
-
-    while True:
-        cursor, keys = await client.scan(cursor, match=pattern, count=SCAN_COUNT_DEFAULT)
+    keys    = await cluster_keys.scan_keys(client, pattern, SCAN_COUNT_DEFAULT)
 
+    for page_start in range(0, len(keys), SCAN_COUNT_DEFAULT):
         to_delete = []
-        for key in keys:
-            key_str  = key.decode() if isinstance(key, bytes) else key
+        for key_str in keys[page_start:page_start + SCAN_COUNT_DEFAULT]:
             date_str = key_str.rsplit(":", 1)[-1]
             if len(date_str) == 8 and date_str.isdigit():
                 try:
                     if datetime.strptime(date_str, "%Y%m%d") < cutoff:
-                        to_delete.append(key)
+                        to_delete.append(key_str)
                 except ValueError:
                     pass
 
@@ -289,9 +274,6 @@ async def cleanup_counter_daily_for_pattern(client, pattern: str, retention_days
 
         await asyncio.sleep(0)
 
-        if cursor == 0:
-            break
-
     logger.info(f"♻️ Counter daily cleanup {pattern}: {deleted} keys deleted")
     return deleted
 
@@ -325,7 +307,7 @@ async def cleanup_timeseries_for_pattern(pattern: str, retention_sec: int) -> No
         return
 
     # Step 2: Split into chunks
-    chunks = [all_keys[i:i+CHUNK_SIZE_DEFAULT] for i in range(0, len(all_keys), CHUNK_SIZE_DEFAULT)]
+    chunks = cluster_keys.slot_chunks(all_keys, CHUNK_SIZE_DEFAULT)
     logger.info(f"♻️ Processing {len(all_keys)} keys in {len(chunks)} chunks of ~{CHUNK_SIZE_DEFAULT} keys")
 
     total_removed = 0
@@ -379,10 +361,19 @@ async def cleanup_timeseries() -> None:
 
         # ── Timeseries cleanup (field-level Lua script) ───────────────────────
         for pattern, retention in get_retention_mapping().items():
+            if not await field_ttl.lua_cleanup_needed(client, retention):
+                logger.debug(f"♻️ Skipping {pattern}: minute buckets expire via field TTL")
+                continue
             logger.info(f"▶️ Pattern: {pattern}, retention: {retention}s ({retention/3600:.1f}h)")
             await cleanup_timeseries_for_pattern(pattern, retention)
             await asyncio.sleep(0.1)
 
+        # ── Downsampled tiers (ts_15m:*, ts_1h:*; written without field TTL) ──
+        for pattern, retention in timeseries_tiers.get_tier_retention_mapping().items():
+            logger.info(f"▶️ Pattern: {pattern}, retention: {retention}s ({retention/86400:.1f}d)")
+            await cleanup_timeseries_for_pattern(pattern, retention)
+            await asyncio.sleep(0.1)
+
         # ── Counter hourly cleanup (whole-key DEL by key-name date suffix) ────
         total_counter_deleted = await cleanup_all_counter_hourly(client)
         logger.info(f"♻️ Counter hourly cleanup total: {total_counter_deleted} keys deleted")
@@ -0,0 +1,89 @@
+"""
+Field-level TTL for the ts:* minute-bucket hashes (CLEAN_REDIS_TS.field_ttl in config.json).
+
+On Redis 7.4+ every minute-bucket field gets HEXPIREAT <bucket + retention> when it is written,
+so Redis drops old buckets itself and empty hashes disappear with their last field.
+Support is detected once per worker at startup; older servers keep the HSCAN/HDEL Lua cleanup.
+
+Fields written before the switch have no TTL, so the Lua cleanup keeps running for one full
+retention window after FIELD_TTL_SINCE_KEY was set and is skipped afterwards.
+"""
+
+import time
+from typing import Optional, Union
+
+import config as AppConfig
+from utils.logger import logger
+
+FIELD_TTL_SINCE_KEY = "ts:field_ttl:since"
+MIN_REDIS_VERSION = (7, 4)
+
+_active = False
+
+
+def field_ttl_active() -> bool:
+    return _active
+
+
+def _version_tuple(version: str) -> tuple[int, ...]:
+    parts = []
+    for p in str(version).split(".")[:3]:
+        digits = "".join(ch for ch in p if ch.isdigit())
+        parts.append(int(digits or 0))
+    return tuple(parts)
+
+
+async def detect_field_ttl_support(client) -> bool:
+    """Enable field TTL for this worker when configured and the server supports HEXPIRE."""
+    global _active
+    _active = False
+
+    if not AppConfig.timeseries_field_ttl:
+        # Writes no longer carry TTLs: forget the switch-over point so a later re-enable drains again
+        await client.delete(FIELD_TTL_SINCE_KEY)
+        return False
+
+    try:
+        info = await client.info("server")
+        if "redis_version" not in info:
+            # Cluster clients answer per node
+            info = next(iter(info.values()), {})
+        version = info.get("redis_version", "0")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read Redis version for field TTL detection: {e}")
+        return False
+
+    if _version_tuple(version) < MIN_REDIS_VERSION:
+        logger.warning(
+            f"⚠️ Field TTL requested but Redis {version} has no HEXPIRE "
+            f"(needs {'.'.join(map(str, MIN_REDIS_VERSION))}+) — using Lua cleanup"
+        )
+        return False
+
+    await client.set(FIELD_TTL_SINCE_KEY, str(int(time.time())), nx=True)
+    _active = True
+    logger.success(f"✅ Timeseries field TTL enabled (Redis {version})")
+    return True
+
+
+def hincrby_bucket(pipe, key: str, bucket: Union[str, int], amount: int, retention_sec: int) -> None:
+    """
+    HINCRBY a minute-bucket field and, in field TTL mode, give it an expiry of bucket + retention.
+    NX keeps the first expiry so repeated increments don't rewrite it.
+    """
+    pipe.hincrby(key, bucket, amount)
+    if _active and retention_sec > 0:
+        pipe.hexpireat(key, int(bucket) + retention_sec, bucket, nx=True)
+
+
+async def lua_cleanup_needed(client, retention_sec: int) -> bool:
+    """
+    Whether the HSCAN/HDEL cleanup still has to run for a family with this retention.
+    Always True without field TTL; with it, only until pre-existing fields have aged out.
+    """
+    if not _active or retention_sec <= 0:
+        return True
+    since: Optional[str] = await client.get(FIELD_TTL_SINCE_KEY)
+    if not since:
+        return True
+    return time.time() < float(since) + retention_sec
@@ -1,39 +1,191 @@
+import asyncio
+import time
 from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
 from typing import Optional
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils.expire_timeseries import is_noscript_error
+from my_redis.utils import cluster_keys
 from utils.logger import logger
 import re
 import pytz
 from server_fastapi import global_state
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_QUERY)
 
-async def aggregate_keys(keys: list, mode: str) -> dict:
+# Aggregation engine knobs
+PIPELINE_MAX_KEYS       = 200     # up to this many keys -> plain pipelined HGETALL
+PIPELINE_CHUNK_SIZE     = 200     # keys per pipeline round trip
+LUA_SUM_CHUNK_SIZE      = 250     # keys per server-side sum script call
+CONCURRENT_CHUNK_SIZE   = 200     # keys per concurrent pipeline
+CONCURRENT_MAX_INFLIGHT = 4       # concurrent pipelines per aggregation (each holds one pool connection)
+
+AGGREGATION_STRATEGIES = ("loop", "pipeline", "lua", "concurrent")
+
+_AGGREGATE_SUM_SHA: Optional[str] = None
+
+# Sums every hash field across KEYS server-side; returns a flat [field, total, ...] array.
+AGGREGATE_SUM_SCRIPT = r"""
+local totals = {}
+local order = {}
+
+for _, key in ipairs(KEYS) do
+    local flat = redis.call('HGETALL', key)
+    for i = 1, #flat, 2 do
+        local field = flat[i]
+        local value = tonumber(flat[i + 1]) or 0
+        if totals[field] == nil then
+            totals[field] = 0
+            table.insert(order, field)
+        end
+        totals[field] = totals[field] + value
+    end
+end
+
+local arr = {}
+for _, field in ipairs(order) do
+    table.insert(arr, field)
+    table.insert(arr, totals[field])
+end
+return arr
+"""
+
+def choose_aggregation_strategy(key_count: int, mode: str) -> str:
+    """
+    Pick the cheapest strategy for the number of keys involved:
+      - few keys: a single pipelined HGETALL batch
+      - "sum" over many keys: server-side Lua sum (only the totals cross the wire)
+      - "grouped"/"surged" over many keys: concurrent pipelined chunks (per-key data is needed)
+    """
+    if key_count <= PIPELINE_MAX_KEYS:
+        return "pipeline"
+    if mode == "sum":
+        return "lua"
+    return "concurrent"
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except Exception:
+        return 0
+
+def _merge_hash(aggregated: dict, key: str, data: dict, mode: str) -> None:
+    """Fold one HGETALL result into the accumulator using the legacy result shape."""
+    if mode == "sum":
+        for field, value in data.items():
+            aggregated[field] = aggregated.get(field, 0) + _to_int(value)
+    elif mode in ["grouped", "surged"]:
+        aggregated[key] = {k: int(v) for k, v in data.items()}
+
+async def _hgetall_pipelined(client, keys: list) -> list:
+    """HGETALL a batch of keys in one round trip (non-transactional pipeline)."""
+    async with client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.hgetall(key)
+        return await pipe.execute()
+
+async def hgetall_many(client, keys: list, chunk_size: int = PIPELINE_CHUNK_SIZE) -> list[tuple[str, dict]]:
+    """
+    Fetch many hashes using bounded pipelines.
+    Returns [(key, hash_data), ...] in the same order as `keys`.
+    """
+    out = []
+    for i in range(0, len(keys), chunk_size):
+        chunk = keys[i:i + chunk_size]
+        results = await _hgetall_pipelined(client, chunk)
+        out.extend(zip(chunk, results))
+    return out
+
+async def _aggregate_loop(client, keys: list, mode: str) -> dict:
+    """Legacy strategy: one HGETALL round trip per key. Kept as the benchmark baseline."""
+    aggregated = {}
+    for key in keys:
+        data = await client.hgetall(key)
+        _merge_hash(aggregated, key, data, mode)
+    return aggregated
+
+async def _aggregate_pipeline(client, keys: list, mode: str) -> dict:
+    aggregated = {}
+    for key, data in await hgetall_many(client, keys, PIPELINE_CHUNK_SIZE):
+        _merge_hash(aggregated, key, data, mode)
+    return aggregated
+
+async def _aggregate_concurrent(client, keys: list, mode: str) -> dict:
+    chunks = [keys[i:i + CONCURRENT_CHUNK_SIZE] for i in range(0, len(keys), CONCURRENT_CHUNK_SIZE)]
+    semaphore = asyncio.Semaphore(CONCURRENT_MAX_INFLIGHT)
+
+    async def _fetch(chunk):
+        async with semaphore:
+            return chunk, await _hgetall_pipelined(client, chunk)
+
+    aggregated = {}
+    for chunk, results in await asyncio.gather(*[_fetch(c) for c in chunks]):
+        for key, data in zip(chunk, results):
+            _merge_hash(aggregated, key, data, mode)
+    return aggregated
+
+async def _ensure_sum_script(client) -> str:
+    global _AGGREGATE_SUM_SHA
+    if not _AGGREGATE_SUM_SHA:
+        _AGGREGATE_SUM_SHA = await client.script_load(AGGREGATE_SUM_SCRIPT)
+        logger.debug(f"🔑 Aggregate sum script loaded with SHA: {_AGGREGATE_SUM_SHA}")
+    return _AGGREGATE_SUM_SHA
+
+async def _aggregate_lua_sum(client, keys: list) -> dict:
+    """Sum all fields server-side, one script call per bounded chunk of keys."""
+    global _AGGREGATE_SUM_SHA
+    aggregated = {}
+    # Chunks never mix hash slots, so the script also runs on Redis Cluster
+    for chunk in cluster_keys.slot_chunks(keys, LUA_SUM_CHUNK_SIZE):
+        sha = await _ensure_sum_script(client)
+        try:
+            raw = await client.evalsha(sha, len(chunk), *chunk)
+        except Exception as e:
+            if not is_noscript_error(e):
+                raise
+            logger.warning("📜 Aggregate sum script missing. Reloading and retrying…")
+            _AGGREGATE_SUM_SHA = None
+            sha = await _ensure_sum_script(client)
+            raw = await client.evalsha(sha, len(chunk), *chunk)
+        for j in range(0, len(raw), 2):
+            field = raw[j]
+            aggregated[field] = aggregated.get(field, 0) + int(raw[j + 1])
+        # Yield between chunks so webhook writes are not starved
+        await asyncio.sleep(0)
+    return aggregated
+
+async def aggregate_keys(keys: list, mode: str, strategy: Optional[str] = None, client=None) -> dict:
     """
     Aggregates hash data from a list of keys.
     For "sum" mode, sums all field values (assuming integer values).
     For "grouped" mode, returns a dictionary mapping each key to its hash data.
+
+    `strategy` forces one of AGGREGATION_STRATEGIES; by default it is chosen from the key count.
     """
-    client = await redis_manager.check_redis_connection()
+    if client is None:
+        client = await redis_manager.get_read_client()
     if not client:
         logger.error("❌ Retrieval pool connection not available")
         return {"mode": mode, "data": {}}
 
-    aggregated = {}
-    for key in keys:
-        data = await client.hgetall(key)
-        logger.debug(f"🔑 Aggregating key: {key} with data: {data}")
-        if mode == "sum":
-            for field, value in data.items():
-                try:
-                    value = int(value)
-                except Exception:
-                    value = 0
-                aggregated[field] = aggregated.get(field, 0) + value
-        elif mode in ["grouped", "surged"]:
-            aggregated[key] = {k: int(v) for k, v in data.items()}
-    logger.debug(f"✅ Mode:{mode} Aggregation complete. Aggregated data: {aggregated}")
+    strategy = strategy or choose_aggregation_strategy(len(keys), mode)
+    if strategy == "lua" and mode != "sum":
+        strategy = "concurrent"
+
+    started = time.monotonic()
+    if strategy == "loop":
+        aggregated = await _aggregate_loop(client, keys, mode)
+    elif strategy == "lua":
+        aggregated = await _aggregate_lua_sum(client, keys)
+    elif strategy == "concurrent":
+        aggregated = await _aggregate_concurrent(client, keys, mode)
+    else:
+        aggregated = await _aggregate_pipeline(client, keys, mode)
+
+    logger.debug(
+        f"✅ Mode:{mode} Aggregation complete via {strategy}: {len(keys)} keys -> "
+        f"{len(aggregated)} entries in {time.monotonic() - started:.3f}s"
+    )
     return aggregated
 
 def filter_keys_by_time(keys: list, time_format: str, start: datetime, end: datetime, component_index: int = -1) -> list:
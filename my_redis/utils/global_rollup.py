@@ -0,0 +1,61 @@
+"""
+Global rollup keys (GLOBAL_ROLLUP in config.json).
+
+When enabled, ingest writes every event a second time under the area GLOBAL_AREA, in the same
+pipeline as the per-area writes:
+
+  counter:pokemon_hourly:Lisbon:2025010112   +   counter:pokemon_hourly:__all__:2025010112
+  ts:raids_total:total:Lisbon:150:5:0        +   ts:raids_total:total:__all__:150:5:0
+
+A global query then reads one key set instead of one per geofence. `families` limits the
+extra writes to the families that are actually queried globally.
+
+Buckets are filled with each event's own (area-shifted) time, the same way the per-area keys
+are, so __all__ hour/day buckets mix the local hours of areas in different timezones.
+The keys only hold data written since the rollup was enabled for a family.
+"""
+
+import config as AppConfig
+from my_redis.utils.cluster_keys import area_tag
+from server_fastapi import global_state
+
+GLOBAL_AREA = "__all__"
+
+FAMILIES = ("pokemon", "pokemon_tth", "pokemon_weather", "raids", "invasions", "quests")
+
+
+def global_rollup_enabled(family: str) -> bool:
+    return AppConfig.global_rollup_enabled and family in AppConfig.global_rollup_families
+
+
+def min_area_offset() -> int:
+    """
+    Offset (hours) of the geofence furthest behind UTC. A bucket that mixes the shifted times of
+    every area is only closed once this area has left it too.
+    """
+    return min((g.get("offset", 0) for g in global_state.geofences or []), default=0)
+
+
+def as_global(data: dict) -> dict:
+    """Copy of a filtered webhook event that the writers store under the global area."""
+    return {**data, "area_name": GLOBAL_AREA}
+
+
+def is_global_area(area: str) -> bool:
+    return (area or "").strip() == GLOBAL_AREA
+
+
+def area_glob(area: str, family: str) -> str:
+    """
+    Area component of a retrieval SCAN pattern. "global"/"all" reads the rollup keys when the
+    family has them and every per-area key otherwise (which then must skip the rollup keys).
+    """
+    if area.lower() in ["global", "all"]:
+        return area_tag(GLOBAL_AREA) if global_rollup_enabled(family) else "*"
+    return area_tag(area)
+
+
+def drop_global_keys(keys: list) -> list:
+    """Remove __all__ keys from a wildcard match, so summing it over areas doesn't count events twice."""
+    names = {GLOBAL_AREA, area_tag(GLOBAL_AREA)}
+    return [k for k in keys if names.isdisjoint(k.split(":"))]
@@ -0,0 +1,132 @@
+"""
+Hour-of-day histograms for surged counter queries (HOUR_HISTOGRAMS in config.json).
+
+Every HINCRBY on an hourly counter key is mirrored into one hash per area and day, with the
+hour of day in front of the field:
+  counter:raid_hourly:Lisbon:2025010118   {"150:5:0:0:0:0:total": 3}
+  hod:raid:Lisbon:20250101                {"18:150:5:0:0:0:0:total": 3}
+
+A surged query (counts per hour of day over a range) then reads one hash per whole day of the
+range instead of SCANning and reading 24 hourly keys per day. Partial days at the edges of the
+range, and days from before the histograms were switched on (HISTOGRAMS_SINCE_KEY), are read from
+the hourly keys by name. Histogram days expire with the hourly retention of their family.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import config as AppConfig
+from my_redis.utils import global_rollup
+from my_redis.utils.cluster_keys import area_tag
+from server_fastapi import global_state
+from utils.logger import logger
+
+HISTOGRAMS_SINCE_KEY = "hod:since"
+HOUR_FORMAT = "%Y%m%d%H"
+DAY_FORMAT = "%Y%m%d"
+
+# family -> (hourly counter prefix, GLOBAL_ROLLUP family, hourly retention config attribute)
+FAMILIES: Dict[str, tuple[str, str, str]] = {
+    "pokemon":     ("counter:pokemon_hourly",     "pokemon",     "counter_pokemon_hourly_retention_hours"),
+    "tth_pokemon": ("counter:tth_pokemon_hourly", "pokemon_tth", "counter_tth_pokemon_hourly_retention_hours"),
+    "raid":        ("counter:raid_hourly",        "raids",       "counter_raid_hourly_retention_hours"),
+    "invasion":    ("counter:invasion_hourly",    "invasions",   "counter_invasion_hourly_retention_hours"),
+    "quest":       ("counter:quest_hourly",       "quests",      "counter_quest_hourly_retention_hours"),
+}
+
+
+def histograms_enabled() -> bool:
+    return AppConfig.hour_histograms_enabled
+
+
+def histogram_key(family: str, area: str, day: str) -> str:
+    return f"hod:{family}:{area_tag(area)}:{day}"
+
+
+def hincrby_hourly(pipe, hourly_key: str, field: str, amount: int, expire: bool = True) -> None:
+    """
+    HINCRBY an hourly counter field (counter:{family}_hourly:{area}:{YYYYMMDDHH}) and, with
+    histograms on, the same field under its hour in the area's day histogram.
+    A writer that increments several fields of one key per event sets expire only on one of them,
+    so the histogram's EXPIREAT is queued once per event.
+    """
+    pipe.hincrby(hourly_key, field, amount)
+    if not AppConfig.hour_histograms_enabled:
+        return
+
+    _, prefix, area, date_hour = hourly_key.split(":")
+    family = prefix[:-len("_hourly")]
+    key = f"hod:{family}:{area}:{date_hour[:8]}"
+    pipe.hincrby(key, f"{date_hour[8:]}:{field}", amount)
+
+    retention_hours = getattr(AppConfig, FAMILIES[family][2], 0)
+    if expire and retention_hours:
+        day_end = datetime.strptime(date_hour[:8], DAY_FORMAT) + timedelta(days=1)
+        pipe.expireat(key, int(day_end.timestamp()) + retention_hours * 3600)
+
+
+async def init_hour_histograms(client) -> None:
+    """Remember when the histograms were switched on (forget it when off, so a re-enable starts over)."""
+    if AppConfig.hour_histograms_enabled:
+        await client.set(HISTOGRAMS_SINCE_KEY, str(int(time.time())), nx=True)
+    else:
+        await client.delete(HISTOGRAMS_SINCE_KEY)
+
+
+def _areas(family: str, area: str) -> list[str]:
+    if area.lower() in ["global", "all"]:
+        if global_rollup.global_rollup_enabled(FAMILIES[family][1]):
+            return [global_rollup.GLOBAL_AREA]
+        return [g["name"] for g in (global_state.geofences or [])]
+    return [area]
+
+
+async def aggregate_surged(client, family: str, area: str, start: datetime, end: datetime) -> dict:
+    """
+    Hourly counter fields from start (inclusive) to end (exclusive), summed per hour of day:
+    {"counter:{family}_hourly:{area}:{HH}": {field: count}}, the shape the surged transforms take.
+    """
+    since: Optional[str] = await client.get(HISTOGRAMS_SINCE_KEY)
+    # Days are area-local, so the first day surely complete is the second one after the switch
+    first_full_day = None
+    if since:
+        first_full_day = datetime.fromtimestamp(float(since) + 2 * 86400).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    prefix = FAMILIES[family][0]
+    first_hour = start.replace(minute=0, second=0, microsecond=0)
+    if first_hour < start:
+        first_hour += timedelta(hours=1)
+
+    reads = []  # (key, is histogram)
+    for name in _areas(family, area):
+        day = first_hour.replace(hour=0)
+        while day < end:
+            whole_day = first_hour <= day and day + timedelta(hours=23) < end
+            if whole_day and first_full_day and day >= first_full_day:
+                reads.append((histogram_key(family, name, day.strftime(DAY_FORMAT)), True))
+            else:
+                hour = max(day, first_hour)
+                while hour < end and hour < day + timedelta(days=1):
+                    reads.append((f"{prefix}:{area_tag(name)}:{hour.strftime(HOUR_FORMAT)}", False))
+                    hour += timedelta(hours=1)
+            day += timedelta(days=1)
+
+    async with client.pipeline(transaction=False) as pipe:
+        for key, _ in reads:
+            pipe.hgetall(key)
+        results = await pipe.execute()
+
+    surged: Dict[str, dict] = {}
+    for (key, is_histogram), data in zip(reads, results):
+        for field, value in (data or {}).items():
+            if is_histogram:
+                hour, field = field.split(":", 1)
+            else:
+                hour = key[-2:]
+            bucket = surged.setdefault(f"{prefix}:{area_tag(area)}:{hour}", {})
+            bucket[field] = bucket.get(field, 0) + int(value)
+
+    logger.debug(f"📊 Surged {family} from {sum(h for _, h in reads)} day histograms and "
+                 f"{sum(not h for _, h in reads)} hourly keys")
+    return surged
@@ -0,0 +1,68 @@
+"""
+Live counter stream (LIVE_STREAM in config.json).
+
+Ingest appends one entry per event to the Redis stream live:events, queued in the pipeline that
+already writes the event's counters, so it costs no extra round trip:
+
+  XADD live:events MAXLEN ~ {max_len} * f pokemon a Lisbon t 202501061342 m total,iv100,shiny
+
+t is the minute of the event in the time basis of the counter keys, m the metrics the event adds
+one to: the sum-mode metrics of the counter endpoints (raid levels, quest modes and invasion
+confirmation as "raid_level:5", "quest_mode:ar", "confirmed:1"). The API workers read the stream
+and push the per-minute deltas to their subscribers (server_fastapi/utils/live_feed.py).
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import config as AppConfig
+
+STREAM_KEY = "live:events"
+MINUTE_FORMAT = "%Y%m%d%H%M"
+
+
+def _pokemon_metrics(data: dict) -> List[str]:
+    metrics = ["total"]
+    if data.get("iv") == 100:
+        metrics.append("iv100")
+    if data.get("iv") == 0:
+        metrics.append("iv0")
+    for league in ("little", "great", "ultra"):
+        rank = data.get(f"pvp_{league}_rank")
+        if rank and 1 in rank:
+            metrics.append(f"pvp_{league}")
+    if data.get("shiny"):
+        metrics.append("shiny")
+    return metrics
+
+
+# family -> (timestamp field, metrics of the event)
+FAMILIES: Dict[str, tuple[str, Callable[[dict], List[str]]]] = {
+    "pokemon":   ("first_seen",          _pokemon_metrics),
+    "raids":     ("raid_start",          lambda d: ["total", f"raid_level:{d['raid_level']}"]),
+    "invasions": ("invasion_first_seen", lambda d: ["total", f"confirmed:{int(bool(d['invasion_confirmed']))}"]),
+    "quests":    ("first_seen",          lambda d: ["total", f"quest_mode:{'ar' if d.get('ar_type') is not None else 'normal'}"]),
+}
+
+
+async def add_live_event(family: str, data: dict, pipe) -> None:
+    """Queue the XADD of the event's metrics to the live stream."""
+    if not AppConfig.live_stream_enabled:
+        return
+    ts_field, metrics = FAMILIES[family]
+    pipe.xadd(
+        STREAM_KEY,
+        {
+            "f": family,
+            "a": data.get("area_name"),
+            "t": datetime.fromtimestamp(data[ts_field]).strftime(MINUTE_FORMAT),
+            "m": ",".join(metrics(data)),
+        },
+        maxlen=AppConfig.live_stream_max_len,
+        approximate=True,
+    )
+
+
+def parse_entry(fields: dict) -> tuple[str, str, str, List[str]]:
+    """(family, area, minute, metrics) of a stream entry."""
+    return fields.get("f"), fields.get("a"), fields.get("t"), [m for m in fields.get("m", "").split(",") if m]
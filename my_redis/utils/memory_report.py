@@ -0,0 +1,344 @@
+"""
+Redis memory accounting per key family and area (MEMORY_REPORT in config.json).
+
+The leader SCANs the whole keyspace, counts keys per family (ts:pokemon, counter:pokemon_hourly,
+buffer:raid_events, ...) and area, and runs MEMORY USAGE / HLEN on a random sample of each
+(family, area) group. Sizes are extrapolated from the sample:
+
+  estimated_bytes = avg sampled key size * key count
+
+Growth is measured against the oldest report kept in REPORT_HISTORY_KEY. The projection at
+retention scales the current size by retention / covered time, where the covered time comes
+from the key-name periods (counter hourly/daily keys) or the oldest minute bucket of the
+busiest sampled hashes (ts:* keys). Families that already hold a full retention window are
+projected at their current size.
+
+The latest report is stored as JSON in REPORT_KEY and served by /api/redis/memory_report.
+"""
+
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from typing import Optional
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager
+from my_redis.utils import cluster_keys, timeseries_tiers
+from my_redis.utils.expire_timeseries import (
+    get_retention_mapping,
+    get_counter_hourly_retention_mapping,
+    get_counter_daily_retention_mapping,
+)
+from utils.logger import logger
+
+REPORT_KEY = "memory:report:latest"
+REPORT_HISTORY_KEY = "memory:report:history"
+
+GLOBAL_AREA = "-"
+
+# Area position in the key name (split on ":") per family; other ts:/counter: families use the default
+AREA_INDEX = {"ts:tth_pokemon": 2, "ts_15m:tth_pokemon": 2, "ts_1h:tth_pokemon": 2}
+DEFAULT_AREA_INDEX = {"ts": 3, "ts_15m": 3, "ts_1h": 3, "counter": 2, "window": 2, "hll": 2, "topk": 2, "hod": 2}
+
+# ts:* (and tier) hashes per family whose minute buckets are read to find the covered time
+SPAN_SAMPLE_KEYS = 5
+
+
+def classify_key(key: str) -> tuple[str, str]:
+    """(family, area) for a key name. Keys without an area component report GLOBAL_AREA."""
+    parts = key.split(":")
+    if len(parts) < 2:
+        return parts[0], GLOBAL_AREA
+
+    family = f"{parts[0]}:{parts[1]}"
+    idx = AREA_INDEX.get(family, DEFAULT_AREA_INDEX.get(parts[0]))
+    if idx is None or len(parts) <= idx or family in ("counter:rollup", "window:counters"):
+        return family, GLOBAL_AREA
+    return family, cluster_keys.untag(parts[idx])
+
+
+def get_family_retention_seconds() -> dict[str, int]:
+    """Configured retention per family in seconds (0 = kept forever), from the cleanup mappings."""
+    retention = {}
+    for pattern, seconds in get_retention_mapping().items():
+        retention[pattern.rstrip(":*")] = seconds
+    retention["ts:pokemon_packed"] = retention.get("ts:pokemon", 0)
+    for pattern, seconds in timeseries_tiers.get_tier_retention_mapping().items():
+        retention[pattern.rstrip(":*")] = seconds
+    for pattern, hours in get_counter_hourly_retention_mapping().items():
+        retention[pattern.rstrip(":*")] = hours * 3600
+    for pattern, days in get_counter_daily_retention_mapping().items():
+        retention[pattern.rstrip(":*")] = days * 86400
+    return retention
+
+
+class _Group:
+    """Key count plus a reservoir sample of key names for one (family, area)."""
+    __slots__ = ("keys", "sample", "periods")
+
+    def __init__(self):
+        self.keys = 0
+        self.sample: list[str] = []
+        self.periods: set[str] = set()
+
+    def add(self, key: str, sample_size: int):
+        self.keys += 1
+        if len(self.sample) < sample_size:
+            self.sample.append(key)
+        else:
+            j = random.randrange(self.keys)
+            if j < sample_size:
+                self.sample[j] = key
+
+
+def _period_suffix(family: str, key: str) -> Optional[str]:
+    """YYYYMMDDHH / YYYYMMDD suffix of counter hourly/daily and packed day keys, None for other families."""
+    if family != "ts:pokemon_packed" and (not family.startswith("counter:") or not family.endswith(("_hourly", "_daily"))):
+        return None
+    suffix = key.rsplit(":", 1)[-1]
+    return suffix if suffix.isdigit() else None
+
+
+async def _info_memory(client) -> dict:
+    info = await client.info("memory")
+    if "used_memory" in info:
+        return {"used_memory": int(info["used_memory"]), "maxmemory": int(info.get("maxmemory", 0))}
+    # Cluster clients answer per node
+    nodes = [v for v in info.values() if isinstance(v, dict)]
+    return {
+        "used_memory": sum(int(n.get("used_memory", 0)) for n in nodes),
+        "maxmemory": sum(int(n.get("maxmemory", 0)) for n in nodes),
+    }
+
+
+async def _sample_sizes(client, keys: list[str]) -> dict[str, tuple[int, Optional[int]]]:
+    """MEMORY USAGE and HLEN (None for non-hash keys) for the sampled keys."""
+    sizes = {}
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        async with client.pipeline(transaction=False) as pipe:
+            for key in chunk:
+                pipe.memory_usage(key, samples=5)
+                pipe.hlen(key)
+            results = await pipe.execute(raise_on_error=False)
+        for j, key in enumerate(chunk):
+            mem, hlen = results[2 * j], results[2 * j + 1]
+            if isinstance(mem, Exception) or mem is None:
+                continue  # expired between SCAN and sampling
+            sizes[key] = (int(mem), None if isinstance(hlen, Exception) else int(hlen))
+    return sizes
+
+
+async def _oldest_bucket(client, keys: list[str]) -> Optional[int]:
+    """Oldest minute-bucket field across a few ts:* hashes."""
+    oldest = None
+    async with client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.hkeys(key)
+        results = await pipe.execute(raise_on_error=False)
+    for fields in results:
+        if isinstance(fields, Exception):
+            continue
+        for f in fields:
+            if f.isdigit() and (oldest is None or int(f) < oldest):
+                oldest = int(f)
+    return oldest
+
+
+def _growth_per_hour(current: int, previous: Optional[int], hours: float) -> Optional[float]:
+    if previous is None or hours <= 0:
+        return None
+    return round((current - previous) / hours, 1)
+
+
+async def build_memory_report(client, sample_size: int = None, scan_count: int = None) -> dict:
+    """Scan the keyspace, sample key sizes and build the per family / per area report."""
+    sample_size = sample_size or AppConfig.memory_report_samples_per_group
+    scan_count = scan_count or AppConfig.memory_report_scan_count
+    started = time.time()
+
+    groups: dict[tuple[str, str], _Group] = {}
+    total_keys = 0
+    async for key in client.scan_iter(count=scan_count):
+        key = key.decode() if isinstance(key, bytes) else key
+        family, area = classify_key(key)
+        group = groups.get((family, area))
+        if group is None:
+            group = groups[(family, area)] = _Group()
+        group.add(key, sample_size)
+        period = _period_suffix(family, key)
+        if period:
+            group.periods.add(period)
+        total_keys += 1
+        if total_keys % 100_000 == 0:
+            await asyncio.sleep(0)
+
+    sampled = [k for g in groups.values() for k in g.sample]
+    sizes = await _sample_sizes(client, sampled)
+
+    retention = get_family_retention_seconds()
+    families: dict[str, dict] = {}
+    areas: dict[str, dict] = {}
+    family_periods: dict[str, set] = {}
+    family_hashes: dict[str, list[tuple[int, str]]] = {}
+
+    for (family, area), group in groups.items():
+        stats = [sizes[k] for k in group.sample if k in sizes]
+        avg_bytes = sum(s[0] for s in stats) / len(stats) if stats else 0
+        hlens = [s[1] for s in stats if s[1] is not None]
+        estimated = int(avg_bytes * group.keys)
+
+        areas.setdefault(family, {})[area] = {
+            "keys": group.keys,
+            "sampled": len(stats),
+            "estimated_bytes": estimated,
+            "avg_fields": round(sum(hlens) / len(hlens), 1) if hlens else None,
+        }
+
+        fam = families.setdefault(family, {"keys": 0, "sampled": 0, "estimated_bytes": 0, "_fields": []})
+        fam["keys"] += group.keys
+        fam["sampled"] += len(stats)
+        fam["estimated_bytes"] += estimated
+        fam["_fields"].extend(hlens)
+        family_periods.setdefault(family, set()).update(group.periods)
+        if family.startswith(("ts:", "ts_15m:", "ts_1h:")):
+            family_hashes.setdefault(family, []).extend(
+                (sizes[k][1], k) for k in group.sample if k in sizes and sizes[k][1] is not None
+            )
+
+    now = int(time.time())
+    for family, fam in families.items():
+        fields = fam.pop("_fields")
+        fam["avg_key_bytes"] = int(fam["estimated_bytes"] / fam["keys"]) if fam["keys"] else 0
+        fam["avg_fields"] = round(sum(fields) / len(fields), 1) if fields else None
+
+        retention_sec = retention.get(family)
+        covered_sec = None
+        if family_periods.get(family):
+            unit = 3600 if family.endswith("_hourly") else 86400
+            covered_sec = len(family_periods[family]) * unit
+        elif family in family_hashes:
+            busiest = [k for _, k in sorted(family_hashes[family], reverse=True)[:SPAN_SAMPLE_KEYS]]
+            oldest = await _oldest_bucket(client, busiest)
+            if oldest is not None:
+                covered_sec = max(now - oldest, 60)
+
+        fam["retention_seconds"] = retention_sec
+        fam["covered_seconds"] = covered_sec
+        if retention_sec and covered_sec:
+            scale = max(retention_sec / covered_sec, 1.0)
+            fam["projected_bytes_at_retention"] = int(fam["estimated_bytes"] * scale)
+        else:
+            fam["projected_bytes_at_retention"] = None
+
+    return {
+        "generated_at": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "timestamp": int(started),
+        "duration_seconds": round(time.time() - started, 2),
+        **await _info_memory(client),
+        "total_keys": total_keys,
+        "sampled_keys": len(sizes),
+        "estimated_bytes": sum(f["estimated_bytes"] for f in families.values()),
+        "families": dict(sorted(families.items(), key=lambda kv: kv[1]["estimated_bytes"], reverse=True)),
+        "areas": areas,
+    }
+
+
+def _add_growth(report: dict, previous: Optional[dict]) -> None:
+    """Fill growth_bytes_per_hour per family and area from an older history snapshot."""
+    hours = (report["timestamp"] - previous["timestamp"]) / 3600 if previous else 0
+    prev_fam = previous.get("families", {}) if previous else {}
+    prev_area = previous.get("areas", {}) if previous else {}
+
+    for family, fam in report["families"].items():
+        fam["growth_bytes_per_hour"] = _growth_per_hour(fam["estimated_bytes"], prev_fam.get(family), hours)
+    for family, by_area in report["areas"].items():
+        for area, stats in by_area.items():
+            stats["growth_bytes_per_hour"] = _growth_per_hour(
+                stats["estimated_bytes"], prev_area.get(f"{family}|{area}"), hours
+            )
+
+
+def _snapshot(report: dict) -> dict:
+    return {
+        "timestamp": report["timestamp"],
+        "families": {f: v["estimated_bytes"] for f, v in report["families"].items()},
+        "areas": {
+            f"{family}|{area}": v["estimated_bytes"]
+            for family, by_area in report["areas"].items()
+            for area, v in by_area.items()
+        },
+    }
+
+
+async def run_memory_report_once(client) -> dict:
+    report = await build_memory_report(client)
+
+    oldest = await client.lindex(REPORT_HISTORY_KEY, -1)
+    _add_growth(report, json.loads(oldest) if oldest else None)
+
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.set(REPORT_KEY, json.dumps(report))
+        pipe.lpush(REPORT_HISTORY_KEY, json.dumps(_snapshot(report)))
+        pipe.ltrim(REPORT_HISTORY_KEY, 0, max(AppConfig.memory_report_history - 1, 0))
+        await pipe.execute()
+
+    logger.success(
+        f"📦 Memory report: {report['total_keys']} keys, ~{report['estimated_bytes'] / 1024**2:.1f} MiB "
+        f"in {len(report['families'])} families (used_memory {report['used_memory'] / 1024**2:.1f} MiB) "
+        f"in {report['duration_seconds']:.1f}s"
+    )
+    return report
+
+
+async def get_memory_report(client) -> Optional[dict]:
+    raw = await client.get(REPORT_KEY)
+    return json.loads(raw) if raw else None
+
+
+class MemoryReportService:
+    def __init__(self, redis_manager: RedisManager, interval: int = 3600):
+        self._redis_manager = redis_manager
+        self._interval      = interval
+        self._running       = False
+        self._task: asyncio.Task | None = None
+
+    async def _report_loop(self) -> None:
+        self._running = True
+        logger.info(f"⏳ Memory report service started — interval: {self._interval}s")
+
+        while self._running:
+            try:
+                client = await self._redis_manager.check_redis_connection()
+                if not client:
+                    logger.warning("⚠️ Memory report: connection unavailable, skipping cycle")
+                else:
+                    await run_memory_report_once(client)
+            except asyncio.CancelledError:
+                logger.info("🛑 Memory report loop cancelled")
+                break
+            except Exception as e:
+                logger.error(f"❌ Memory report cycle failed: {e}")
+
+            await asyncio.sleep(self._interval)
+
+    async def start(self) -> None:
+        if self._running:
+            logger.warning("⚠️ Memory report service already running")
+            return
+        self._task = asyncio.create_task(self._report_loop())
+        logger.info("🚀 Started memory report service")
+
+    async def stop(self) -> None:
+        if not self._running:
+            logger.warning("⚠️ Memory report service already stopped")
+            return
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -19,6 +19,7 @@ import json
 from datetime import datetime, timedelta, timezone
 import config as AppConfig
 from utils.logger import logger
+from my_redis.utils import cluster_keys
 from sql.connect_db import execute, executemany, fetch_all, fetch_val
 
 # ── Key patterns to back up ───────────────────────────────────────────────────
@@ -42,13 +43,7 @@ async def _scan_keys(client, patterns: list[str]) -> list[str]:
     """SCAN Redis for all keys matching any of the given glob patterns."""
     found: list[str] = []
     for pattern in patterns:
-        cursor = 0
-        while True:
-            cursor, keys = await client.scan(cursor, match=pattern, count=500)
-            for k in keys:
-                found.append(k.decode() if isinstance(k, bytes) else k)
-            if cursor == 0:
-                break
+        found.extend(await cluster_keys.scan_keys(client, pattern, 500))
     return found
 
 
@@ -0,0 +1,72 @@
+"""
+Binary-packed minute timeseries (IN-MEMORY.pokemon_timeseries_storage = "packed").
+
+Each (metric, area, entity, form, UTC day) series is one Redis string holding 1440 unsigned
+16-bit big-endian slots, one per minute:
+
+  ts:pokemon_packed:total:Lisbon:25:0:20250101   -> slot i = minute i of the day (UTC)
+
+Writes are BITFIELD INCRBY u16 #slot (saturating), reads are GETRANGE over the wanted slots,
+decoded with NumPy. Keys carry a whole-key EXPIREAT of day end + retention, so the periodic
+HSCAN/HDEL cleanup is not needed for them.
+
+Strings are allocated up to the highest slot written, so a series costs at most
+SLOTS_PER_DAY * SLOT_BYTES bytes per day regardless of how many minutes have events.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+from redis.client import NEVER_DECODE
+
+SLOTS_PER_DAY = 1440
+SLOT_TYPE = "u16"
+SLOT_BYTES = 2
+SLOT_DTYPE = np.dtype(">u2")  # BITFIELD uN is big-endian, MSB first
+
+
+def day_and_slot(bucket: int) -> tuple[str, int]:
+    """UTC day (YYYYMMDD) and minute slot for an epoch-seconds bucket."""
+    bucket = int(bucket)
+    day = datetime.fromtimestamp(bucket, timezone.utc).strftime("%Y%m%d")
+    return day, (bucket % 86400) // 60
+
+
+def day_start(day: str) -> int:
+    """Epoch seconds of 00:00 UTC for a YYYYMMDD day."""
+    return int(datetime.strptime(day, "%Y%m%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def incr_slot(pipe, key: str, slot: int, amount: int, expire_at: Optional[int]) -> None:
+    """Queue a saturating BITFIELD INCRBY on one minute slot (+ whole-key expiry)."""
+    pipe.execute_command("BITFIELD", key, "OVERFLOW", "SAT", "INCRBY", SLOT_TYPE, f"#{slot}", amount)
+    if expire_at:
+        pipe.expireat(key, expire_at)
+
+
+def slot_range(day: str, start_ts: int, end_ts: int) -> tuple[int, int]:
+    """[lo, hi) slots of a day whose minute bucket ts satisfies start_ts <= ts < end_ts."""
+    d0 = day_start(day)
+    lo = max(0, -(-(start_ts - d0) // 60))
+    hi = min(SLOTS_PER_DAY, -(-(end_ts - d0) // 60))
+    return lo, hi
+
+
+def queue_getrange(pipe, key: str, lo: int, hi: int) -> None:
+    """Queue a raw (undecoded) GETRANGE for slots [lo, hi). Needs a transaction=False pipeline."""
+    pipe.execute_command("GETRANGE", key, lo * SLOT_BYTES, hi * SLOT_BYTES - 1, **{NEVER_DECODE: []})
+
+
+def decode_slots(raw: Optional[bytes]) -> np.ndarray:
+    """Decode a GETRANGE payload into an int64 array of per-minute counts."""
+    if not raw:
+        return np.zeros(0, dtype=np.int64)
+    usable = len(raw) - (len(raw) % SLOT_BYTES)
+    return np.frombuffer(raw[:usable], dtype=SLOT_DTYPE).astype(np.int64)
+
+
+def hourly_sums(counts: np.ndarray, first_slot: int) -> np.ndarray:
+    """Per UTC hour sums (length 24) for counts starting at first_slot."""
+    hours = (np.arange(first_slot, first_slot + len(counts)) // 60)
+    return np.bincount(hours, weights=counts, minlength=24).astype(np.int64)
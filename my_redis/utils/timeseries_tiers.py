@@ -0,0 +1,340 @@
+"""
+Multi-resolution tiers for the ts:* minute-bucket hashes (TIMESERIES_TIERS in config.json).
+
+  tier  prefix   bucket   kept for
+  1m    ts       60s      retention_hours.timeseries_*   (written at ingest)
+  15m   ts_15m   900s     TIMESERIES_TIERS.tier_15m_retention_days
+  1h    ts_1h    3600s    TIMESERIES_TIERS.tier_1h_retention_weeks
+
+The coarse tiers mirror the minute key names with another prefix, e.g.
+  ts:raids_total:total:Lisbon:150:5:0  ->  ts_1h:raids_total:total:Lisbon:150:5:0
+so the retrieval Lua scripts read them unchanged.
+
+The leader compacts closed buckets (1m -> 15m -> 1h) with HSET of the bucket sum, so a pass that
+is interrupted and repeated does not double count. WATERMARK_KEY records, per family and tier,
+the first compacted bucket ("since") and the end of the compacted range ("upto"). Minute buckets
+are filled with each area's shifted time, so a bucket is closed once the area furthest behind UTC
+(global_rollup.min_area_offset()) has left it.
+
+plan_segments() splits a query range into consecutive segments and serves each from the
+coarsest tier that holds it at full resolution; the rest comes from finer tiers. With the
+feature off it returns the whole range on the minute tier.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager
+from my_redis.utils import cluster_keys, global_rollup
+from utils.logger import logger
+
+WATERMARK_KEY = "ts_tiers:watermark"
+LOCK_KEY = "ts_tiers:lock"
+LOCK_TTL_SEC = 3600
+
+SCAN_COUNT = 1000
+CHUNK_SIZE = 200
+CHUNK_SLEEP = 0.05
+
+
+@dataclass(frozen=True)
+class Tier:
+    name: str
+    prefix: str
+    resolution: int
+
+
+@dataclass(frozen=True)
+class Segment:
+    prefix: str
+    start: int
+    end: int
+
+
+TIER_1M = Tier("1m", "ts", 60)
+TIER_15M = Tier("15m", "ts_15m", 900)
+TIER_1H = Tier("1h", "ts_1h", 3600)
+TIERS = [TIER_1M, TIER_15M, TIER_1H]  # fine -> coarse; each tier compacts from the previous one
+
+# family (second key component) -> minute-tier retention in ms
+FAMILIES = {
+    "pokemon":      lambda: AppConfig.timeseries_pokemon_retention_ms,
+    "tth_pokemon":  lambda: AppConfig.tth_timeseries_retention_ms,
+    "raids_total":  lambda: AppConfig.raid_timeseries_retention_ms,
+    "invasion":     lambda: AppConfig.invasion_timeseries_retention_ms,
+    "quests_total": lambda: AppConfig.quests_timeseries_retention_ms,
+}
+
+# Sum closed minute (or 15 minute) buckets of each source hash into the coarse bucket of the target hash.
+# KEYS = n source keys followed by their n target keys; ARGV = from_ts, to_ts, resolution
+COMPACT_SCRIPT = """
+local from_ts = tonumber(ARGV[1])
+local to_ts = tonumber(ARGV[2])
+local res = tonumber(ARGV[3])
+local n = #KEYS / 2
+local written = 0
+
+for k = 1, n do
+    local data = redis.call('HGETALL', KEYS[k])
+    local buckets = {}
+    for i = 1, #data, 2 do
+        local ts = tonumber(data[i])
+        local count = tonumber(data[i+1])
+        if ts and count and ts >= from_ts and ts < to_ts then
+            local b = ts - (ts % res)
+            buckets[b] = (buckets[b] or 0) + count
+        end
+    end
+    for b, count in pairs(buckets) do
+        redis.call('HSET', KEYS[n + k], string.format('%d', b), count)
+        written = written + 1
+    end
+end
+
+return written
+"""
+
+_COMPACT_SHA: Optional[str] = None
+
+
+def tiers_enabled() -> bool:
+    return AppConfig.timeseries_tiers_enabled
+
+
+def tier_retention_seconds(tier: Tier, family: str) -> int:
+    if tier is TIER_1M:
+        return FAMILIES[family]() // 1000
+    if tier is TIER_15M:
+        return AppConfig.timeseries_tier_15m_retention_days * 86400
+    return AppConfig.timeseries_tier_1h_retention_weeks * 7 * 86400
+
+
+def get_tier_retention_mapping() -> dict[str, int]:
+    """Cleanup patterns for the coarse tiers (seconds), in the same shape as get_retention_mapping()."""
+    mapping = {}
+    for tier in TIERS[1:]:
+        for family in FAMILIES:
+            retention = tier_retention_seconds(tier, family)
+            if retention > 0:
+                mapping[f"{tier.prefix}:{family}:*"] = retention
+    return mapping
+
+
+def _align_down(ts: int, res: int) -> int:
+    return ts - (ts % res)
+
+
+def _align_up(ts: int, res: int) -> int:
+    return -(-ts // res) * res
+
+
+async def get_watermarks(client, family: str) -> dict[str, tuple[int, int]]:
+    """tier name -> (since, upto) for the coarse tiers that have been compacted."""
+    raw = await client.hgetall(WATERMARK_KEY) or {}
+    marks = {}
+    for tier in TIERS[1:]:
+        since = raw.get(f"{family}:{tier.name}:since")
+        upto = raw.get(f"{family}:{tier.name}:upto")
+        if since and upto:
+            marks[tier.name] = (int(since), int(upto))
+    return marks
+
+
+async def plan_segments(client, family: str, start_ts: int, end_ts: int) -> list[Segment]:
+    """
+    Split [start_ts, end_ts) into consecutive segments, each read from the coarsest tier that has it.
+    Coarse tiers are only used for whole buckets inside their compacted and retained range.
+    """
+    if not tiers_enabled() or end_ts <= start_ts:
+        return [Segment(TIER_1M.prefix, start_ts, end_ts)]
+
+    now = int(time.time())
+    marks = await get_watermarks(client, family)
+
+    # tier -> [oldest, upto) range it can answer
+    available: dict[str, tuple[int, int]] = {
+        TIER_1M.name: (now - tier_retention_seconds(TIER_1M, family), end_ts),
+    }
+    for tier in TIERS[1:]:
+        if tier.name in marks:
+            since, upto = marks[tier.name]
+            oldest = max(since, _align_up(now - tier_retention_seconds(tier, family), tier.resolution))
+            if oldest < upto:
+                available[tier.name] = (oldest, upto)
+
+    if len(available) == 1:
+        return [Segment(TIER_1M.prefix, start_ts, end_ts)]
+
+    segments: list[Segment] = []
+    cursor = start_ts
+    while cursor < end_ts:
+        chosen = None
+        seg_end = end_ts
+
+        # Coarsest tier that can answer whole buckets from here on
+        for tier in reversed(TIERS[1:]):
+            if tier.name not in available:
+                continue
+            oldest, upto = available[tier.name]
+            last = min(upto, _align_down(end_ts, tier.resolution))
+            if cursor % tier.resolution == 0 and oldest <= cursor < last:
+                chosen, seg_end = tier, last
+                break
+
+        if chosen is None:
+            # Finest tier holding data at the cursor, until a coarser tier can take over
+            holding = [t for t in TIERS if t.name in available
+                       and available[t.name][0] <= cursor < available[t.name][1]]
+            if not holding:
+                later = [available[t.name][0] for t in TIERS if t.name in available and available[t.name][0] > cursor]
+                if not later:
+                    break
+                cursor = min(min(later), end_ts)
+                continue
+
+            chosen = holding[0]
+            seg_end = min(end_ts, available[chosen.name][1])
+            for tier in TIERS[TIERS.index(chosen) + 1:]:
+                if tier.name in available:
+                    oldest, upto = available[tier.name]
+                    switch = _align_up(max(cursor + 1, oldest), tier.resolution)
+                    if switch < min(upto, seg_end):
+                        seg_end = switch
+
+            if chosen is not TIER_1M and cursor % chosen.resolution:
+                # Older than any finer tier: include the coarse bucket containing the cursor
+                cursor = _align_down(cursor, chosen.resolution)
+
+        if segments and segments[-1].prefix == chosen.prefix and segments[-1].end == cursor:
+            segments[-1] = Segment(chosen.prefix, segments[-1].start, seg_end)
+        else:
+            segments.append(Segment(chosen.prefix, cursor, seg_end))
+        cursor = seg_end
+
+    logger.debug(f"🧱 Tier plan for {family} [{start_ts}, {end_ts}): {segments}")
+    return segments or [Segment(TIER_1M.prefix, start_ts, end_ts)]
+
+
+async def _ensure_script(client) -> str:
+    global _COMPACT_SHA
+    if not _COMPACT_SHA:
+        _COMPACT_SHA = await client.script_load(COMPACT_SCRIPT)
+    return _COMPACT_SHA
+
+
+async def _compact_tier(client, family: str, source: Tier, target: Tier, now: int) -> int:
+    """Compact closed source buckets into the target tier. Returns the number of target buckets written."""
+    global _COMPACT_SHA
+    res = target.resolution
+    raw = await client.hgetall(WATERMARK_KEY) or {}
+    since_field, upto_field = f"{family}:{target.name}:since", f"{family}:{target.name}:upto"
+
+    # Range the source holds completely (the oldest minute bucket may already be half cleaned)
+    if source is TIER_1M:
+        source_oldest = _align_up(now - tier_retention_seconds(source, family), res) + res
+        # Minute buckets carry area-shifted time and the watermark is shared by every area
+        source_upto = now + global_rollup.min_area_offset() * 3600 - AppConfig.timeseries_tiers_grace_seconds
+    else:
+        if not raw.get(f"{family}:{source.name}:upto"):
+            return 0
+        source_oldest = _align_up(int(raw[f"{family}:{source.name}:since"]), res)
+        source_upto = int(raw[f"{family}:{source.name}:upto"])
+
+    start = int(raw[upto_field]) if raw.get(upto_field) else source_oldest
+    upto = _align_down(source_upto, res)
+    if upto <= start:
+        return 0
+
+    sources = await cluster_keys.scan_keys(client, f"{source.prefix}:{family}:*", SCAN_COUNT)
+    written = 0
+    if sources:
+        sha = await _ensure_script(client)
+        for i, chunk in enumerate(cluster_keys.slot_chunks(sources, CHUNK_SIZE)):
+            targets = [target.prefix + key[len(source.prefix):] for key in chunk]
+            args = [*chunk, *targets, str(start), str(upto), str(res)]
+            try:
+                written += int(await client.evalsha(sha, len(args) - 3, *args))
+            except Exception as e:
+                if "NOSCRIPT" not in str(e).upper():
+                    raise
+                _COMPACT_SHA = None
+                sha = await _ensure_script(client)
+                written += int(await client.evalsha(sha, len(args) - 3, *args))
+            await asyncio.sleep(CHUNK_SLEEP)
+
+    mapping = {upto_field: str(upto)}
+    if not raw.get(since_field):
+        mapping[since_field] = str(start)
+    await client.hset(WATERMARK_KEY, mapping=mapping)
+    logger.info(f"🧱 Compacted {family} {source.name} -> {target.name} [{start}, {upto}): {written} buckets")
+    return written
+
+
+async def run_compaction_once(client) -> int:
+    """One compaction pass over every family and tier (packed Pokemon storage has no minute hashes to compact)."""
+    if not await client.set(LOCK_KEY, str(time.time()), nx=True, ex=LOCK_TTL_SEC):
+        logger.info("🔒 Timeseries tier compaction already running; skipping this cycle.")
+        return 0
+
+    try:
+        now = int(time.time())
+        total = 0
+        for family in FAMILIES:
+            if family == "pokemon" and AppConfig.pokemon_timeseries_storage == "packed":
+                continue
+            for source, target in zip(TIERS, TIERS[1:]):
+                if tier_retention_seconds(target, family) <= 0:
+                    break
+                total += await _compact_tier(client, family, source, target, now)
+        return total
+    finally:
+        await client.delete(LOCK_KEY)
+
+
+class TimeseriesTierService:
+    def __init__(self, redis_manager: RedisManager, interval: int = 900):
+        self._redis_manager = redis_manager
+        self._interval      = interval
+        self._running       = False
+        self._task: asyncio.Task | None = None
+
+    async def _compaction_loop(self) -> None:
+        self._running = True
+        logger.info(f"⏳ Timeseries tier compaction started — interval: {self._interval}s")
+
+        while self._running:
+            try:
+                client = await self._redis_manager.check_redis_connection()
+                if not client:
+                    logger.warning("⚠️ Tier compaction: connection unavailable, skipping cycle")
+                else:
+                    await run_compaction_once(client)
+            except asyncio.CancelledError:
+                logger.info("🛑 Tier compaction loop cancelled")
+                break
+            except Exception as e:
+                logger.error(f"❌ Tier compaction cycle failed: {e}")
+
+            await asyncio.sleep(self._interval)
+
+    async def start(self) -> None:
+        if self._running:
+            logger.warning("⚠️ Tier compaction service already running")
+            return
+        self._task = asyncio.create_task(self._compaction_loop())
+        logger.info("🚀 Started timeseries tier compaction service")
+
+    async def stop(self) -> None:
+        if not self._running:
+            logger.warning("⚠️ Tier compaction service already stopped")
+            return
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,137 @@
+"""
+Top-K leaderboards per area (TOP_K in config.json).
+
+Ingest increments a sorted set per metric, area and day/week next to the counter hashes:
+  topk:{metric}:{area}:daily:{YYYYMMDD}
+  topk:{metric}:{area}:weekly:{YYYYMMDD of the Monday}
+e.g. topk:pokemon_shiny:Lisbon:weekly:20250106 -> {"25:0": 14, "129:0": 9, ...}
+
+The members are species/forms, raid bosses, quest rewards and invasion characters, so every set
+stays at a few thousand members at most and the counts are exact. One bucket is answered with
+ZREVRANGE (O(log n + k)), several with a ZUNION of the buckets. Buckets use the event's
+area-shifted time, like the counter keys, and expire on their own (EXPIREAT at the end of the
+bucket plus the retention). The sets are not part of the MySQL backup.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+import config as AppConfig
+from my_redis.utils.cluster_keys import area_tag
+
+DATE_FORMAT = "%Y%m%d"
+
+# Max buckets read for one query (days or weeks)
+MAX_BUCKETS = 400
+
+
+def _quest_reward(data: dict) -> str:
+    side = "ar" if data.get("ar_type") is not None else "normal"
+    return ":".join(str(data.get(f"reward_{side}_{f}") or 0) for f in ("type", "item_id", "poke_id", "poke_form"))
+
+
+def _pvp_rank1(league: str) -> Callable[[dict], bool]:
+    return lambda d: bool(d.get(f"pvp_{league}_rank")) and 1 in d.get(f"pvp_{league}_rank")
+
+
+def _pokemon(data: dict) -> str:
+    return f"{data['pokemon_id']}:{data.get('form', 0)}"
+
+
+# metric -> (event family, timestamp field, member of the event, include the event?)
+METRICS: Dict[str, tuple[str, str, Callable[[dict], str], Callable[[dict], bool]]] = {
+    "pokemon_total":       ("pokemon",   "first_seen",          _pokemon, lambda d: True),
+    "pokemon_iv100":       ("pokemon",   "first_seen",          _pokemon, lambda d: d.get("iv") == 100),
+    "pokemon_iv0":         ("pokemon",   "first_seen",          _pokemon, lambda d: d.get("iv") == 0),
+    "pokemon_pvp_little":  ("pokemon",   "first_seen",          _pokemon, _pvp_rank1("little")),
+    "pokemon_pvp_great":   ("pokemon",   "first_seen",          _pokemon, _pvp_rank1("great")),
+    "pokemon_pvp_ultra":   ("pokemon",   "first_seen",          _pokemon, _pvp_rank1("ultra")),
+    "pokemon_shiny":       ("pokemon",   "first_seen",          _pokemon, lambda d: bool(d.get("shiny"))),
+    "raid_bosses":         ("raids",     "raid_start",          lambda d: f"{d['raid_pokemon']}:{d['raid_form']}", lambda d: True),
+    "quest_rewards":       ("quests",    "first_seen",          _quest_reward, lambda d: True),
+    "invasion_characters": ("invasions", "invasion_first_seen", lambda d: str(d["invasion_character"]), lambda d: True),
+}
+
+
+def top_k_enabled(metric: str) -> bool:
+    return AppConfig.top_k_enabled and metric in AppConfig.top_k_metrics
+
+
+def _day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _monday(dt: datetime) -> datetime:
+    return _day(dt) - timedelta(days=dt.weekday())
+
+
+def bucket_key(metric: str, area: str, interval: str, start: datetime) -> str:
+    return f"topk:{metric}:{area_tag(area)}:{interval}:{start.strftime(DATE_FORMAT)}"
+
+
+async def add_top_k_events(family: str, data: dict, pipe) -> None:
+    """Queue ZINCRBYs of the event into the daily and weekly leaderboards of every enabled metric of `family`."""
+    if not AppConfig.top_k_enabled:
+        return
+    area = data.get("area_name")
+    daily_ttl = AppConfig.top_k_daily_retention_days * 86400
+    weekly_ttl = AppConfig.top_k_weekly_retention_weeks * 7 * 86400
+
+    for metric, (event_family, ts_field, member_fn, include) in METRICS.items():
+        if event_family != family or not top_k_enabled(metric) or not include(data):
+            continue
+        member = member_fn(data)
+        dt = datetime.fromtimestamp(data[ts_field])
+        day, monday = _day(dt), _monday(dt)
+        for key, bucket_end, ttl in (
+            (bucket_key(metric, area, "daily", day), day + timedelta(days=1), daily_ttl),
+            (bucket_key(metric, area, "weekly", monday), monday + timedelta(days=7), weekly_ttl),
+        ):
+            pipe.zincrby(key, 1, member)
+            if ttl:
+                pipe.expireat(key, int(bucket_end.timestamp()) + ttl)
+
+
+def bucket_keys(metric: str, area: str, interval: str, start: datetime, end: datetime) -> list[str]:
+    """Keys of the days (or weeks) touched by start..end, like the daily/weekly counter queries."""
+    if interval == "weekly":
+        cur, step = _monday(start), timedelta(days=7)
+    else:
+        cur, step = _day(start), timedelta(days=1)
+
+    keys = []
+    while cur <= end:
+        keys.append(bucket_key(metric, area, interval, cur))
+        if len(keys) > MAX_BUCKETS:
+            raise ValueError(f"range spans more than {MAX_BUCKETS} {interval} buckets")
+        cur += step
+    return keys
+
+
+def _decode(member) -> str:
+    return member.decode() if isinstance(member, bytes) else member
+
+
+async def top_k(client, metrics: list[str], area: str, start: datetime, end: datetime,
+                k: int = 20, interval: str = "daily") -> dict:
+    """
+    The k members with the highest counts between start and end for one area, highest first:
+    {"mode": "top_k", "data": {metric: {member: count}}}.
+    """
+    plans = {m: bucket_keys(m, area, interval, start, end) for m in metrics}
+    async with client.pipeline(transaction=False) as pipe:
+        for metric, keys in plans.items():
+            if len(keys) == 1:
+                pipe.zrevrange(keys[0], 0, k - 1, withscores=True)
+            elif keys:
+                pipe.zunion(keys, withscores=True)
+        results = iter(await pipe.execute())
+
+    data: Dict[str, dict] = {}
+    for metric, keys in plans.items():
+        rows = [(_decode(m), int(s)) for m, s in next(results)] if keys else []
+        if len(keys) > 1:
+            rows = heapq.nlargest(k, rows, key=lambda r: r[1])
+        data[metric] = dict(rows)
+    return {"mode": "top_k", "data": data}
@@ -0,0 +1,154 @@
+"""
+Approximate unique counts (UNIQUE_SKETCHES in config.json).
+
+Ingest adds the id of every event to a Redis HyperLogLog per metric, area and hour/day, in the
+same pipeline as the counter writes:
+  hll:{metric}:{area}:{YYYYMMDDHH}   e.g. hll:spawnpoints:Lisbon:2025010112
+  hll:{metric}:{area}:{YYYYMMDD}     e.g. hll:users:Lisbon:20250101
+
+Each sketch takes at most 12 KB however many ids it holds, and PFCOUNT over several keys returns
+the size of their union (standard error 0.81%), so a unique count over any range reads the
+daily sketches of the whole days in it plus the hourly sketches of the partial days at the edges.
+Buckets use the event's area-shifted time, like the counter keys. Sketches expire on their own
+(EXPIREAT at the end of the bucket plus the retention) and are not part of the MySQL backup.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import config as AppConfig
+from my_redis.utils.cluster_keys import area_tag
+
+HOUR_FORMAT = "%Y%m%d%H"
+DAY_FORMAT = "%Y%m%d"
+
+# Max buckets per metric in grouped mode (one PFCOUNT each)
+MAX_GROUPED_BUCKETS = 2000
+
+# metric -> (event family, id field, timestamp field)
+METRICS: Dict[str, tuple[str, str, str]] = {
+    "spawnpoints":    ("pokemon",   "spawnpoint",           "first_seen"),
+    "users":          ("pokemon",   "username",             "first_seen"),
+    "raid_gyms":      ("raids",     "raid_gym_id",          "raid_start"),
+    "invasion_stops": ("invasions", "invasion_pokestop_id", "invasion_first_seen"),
+}
+
+
+def sketch_enabled(metric: str) -> bool:
+    return AppConfig.unique_sketches_enabled and metric in AppConfig.unique_sketches_metrics
+
+
+def hourly_key(metric: str, area: str, hour: datetime) -> str:
+    return f"hll:{metric}:{area_tag(area)}:{hour.strftime(HOUR_FORMAT)}"
+
+
+def daily_key(metric: str, area: str, day: datetime) -> str:
+    return f"hll:{metric}:{area_tag(area)}:{day.strftime(DAY_FORMAT)}"
+
+
+async def add_unique_events(family: str, data: dict, pipe) -> None:
+    """Queue PFADDs of the event's ids into its hourly and daily sketches for every enabled metric of `family`."""
+    if not AppConfig.unique_sketches_enabled:
+        return
+    area = data.get("area_name")
+    hourly_ttl = AppConfig.unique_sketches_hourly_retention_hours * 3600
+    daily_ttl = AppConfig.unique_sketches_daily_retention_days * 86400
+
+    for metric, (event_family, id_field, ts_field) in METRICS.items():
+        if event_family != family or not sketch_enabled(metric):
+            continue
+        member = data.get(id_field)
+        if member in (None, ""):
+            continue
+
+        hour = datetime.fromtimestamp(data[ts_field]).replace(minute=0, second=0, microsecond=0)
+        day = hour.replace(hour=0)
+        for key, bucket_end, ttl in (
+            (hourly_key(metric, area, hour), hour + timedelta(hours=1), hourly_ttl),
+            (daily_key(metric, area, day), day + timedelta(days=1), daily_ttl),
+        ):
+            pipe.pfadd(key, str(member))
+            if ttl:
+                pipe.expireat(key, int(bucket_end.timestamp()) + ttl)
+
+
+def _hour_floor(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def covering_keys(metric: str, area: str, start: datetime, end: datetime, offset: int = 0) -> list[str]:
+    """
+    Keys whose union covers the hours from start to end (inclusive): the daily sketch for every
+    whole day, hourly sketches for the partial days at the edges. Edge hours older than the hourly
+    retention are covered by their whole day instead.
+    """
+    first, last = _hour_floor(start), _hour_floor(end)
+    hourly_cutoff = None
+    if AppConfig.unique_sketches_hourly_retention_hours:
+        now = datetime.fromtimestamp(time.time() + offset * 3600)
+        hourly_cutoff = _hour_floor(now) - timedelta(hours=AppConfig.unique_sketches_hourly_retention_hours)
+
+    keys = []
+    day = first.replace(hour=0)
+    while day <= last:
+        lo = max(first, day)
+        hi = min(last, day + timedelta(hours=23))
+        if (lo == day and hi.hour == 23) or (hourly_cutoff and lo < hourly_cutoff):
+            keys.append(daily_key(metric, area, day))
+        else:
+            hours = int((hi - lo).total_seconds() // 3600) + 1
+            keys.extend(hourly_key(metric, area, lo + timedelta(hours=h)) for h in range(hours))
+        day += timedelta(days=1)
+    return keys
+
+
+def _bucket_keys(metric: str, area: str, start: datetime, end: datetime, interval: str) -> list[tuple[str, str]]:
+    """(bucket label, key) for every hour or day from start to end, for grouped mode."""
+    if interval == "hourly":
+        step, fmt, cur, last = timedelta(hours=1), HOUR_FORMAT, _hour_floor(start), _hour_floor(end)
+        key_fn = hourly_key
+    else:
+        step, fmt, cur, last = timedelta(days=1), DAY_FORMAT, start.replace(hour=0, minute=0, second=0, microsecond=0), end
+        key_fn = daily_key
+
+    buckets = []
+    while cur <= last:
+        buckets.append((cur.strftime(fmt), key_fn(metric, area, cur)))
+        if len(buckets) > MAX_GROUPED_BUCKETS:
+            raise ValueError(f"range spans more than {MAX_GROUPED_BUCKETS} {interval} buckets")
+        cur += step
+    return buckets
+
+
+async def estimate_unique(client, metrics: list[str], area: str, start: datetime, end: datetime,
+                          mode: str = "sum", interval: str = "hourly", offset: int = 0) -> dict:
+    """
+    Unique-count estimates for one area.
+
+    sum:     {metric: PFCOUNT over the covering keys of the whole range}
+    grouped: {metric: {bucket: PFCOUNT of that hour's/day's sketch}}
+    All keys of a call share the area's hash slot, so multi-key PFCOUNT also works in cluster mode.
+    """
+    plans: Dict[str, list] = {}
+    async with client.pipeline(transaction=False) as pipe:
+        for metric in metrics:
+            if mode == "grouped":
+                plans[metric] = _bucket_keys(metric, area, start, end, interval)
+                for _, key in plans[metric]:
+                    pipe.pfcount(key)
+            else:
+                plans[metric] = covering_keys(metric, area, start, end, offset)
+                if plans[metric]:
+                    pipe.pfcount(*plans[metric])
+        results = iter(await pipe.execute())
+
+    data: Dict[str, object] = {}
+    for metric in metrics:
+        if mode == "grouped":
+            counts = {label: int(next(results)) for label, _ in plans[metric]}
+            data[metric] = {label: n for label, n in counts.items() if n}
+        else:
+            data[metric] = int(next(results)) if plans[metric] else 0
+    return {"mode": mode, "data": data}
+
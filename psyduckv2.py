@@ -9,7 +9,7 @@ from alembic.config import Config as AlembicConfig #type: ignore
 from alembic import command as alembic_command
 from utils.logger import setup_logging, logger
 from utils.koji_geofences import KojiGeofences
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
 import warnings
 warnings.filterwarnings("ignore", message="Duplicate entry")
 
@@ -30,7 +30,7 @@ setup_logging(
     },
 )
 # Initialize Redis connection
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_BACKGROUND)
 
 def _project_root() -> Path:
     return Path(__file__).resolve().parent
@@ -2,14 +2,18 @@ from urllib import response
 import config as AppConfig
 from datetime import datetime
 from typing import List
-from server_fastapi.utils import secure_api
+from server_fastapi.utils import admission, batch, columnar, fan_out, json_stream, live_feed, paging, result_cache, secure_api, single_flight
 from sql.utils.time_parser import parse_time_input, month_parse_time_input, parse_time_to_datetime
 from sql.utils.area_parser import resolve_area_id_by_name
 from server_fastapi import global_state
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, dependencies
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, dependencies
 from typing import Optional
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
 from utils.timer import time_execution
-from my_redis.utils import filtering_keys
+from my_redis.utils import filtering_keys, global_rollup, live_stream, top_k, unique_sketches
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils.memory_report import get_memory_report
 from my_redis.queries.gets.pokemons.pokemon_counter_retrieval import PokemonCounterRetrieval
 from my_redis.queries.gets.raids.raid_counter_retrieval import RaidCounterRetrieval
 from my_redis.queries.gets.invasions.invasion_counter_retrieval import InvasionCounterRetrieval
@@ -30,7 +34,8 @@ router = APIRouter()
 
 dependencies_list = [
     Depends(secure_api.validate_path),
-    Depends(secure_api.validate_ip)
+    Depends(secure_api.validate_ip),
+    Depends(admission.remember_client)
 ]
 if AppConfig.api_secret_key:
     dependencies_list.append(Depends(secure_api.verify_token))
@@ -48,6 +53,47 @@ def _parse_csv_param(v: str):
         return None
     return {part.strip() for part in s.split(",") if part.strip()}
 
+def _global_rollup_offsets(*families: str) -> dict:
+    """
+    Area offsets for area=__all__: the global rollup keys written at ingest, which every family
+    read must have. Their buckets mix the local times of all areas, so time inputs are resolved
+    with offset 0.
+    """
+    disabled = [f for f in dict.fromkeys(families) if not global_rollup.global_rollup_enabled(f)]
+    if disabled:
+        raise HTTPException(400, f"❌ Global rollup is not enabled for {', '.join(disabled)}.")
+    return {global_rollup.GLOBAL_AREA: 0}
+
+def _multi_family_area_offsets(area: str, families: List[str]) -> dict:
+    """
+    Area offsets for the endpoints that read several families at once (unique sketches, top-K):
+    __all__, 'global' (every geofence), a CSV list or a single area.
+    """
+    if global_rollup.is_global_area(area):
+        return _global_rollup_offsets(*families)
+    if area.strip().lower() in ["global", "all"]:
+        return filtering_keys.get_area_offset("global", global_state.geofences)
+    area_list = _parse_csv_param(area)
+    if area_list:
+        area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
+        if not area_offsets:
+            raise HTTPException(400, "❌ None of the requested areas were found.")
+        return area_offsets
+    resolved = filtering_keys.get_area_offsets_for_list([area], global_state.geofences)
+    if not resolved:
+        raise HTTPException(400, f"❌ Area not found: {area}")
+    return resolved
+
+# Bucket size of the counter keys read for each interval (closed-period result cache)
+_CACHE_UNITS = {"hourly": "hour", "daily": "day", "weekly": "week", "monthly": "month"}
+
+def _counter_method(method_for):
+    """Runs the counter retrieval method that method_for(retrieval) picks, {} if there is none."""
+    async def retrieve(retr):
+        method = method_for(retr)
+        return await method() if method else {}
+    return retrieve
+
 def _to_int_list(name: str, s: Optional[set[str]]) -> Optional[List[int]]:
     if s is None:
         return None
@@ -98,6 +144,185 @@ async def get_cached_pokestops(
         return text_output
 
 
+@router.get(
+    "/api/redis/pool_stats",
+    tags=["Redis"],
+    dependencies=dependencies_list
+)
+async def get_redis_pool_stats(
+    response_format: str = Query("json", description="Response format: json or text"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Utilization of the named Redis connection pools (ingest, query, background) for the worker that answers.
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+    result = {"data": RedisManager.pool_stats()}
+    if response_format.lower() == "json":
+        return result
+    else:
+        text_output = "\n".join(f"{pool}: {stats}" for pool, stats in result["data"].items())
+        return text_output
+
+
+@router.get(
+    "/api/redis/result_cache_stats",
+    tags=["Redis"],
+    dependencies=dependencies_list
+)
+async def get_result_cache_stats(
+    response_format: str = Query("json", description="Response format: json or text"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Hits, misses and size of the closed-period result cache (RESULT_CACHE) for the worker that answers.
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+    result = {"data": result_cache.cache_stats()}
+    if response_format.lower() == "json":
+        return result
+    else:
+        text_output = "\n".join(f"{k}: {v}" for k, v in result["data"].items())
+        return text_output
+
+
+@router.get(
+    "/api/redis/single_flight_stats",
+    tags=["Redis"],
+    dependencies=dependencies_list
+)
+async def get_single_flight_stats(
+    response_format: str = Query("json", description="Response format: json or text"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Executed vs. coalesced query counts of the single-flight layer (SINGLE_FLIGHT) for the worker that answers.
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+    result = {"data": single_flight.single_flight_stats()}
+    if response_format.lower() == "json":
+        return result
+    else:
+        text_output = "\n".join(f"{k}: {v}" for k, v in result["data"].items())
+        return text_output
+
+
+@router.get(
+    "/api/redis/admission_stats",
+    tags=["Redis"],
+    dependencies=dependencies_list
+)
+async def get_admission_stats(
+    response_format: str = Query("json", description="Response format: json or text"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Cost estimates, heavy queries running and rejections of the admission control (ADMISSION) for the worker that answers.
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+    result = {"data": admission.admission_stats()}
+    if response_format.lower() == "json":
+        return result
+    else:
+        text_output = "\n".join(f"{k}: {v}" for k, v in result["data"].items())
+        return text_output
+
+
+@router.get(
+    "/api/redis/live_stats",
+    tags=["Redis"],
+    dependencies=dependencies_list
+)
+async def get_live_stats(
+    response_format: str = Query("json", description="Response format: json or text"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Subscribers and stream reader counts of the live counter stream (LIVE_STREAM) for the worker that answers.
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+    result = {"data": live_feed.live_stats()}
+    if response_format.lower() == "json":
+        return result
+    else:
+        text_output = "\n".join(f"{k}: {v}" for k, v in result["data"].items())
+        return text_output
+
+
+@router.get(
+    "/api/redis/live_counters",
+    tags=["Live Counters"],
+    dependencies=dependencies_list
+)
+async def get_live_counters(
+    request: Request,
+    area: str = Query("global", description="Areas to stream (CSV), or global for all areas"),
+    family: str = Query("all", description="Families to stream: pokemon, raids, invasions, quests (CSV) or all"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Server-Sent Events stream of per-area, per-minute counter deltas ("delta" events), pushed every few seconds.
+    Add them to totals fetched from the counter endpoints; on a "resync" event, fetch the totals again.
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+    if not AppConfig.live_stream_enabled:
+        raise HTTPException(status_code=400, detail="❌ The live counter stream is not enabled.")
+
+    families = _parse_csv_param(family)
+    if families and not families <= set(live_stream.FAMILIES):
+        raise HTTPException(status_code=400, detail=f"❌ Invalid family. Must be one of: {', '.join(live_stream.FAMILIES)} or all.")
+    areas = None if area.strip().lower() in ["global", "all"] else _parse_csv_param(area)
+
+    subscriber = live_feed.subscribe(families, areas)
+    return StreamingResponse(
+        live_feed.event_stream(subscriber, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/api/redis/memory_report",
+    tags=["Redis"],
+    dependencies=dependencies_list
+)
+async def get_redis_memory_report(
+    family: str = Query("all", description="Key family filter, e.g. 'ts:pokemon' or 'all' (CSV supported)"),
+    include_areas: bool = Query(True, description="Include the per-area breakdown"),
+    response_format: str = Query("json", description="Response format: json or text"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Latest Redis memory report per key family and area (built by the leader, see MEMORY_REPORT in config.json).
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+    client = await RedisManager(POOL_QUERY).get_read_client()
+    if not client:
+        raise HTTPException(status_code=503, detail="❌ Redis not available")
+
+    report = await get_memory_report(client)
+    if not report:
+        raise HTTPException(status_code=404, detail="Memory report not available (MEMORY_REPORT disabled or first run pending)")
+
+    families = _parse_csv_param(family)
+    if families is not None:
+        report["families"] = {f: v for f, v in report["families"].items() if f in families}
+        report["areas"] = {f: v for f, v in report["areas"].items() if f in families}
+    if not include_areas:
+        report.pop("areas", None)
+
+    result = {"data": report}
+    if response_format.lower() == "json":
+        return result
+    else:
+        lines = [
+            f"generated_at: {report['generated_at']} used_memory: {report['used_memory']} "
+            f"maxmemory: {report['maxmemory']} keys: {report['total_keys']}"
+        ]
+        lines += [f"{f}: {stats}" for f, stats in report["families"].items()]
+        return "\n".join(lines)
+
+
 @router.get(
     "/api/redis/get_cached_geofences",
     tags=["Koji Geofences"],
@@ -133,17 +358,23 @@ async def get_cached_geofences(
     dependencies=dependencies_list
 )
 @time_execution(label="POKEMON_GET_COUNTERSERIES")
+@single_flight.coalesced("POKEMON_GET_COUNTERSERIES")
 async def get_pokemon_counterseries(
     counter_type: str = Query(..., description="Type of counter series: totals, tth, or weather"),
     interval: str = Query(..., description="Interval: hourly, daily or weekly for totals and tth; monthly for weather"),
-    start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
-    end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
+    start_time: Optional[str] = Query(None, description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days'). Not used with last_hours."),
+    end_time: Optional[str] = Query(None, description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now'). Not used with last_hours."),
     mode: str = Query("sum", description="Aggregation mode: 'sum' or 'grouped' or (for hourly only) 'surged'."),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, json_stream, arrow, msgpack or text"),
+    last_hours: Optional[int] = Query(None, ge=1, le=24, description="Hourly interval only: the last N closed hours (1-24), served from the rolling 24h window instead of start_time/end_time."),
     area: str = Query("global", description="Area to filter counters"),
     metric: str = Query("all", description="Filter by metric. For totals: allowed values are total, iv100, iv0, pvp_little, pvp_great, pvp_ultra, shiny. For weather: allowed values are 0 to 9. For TTH: allowed values are e.g. 0_5, 5_10, etc."),
     pokemon_id: str = Query("all", description="ONLY IN TOTALS. Filter by Pokémon ID. Use 'all' to show all Pokémon."),
     form: str = Query("all", description="ONLY IN TOTALS. Filter by form. Use 'all' to show all forms."),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the entries of these metrics (CSV), e.g. shiny,iv100"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param(),
     #api_secret_key: Optional[str] = secure_api.get_secret_key_param()
 ):
@@ -166,8 +397,12 @@ async def get_pokemon_counterseries(
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be one of 'sum', 'grouped', or 'surged'.")
     if mode == "surged" and interval != "hourly":
         raise HTTPException(status_code=400, detail="❌ Surged mode is only supported for hourly intervals.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", json_stream.STREAM_FORMAT, *columnar.FORMATS, "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, json_stream, arrow, msgpack or text.")
+    if last_hours and interval != "hourly":
+        raise HTTPException(status_code=400, detail="❌ last_hours is only supported for hourly intervals.")
+    if not last_hours and (not start_time or not end_time):
+        raise HTTPException(status_code=400, detail="❌ start_time and end_time are required unless last_hours is set.")
 
     # Parse multi-select params (None means "all")
     metrics_set     = _parse_csv_param(metric)
@@ -179,7 +414,9 @@ async def get_pokemon_counterseries(
     area_list = None if area_is_global else _parse_csv_param(area)
 
     # Resolve areas -> offsets
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets({"totals": "pokemon", "tth": "pokemon_tth", "weather": "pokemon_weather"}[counter_type])
+    elif area_is_global:
         # all areas
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)
     elif area_list:
@@ -204,28 +441,46 @@ async def get_pokemon_counterseries(
         }.get((counter_type, interval))
 
     # Run per-area
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
-            start_dt = filtering_keys.parse_time_input(start_time, offset)
-            end_dt   = filtering_keys.parse_time_input(end_time,   offset)
+            if last_hours:
+                start_dt = end_dt = None
+            else:
+                start_dt = filtering_keys.parse_time_input(start_time, offset)
+                end_dt   = filtering_keys.parse_time_input(end_time,   offset)
 
             retr = PokemonCounterRetrieval(
                 area=area_name,
                 start=start_dt,
                 end=end_dt,
                 mode=mode,
+                last_hours=last_hours,
                 pokemon_id=pokemon_ids_set,   # sets or None
                 form=forms_set,
                 metric=metrics_set,
             )
-            method = _method(retr)
-            results[area_name] = await method() if method else {}
+            result = await result_cache.cached_retrieval(
+                f"{counter_type}:{interval}", retr, _counter_method(_method),
+                _CACHE_UNITS[interval], offset, additive=counter_type == "totals",
+            )
+            if retr.window and isinstance(result, dict):
+                result["window"] = retr.window
+            return result
         except Exception as e:
-            results[area_name] = {"error": str(e)}
-
-    if resp_fmt == "json":
-        return results if area_is_global or (area_list and len(area_list) > 1) else next(iter(results.values()))
+            return {"error": str(e)}
+
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_counter("pokemon", counter_type, interval, area_offsets, start_time, end_time, last_hours)
+    async with admission.admitted("POKEMON_GET_COUNTERSERIES", cost):
+        results = await fan_out.fan_out("POKEMON_GET_COUNTERSERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
+
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt, pokemon=True)
+    if resp_fmt in ["json", json_stream.STREAM_FORMAT]:
+        payload = results if area_is_global or (area_list and len(area_list) > 1) else next(iter(results.values()))
+        return json_stream.streaming_response(payload) if resp_fmt == json_stream.STREAM_FORMAT else payload
     else:
         text_output = "\n".join(f"{k}: {v}" for k, v in results.items())
         return text_output
@@ -237,13 +492,15 @@ async def get_pokemon_counterseries(
     dependencies=dependencies_list
 )
 @time_execution(label="RAID_GET_COUNTERSERIES")
+@single_flight.coalesced("RAID_GET_COUNTERSERIES")
 async def get_counter_raids(
     counter_type: str = Query("totals", description="Type of counter series: totals"),
     interval: str = Query(..., description="Interval: hourly, daily or weekly."),
-    start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
-    end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
+    start_time: Optional[str] = Query(None, description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days'). Not used with last_hours."),
+    end_time: Optional[str] = Query(None, description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now'). Not used with last_hours."),
     mode: str = Query("sum", description="Aggregation mode: 'sum' or 'grouped' or (for hourly only) 'surged'."),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, json_stream, arrow, msgpack or text"),
+    last_hours: Optional[int] = Query(None, ge=1, le=24, description="Hourly interval only: the last N closed hours (1-24), served from the rolling 24h window instead of start_time/end_time."),
     area: str = Query("global", description="Area to filter counters"),
     raid_pokemon: str = Query("all", description="Filter by raid_pokemon. Use 'all' to show all."),
     raid_form: str = Query("all", description="Filter by raid_form. Use 'all' to show all."),
@@ -251,6 +508,10 @@ async def get_counter_raids(
     raid_costume: str = Query("all", description="Filter by raid_costume. Use 'all' to show all."),
     raid_is_exclusive: str = Query("all", description="Filter by raid_is_exclusive. Use 'all' to show all."),
     raid_ex_eligible: str = Query("all", description="Filter by raid_ex_eligible. Use 'all' to show all."),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the entries of these breakdowns or breakdown values (CSV), e.g. raid_level:5,raid_costume"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param()
 ):
     # Validate secret parameters
@@ -270,8 +531,12 @@ async def get_counter_raids(
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be one of 'sum', 'grouped', or 'surged'.")
     if mode == "surged" and interval != "hourly":
         raise HTTPException(status_code=400, detail="❌ Surged mode is only supported for hourly intervals.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", json_stream.STREAM_FORMAT, *columnar.FORMATS, "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, json_stream, arrow, msgpack or text.")
+    if last_hours and interval != "hourly":
+        raise HTTPException(status_code=400, detail="❌ last_hours is only supported for hourly intervals.")
+    if not last_hours and (not start_time or not end_time):
+        raise HTTPException(status_code=400, detail="❌ start_time and end_time are required unless last_hours is set.")
 
     # Parse multi-select filters (None means "all")
     raid_pokemon_set     = _parse_csv_param(raid_pokemon)
@@ -285,7 +550,9 @@ async def get_counter_raids(
     area_is_global = area.strip().lower() in ["global", "all"]
     area_list = None if area_is_global else _parse_csv_param(area)
 
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets("raids")
+    elif area_is_global:
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)
     elif area_list:
         area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
@@ -307,17 +574,20 @@ async def get_counter_raids(
         }.get((counter_type, interval))
 
     # Run per-area
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
-            start_dt = filtering_keys.parse_time_input(start_time, offset)
-            end_dt   = filtering_keys.parse_time_input(end_time,   offset)
+            if last_hours:
+                start_dt = end_dt = None
+            else:
+                start_dt = filtering_keys.parse_time_input(start_time, offset)
+                end_dt   = filtering_keys.parse_time_input(end_time,   offset)
 
             retr = RaidCounterRetrieval(
                 area=area_name,
                 start=start_dt,
                 end=end_dt,
                 mode=mode,
+                last_hours=last_hours,
                 raid_pokemon=raid_pokemon_set,
                 raid_form=raid_form_set,
                 raid_level=raid_level_set,
@@ -325,11 +595,27 @@ async def get_counter_raids(
                 raid_is_exclusive=raid_is_exc_set,
                 raid_ex_eligible=raid_ex_eligible_set,
             )
-            method = _method(retr)
-            results[area_name] = await method() if method else {}
+            result = await result_cache.cached_retrieval(
+                f"{counter_type}:{interval}", retr, _counter_method(_method),
+                _CACHE_UNITS[interval], offset, additive=counter_type == "totals",
+            )
+            if retr.window and isinstance(result, dict):
+                result["window"] = retr.window
+            return result
         except Exception as e:
-            results[area_name] = {"error": str(e)}
-
+            return {"error": str(e)}
+
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_counter("raids", counter_type, interval, area_offsets, start_time, end_time, last_hours)
+    async with admission.admitted("RAID_GET_COUNTERSERIES", cost):
+        results = await fan_out.fan_out("RAID_GET_COUNTERSERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
+
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt)
+    if resp_fmt == json_stream.STREAM_FORMAT:
+        return json_stream.streaming_response(results if len(results) != 1 else next(iter(results.values())))
     if resp_fmt == "json":
         # If multiple areas, return the dict; if only one, return that single result.
         return results if len(results) != 1 else next(iter(results.values()))
@@ -342,18 +628,24 @@ async def get_counter_raids(
     dependencies=dependencies_list
 )
 @time_execution(label="INVASION_GET_COUNTERSERIES")
+@single_flight.coalesced("INVASION_GET_COUNTERSERIES")
 async def get_counter_invasions(
     counter_type: str = Query("totals", description="Type of counter series: totals"),
     interval: str = Query(..., description="Interval: hourly, daily or weekly."),
-    start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
-    end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
+    start_time: Optional[str] = Query(None, description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days'). Not used with last_hours."),
+    end_time: Optional[str] = Query(None, description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now'). Not used with last_hours."),
     mode: str = Query("sum", description="Aggregation mode: 'sum' or 'grouped' or (for hourly only) 'surged'."),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, json_stream, arrow, msgpack or text"),
+    last_hours: Optional[int] = Query(None, ge=1, le=24, description="Hourly interval only: the last N closed hours (1-24), served from the rolling 24h window instead of start_time/end_time."),
     area: str = Query("global", description="Area to filter counters"),
     display_type: str = Query("all", description="all or invasion display type"),
     character: str = Query("all", description="all or invasion character"),
     grunt: str = Query("all", description="all or grunt type"),
     confirmed: str = Query("all", description="all or confirmed status (0 or 1)"),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the entries of these breakdowns or breakdown values (CSV), e.g. confirmed:1,grunt"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param()
 ):
     # Validate secret parameters
@@ -373,8 +665,12 @@ async def get_counter_invasions(
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be one of 'sum', 'grouped', or 'surged'.")
     if mode == "surged" and interval != "hourly":
         raise HTTPException(status_code=400, detail="❌ Surged mode is only supported for hourly intervals.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", json_stream.STREAM_FORMAT, *columnar.FORMATS, "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, json_stream, arrow, msgpack or text.")
+    if last_hours and interval != "hourly":
+        raise HTTPException(status_code=400, detail="❌ last_hours is only supported for hourly intervals.")
+    if not last_hours and (not start_time or not end_time):
+        raise HTTPException(status_code=400, detail="❌ start_time and end_time are required unless last_hours is set.")
 
     # Parse multi-select filters (None => no filtering)
     display_types_set = _parse_csv_param(display_type)
@@ -385,7 +681,9 @@ async def get_counter_invasions(
     area_is_global = area.strip().lower() in ["global", "all"]
     area_list = None if area_is_global else _parse_csv_param(area)
 
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets("invasions")
+    elif area_is_global:
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)
     elif area_list:
         area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
@@ -406,27 +704,46 @@ async def get_counter_invasions(
         }.get((counter_type, interval))
 
     # Per-area execution (keeps your per-area offset semantics)
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
-            start_dt = filtering_keys.parse_time_input(start_time, offset)
-            end_dt   = filtering_keys.parse_time_input(end_time,   offset)
+            if last_hours:
+                start_dt = end_dt = None
+            else:
+                start_dt = filtering_keys.parse_time_input(start_time, offset)
+                end_dt   = filtering_keys.parse_time_input(end_time,   offset)
 
             retr = InvasionCounterRetrieval(
                 area=area_name,
                 start=start_dt,
                 end=end_dt,
                 mode=mode,
+                last_hours=last_hours,
                 display_type=display_types_set,
                 character=characters_set,
                 grunt=grunts_set,
                 confirmed=confirmed,
             )
-            method = _method(retr)
-            results[area_name] = await method() if method else {}
+            result = await result_cache.cached_retrieval(
+                f"{counter_type}:{interval}", retr, _counter_method(_method),
+                _CACHE_UNITS[interval], offset, additive=counter_type == "totals",
+            )
+            if retr.window and isinstance(result, dict):
+                result["window"] = retr.window
+            return result
         except Exception as e:
-            results[area_name] = {"error": str(e)}
-
+            return {"error": str(e)}
+
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_counter("invasions", counter_type, interval, area_offsets, start_time, end_time, last_hours)
+    async with admission.admitted("INVASION_GET_COUNTERSERIES", cost):
+        results = await fan_out.fan_out("INVASION_GET_COUNTERSERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
+
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt)
+    if resp_fmt == json_stream.STREAM_FORMAT:
+        return json_stream.streaming_response(results if len(results) != 1 else next(iter(results.values())))
     if resp_fmt == "json":
         return results if len(results) != 1 else next(iter(results.values()))
     else:
@@ -439,13 +756,15 @@ async def get_counter_invasions(
     dependencies=dependencies_list
 )
 @time_execution(label="QUEST_GET_COUNTERSERIES")
+@single_flight.coalesced("QUEST_GET_COUNTERSERIES")
 async def get_counter_quests(
     counter_type: str = Query("totals", description="Type of counter series: totals"),
     interval: str = Query(..., description="Interval: hourly, daily or weekly."),
-    start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
-    end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
+    start_time: Optional[str] = Query(None, description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days'). Not used with last_hours."),
+    end_time: Optional[str] = Query(None, description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now'). Not used with last_hours."),
     mode: str = Query("sum", description="Aggregation mode: 'sum' or 'grouped' or (for hourly only) 'surged'."),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, json_stream, arrow, msgpack or text"),
+    last_hours: Optional[int] = Query(None, ge=1, le=24, description="Hourly interval only: the last N closed hours (1-24), served from the rolling 24h window instead of start_time/end_time."),
     area: str = Query("global", description="Area to filter counters"),
     with_ar: str = Query("all", description="Filter by AR quests: true, false, or all"),
     ar_type: str = Query("all", description="Filter by AR quest type"),
@@ -460,6 +779,10 @@ async def get_counter_quests(
     reward_normal_item_amount: str = Query("all", description="Filter by normal reward item amount"),
     reward_normal_poke_id: str = Query("all", description="Filter by normal reward Pokémon ID"),
     reward_normal_poke_form: str = Query("all", description="Filter by normal reward Pokémon form"),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the entries of these breakdowns or breakdown values (CSV), e.g. quest_mode:ar"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param()
 ):
     # Validate secret parameters
@@ -479,8 +802,12 @@ async def get_counter_quests(
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be one of 'sum', 'grouped', or 'surged'.")
     if mode == "surged" and interval != "hourly":
         raise HTTPException(status_code=400, detail="❌ Surged mode is only supported for hourly intervals.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", json_stream.STREAM_FORMAT, *columnar.FORMATS, "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, json_stream, arrow, msgpack or text.")
+    if last_hours and interval != "hourly":
+        raise HTTPException(status_code=400, detail="❌ last_hours is only supported for hourly intervals.")
+    if not last_hours and (not start_time or not end_time):
+        raise HTTPException(status_code=400, detail="❌ start_time and end_time are required unless last_hours is set.")
 
     with_ar_l = with_ar.strip().lower()
     if with_ar_l not in ("true", "false", "all"):
@@ -505,7 +832,9 @@ async def get_counter_quests(
     area_is_global = area.strip().lower() in ["global", "all"]
     area_list = None if area_is_global else _parse_csv_param(area)
 
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets("quests")
+    elif area_is_global:
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)  # dict[name]=offset
     elif area_list:
         area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
@@ -526,17 +855,20 @@ async def get_counter_quests(
         }.get((counter_type, interval))
 
     # Per-area run
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
-            start_dt = filtering_keys.parse_time_input(start_time, offset)
-            end_dt   = filtering_keys.parse_time_input(end_time,   offset)
+            if last_hours:
+                start_dt = end_dt = None
+            else:
+                start_dt = filtering_keys.parse_time_input(start_time, offset)
+                end_dt   = filtering_keys.parse_time_input(end_time,   offset)
 
             retr = QuestCounterRetrieval(
                 area=area_name,
                 start=start_dt,
                 end=end_dt,
                 mode=mode,
+                last_hours=last_hours,
                 with_ar=with_ar_l,
                 ar_type=ar_type_set,
                 reward_ar_type=reward_ar_type_set,
@@ -551,10 +883,100 @@ async def get_counter_quests(
                 reward_normal_poke_id=reward_normal_poke_id_set,
                 reward_normal_poke_form=reward_normal_poke_form_set,
             )
-            method = _method(retr)
-            results[area_name] = await method() if method else {}
+            result = await result_cache.cached_retrieval(
+                f"{counter_type}:{interval}", retr, _counter_method(_method),
+                _CACHE_UNITS[interval], offset, additive=counter_type == "totals",
+            )
+            if retr.window and isinstance(result, dict):
+                result["window"] = retr.window
+            return result
+        except Exception as e:
+            return {"error": str(e)}
+
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_counter("quests", counter_type, interval, area_offsets, start_time, end_time, last_hours)
+    async with admission.admitted("QUEST_GET_COUNTERSERIES", cost):
+        results = await fan_out.fan_out("QUEST_GET_COUNTERSERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
+
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt)
+    if resp_fmt == json_stream.STREAM_FORMAT:
+        return json_stream.streaming_response(results if len(results) != 1 else next(iter(results.values())))
+    if resp_fmt == "json":
+        return results if len(results) != 1 else next(iter(results.values()))
+    else:
+        return "\n".join(f"{k}: {v}" for k, v in results.items())
+
+
+@router.get(
+    "/api/redis/get_unique_counts",
+    tags=["Unique Counts"],
+    dependencies=dependencies_list
+)
+@time_execution(label="UNIQUE_GET_COUNTS")
+@single_flight.coalesced("UNIQUE_GET_COUNTS")
+async def get_unique_counts(
+    start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
+    end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
+    metric: str = Query("all", description="spawnpoints, users, raid_gyms, invasion_stops (CSV supported) or 'all' for every enabled metric"),
+    mode: str = Query("sum", description="'sum' (one estimate for the whole range) or 'grouped' (one estimate per hour/day)"),
+    interval: str = Query("hourly", description="Bucket size for grouped mode: hourly or daily"),
+    response_format: str = Query("json", description="Response format: json or text"),
+    area: str = Query("global", description="Area name, CSV list, 'global' (one result per area) or '__all__' (global rollup)"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Approximate distinct spawnpoints, scanner usernames, raid gyms and invasion stops
+    (HyperLogLog sketches written at ingest, see UNIQUE_SKETCHES in config.json).
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+
+    if not AppConfig.unique_sketches_enabled:
+        raise HTTPException(status_code=400, detail="❌ Unique sketches are not enabled.")
+
+    mode = mode.lower()
+    interval = interval.lower()
+    resp_fmt = response_format.lower()
+    if mode not in ["sum", "grouped"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be 'sum' or 'grouped'.")
+    if interval not in ["hourly", "daily"]:
+        raise HTTPException(status_code=400, detail="❌ Interval must be hourly or daily.")
+    if resp_fmt not in ["json", "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+
+    metric_set = _parse_csv_param(metric)
+    if metric_set is None:
+        metrics = [m for m in unique_sketches.METRICS if unique_sketches.sketch_enabled(m)]
+    else:
+        metrics = [m.lower() for m in metric_set]
+        unknown = [m for m in metrics if m not in unique_sketches.METRICS]
+        if unknown:
+            raise HTTPException(400, f"❌ Unknown metric(s): {', '.join(unknown)}")
+        disabled = [m for m in metrics if not unique_sketches.sketch_enabled(m)]
+        if disabled:
+            raise HTTPException(400, f"❌ Metric(s) not enabled: {', '.join(disabled)}")
+    if not metrics:
+        raise HTTPException(400, "❌ No unique metrics are enabled.")
+
+    area_offsets = _multi_family_area_offsets(area, [unique_sketches.METRICS[m][0] for m in metrics])
+
+    client = await RedisManager(POOL_QUERY).get_read_client()
+    if not client:
+        raise HTTPException(status_code=503, detail="❌ Redis not available")
+
+    async def _run_area(area_name: str, offset: int) -> dict:
+        try:
+            start_dt = filtering_keys.parse_time_input(start_time, offset)
+            end_dt   = filtering_keys.parse_time_input(end_time,   offset)
+            return await unique_sketches.estimate_unique(
+                client, metrics, area_name, start_dt, end_dt, mode=mode, interval=interval, offset=offset
+            )
         except Exception as e:
-            results[area_name] = {"error": str(e)}
+            return {"error": str(e)}
+
+    results = await fan_out.fan_out("UNIQUE_GET_COUNTS", area_offsets, _run_area)
 
     if resp_fmt == "json":
         return results if len(results) != 1 else next(iter(results.values()))
@@ -562,20 +984,90 @@ async def get_counter_quests(
         return "\n".join(f"{k}: {v}" for k, v in results.items())
 
 
+@router.get(
+    "/api/redis/get_top_k",
+    tags=["Top-K"],
+    dependencies=dependencies_list
+)
+@time_execution(label="TOP_K_GET")
+@single_flight.coalesced("TOP_K_GET")
+async def get_top_k(
+    start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
+    end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
+    metric: str = Query("pokemon_total", description="pokemon_total, pokemon_iv100, pokemon_iv0, pokemon_pvp_little, pokemon_pvp_great, pokemon_pvp_ultra, pokemon_shiny, raid_bosses, quest_rewards, invasion_characters (CSV supported)"),
+    k: int = Query(20, ge=1, le=500, description="Number of entries per metric"),
+    interval: str = Query("daily", description="Buckets to read: daily or weekly (whole days/weeks touched by the range)"),
+    response_format: str = Query("json", description="Response format: json or text"),
+    area: str = Query("global", description="Area name, CSV list, 'global' (one result per area) or '__all__' (global rollup)"),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Highest-count species/forms, raid bosses, quest rewards or invasion characters, read from the
+    leaderboards kept at ingest (see TOP_K in config.json) instead of a grouped counter scan.
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+
+    if not AppConfig.top_k_enabled:
+        raise HTTPException(status_code=400, detail="❌ Top-K leaderboards are not enabled.")
+
+    interval = interval.lower()
+    resp_fmt = response_format.lower()
+    if interval not in ["daily", "weekly"]:
+        raise HTTPException(status_code=400, detail="❌ Interval must be daily or weekly.")
+    if resp_fmt not in ["json", "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+
+    metrics = sorted(m.lower() for m in (_parse_csv_param(metric) or []))
+    if not metrics:
+        raise HTTPException(400, "❌ metric is required.")
+    unknown = [m for m in metrics if m not in top_k.METRICS]
+    if unknown:
+        raise HTTPException(400, f"❌ Unknown metric(s): {', '.join(unknown)}")
+    disabled = [m for m in metrics if not top_k.top_k_enabled(m)]
+    if disabled:
+        raise HTTPException(400, f"❌ Metric(s) not enabled: {', '.join(disabled)}")
+
+    area_offsets = _multi_family_area_offsets(area, [top_k.METRICS[m][0] for m in metrics])
+
+    client = await RedisManager(POOL_QUERY).get_read_client()
+    if not client:
+        raise HTTPException(status_code=503, detail="❌ Redis not available")
+
+    async def _run_area(area_name: str, offset: int) -> dict:
+        try:
+            start_dt = filtering_keys.parse_time_input(start_time, offset)
+            end_dt   = filtering_keys.parse_time_input(end_time,   offset)
+            return await top_k.top_k(client, metrics, area_name, start_dt, end_dt, k=k, interval=interval)
+        except Exception as e:
+            return {"error": str(e)}
+
+    results = await fan_out.fan_out("TOP_K_GET", area_offsets, _run_area)
+
+    if resp_fmt == "json":
+        return results if len(results) != 1 else next(iter(results.values()))
+    else:
+        return "\n".join(f"{name}: {v}" for name, v in results.items())
+
+
 @router.get(
     "/api/redis/get_pokemon_timeseries",
     tags=["Pokémon TimeSeries"],
     dependencies=dependencies_list
 )
 @time_execution(label="POKEMON_GET_TIMESERIES")
+@single_flight.coalesced("POKEMON_GET_TIMESERIES")
 async def get_pokemon_timeseries(
     start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
     end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
     mode: str = Query("sum", description="Aggregation mode: 'sum' or 'grouped' or (for hourly only) 'surged'."),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, arrow, msgpack or text"),
     area: str = Query("global", description="Area to filter"),
     pokemon_id: str = Query("all", description="Pokémon ID"),
     form: str = Query("all", description="Pokémon form"),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the entries of these metrics (CSV), e.g. shiny,iv100"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param()
 ):
     # Validate secret parameters
@@ -587,8 +1079,8 @@ async def get_pokemon_timeseries(
 
     if mode not in ["sum", "grouped", "surged"]:
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be one of 'sum', 'grouped', or 'surged'.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(400, "❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", *columnar.FORMATS, "text"]:
+        raise HTTPException(400, "❌ Invalid response_format. Must be json, arrow, msgpack or text.")
 
     # Parse multi-select (None means "all")
     pokemon_ids_set = _parse_csv_param(pokemon_id)
@@ -598,7 +1090,9 @@ async def get_pokemon_timeseries(
     area_is_global = area.strip().lower() in ["global", "all"]
     area_list = None if area_is_global else _parse_csv_param(area)
 
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets("pokemon")
+    elif area_is_global:
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)
     elif area_list:
         area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
@@ -610,8 +1104,7 @@ async def get_pokemon_timeseries(
             raise HTTPException(400, f"❌ Area not found: {area}")
         area_offsets = resolved
 
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
             start_dt = filtering_keys.parse_time_input(start_time, offset)
             end_dt   = filtering_keys.parse_time_input(end_time,   offset)
@@ -624,10 +1117,21 @@ async def get_pokemon_timeseries(
                 pokemon_id=pokemon_ids_set,
                 form=forms_set,
             )
-            results[area_name] = await ts.retrieve_timeseries()
+            return await result_cache.cached_retrieval(
+                "timeseries", ts, lambda r: r.retrieve_timeseries(), "minute", offset,
+            )
         except Exception as e:
-            results[area_name] = {"mode": mode, "error": str(e)}
+            return {"mode": mode, "error": str(e)}
+
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_series("pokemon", area_offsets, start_time, end_time)
+    async with admission.admitted("POKEMON_GET_TIMESERIES", cost):
+        results = await fan_out.fan_out("POKEMON_GET_TIMESERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
 
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt, pokemon=True)
     if resp_fmt == "json":
         return results if len(results) != 1 else next(iter(results.values()))
     else:
@@ -640,13 +1144,18 @@ async def get_pokemon_timeseries(
     dependencies=dependencies_list
 )
 @time_execution(label="POKEMON_GET_TTH_TIMESERIES")
+@single_flight.coalesced("POKEMON_GET_TTH_TIMESERIES")
 async def get_pokemon_tth_timeseries(
     start_time: str = Query(..., description="Start time as ISO format or relative (e.g., '1 month')"),
     end_time: str = Query(..., description="End time as ISO format or relative (e.g., 'now')"),
     mode: str = Query("sum", description="Aggregation mode: 'sum', 'grouped', or 'surged'"),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, arrow, msgpack or text"),
     area: str = Query("global", description="Area to filter"),
     tth_bucket: str = Query("all", description="TTH bucket filter (e.g., '10_15'; use 'all' to match any)"),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the entries of these TTH buckets (CSV), e.g. 0_5,5_10"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param()
 ):
     await secure_api.check_secret_header_value(api_secret_header)
@@ -656,8 +1165,8 @@ async def get_pokemon_tth_timeseries(
 
     if mode not in ["sum", "grouped", "surged"]:
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be 'sum', 'grouped', or 'surged'.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", *columnar.FORMATS, "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, arrow, msgpack or text.")
 
     # CSV -> set[str] or None (None == no filtering/"all")
     tth_buckets_set = _parse_csv_param(tth_bucket)
@@ -666,7 +1175,9 @@ async def get_pokemon_tth_timeseries(
     area_is_global = area.strip().lower() in ["global", "all"]
     area_list = None if area_is_global else _parse_csv_param(area)
 
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets("pokemon_tth")
+    elif area_is_global:
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)
     elif area_list:
         area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
@@ -678,8 +1189,7 @@ async def get_pokemon_tth_timeseries(
             raise HTTPException(400, f"❌ Area not found: {area}")
         area_offsets = resolved
 
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
             start_dt = filtering_keys.parse_time_input(start_time, offset)
             end_dt   = filtering_keys.parse_time_input(end_time,   offset)
@@ -691,10 +1201,21 @@ async def get_pokemon_tth_timeseries(
                 tth_bucket=tth_buckets_set,
                 mode=mode,
             )
-            results[area_name] = await ts.retrieve_timeseries()
+            return await result_cache.cached_retrieval(
+                "timeseries", ts, lambda r: r.retrieve_timeseries(), "minute", offset,
+            )
         except Exception as e:
-            results[area_name] = {"mode": mode, "error": str(e)}
+            return {"mode": mode, "error": str(e)}
+
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_series("tth", area_offsets, start_time, end_time)
+    async with admission.admitted("POKEMON_GET_TTH_TIMESERIES", cost):
+        results = await fan_out.fan_out("POKEMON_GET_TTH_TIMESERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
 
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt)
     if resp_fmt == "json":
         return results if len(results) != 1 else next(iter(results.values()))
     else:
@@ -707,15 +1228,20 @@ async def get_pokemon_tth_timeseries(
     dependencies=dependencies_list
 )
 @time_execution(label="RAID_GET_TIMESERIES")
+@single_flight.coalesced("RAID_GET_TIMESERIES")
 async def get_raid_timeseries(
     start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
     end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
     mode: str = Query("sum", description="Aggregation mode: 'sum' or 'grouped' or (for hourly only) 'surged'."),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, arrow, msgpack or text"),
     area: str = Query("global", description="Area to filter"),
     raid_pokemon: str = Query("all", description="all or Pokémon ID"),
     raid_form: str = Query("all", description="all or Form ID"),
     raid_level: str = Query("all", description="all or Raid Level"),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the entries of these breakdowns or breakdown values (CSV), e.g. raid_level:5"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param()
 ):
     # Validate secret parameters
@@ -727,8 +1253,8 @@ async def get_raid_timeseries(
 
     if mode not in ["sum", "grouped", "surged"]:
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be one of 'sum', 'grouped', or 'surged'.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", *columnar.FORMATS, "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, arrow, msgpack or text.")
 
     # Parse multi-select (None means "all")
     raid_pokemon_set = _parse_csv_param(raid_pokemon)
@@ -739,7 +1265,9 @@ async def get_raid_timeseries(
     area_is_global = area.strip().lower() in ["global", "all"]
     area_list = None if area_is_global else _parse_csv_param(area)
 
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets("raids")
+    elif area_is_global:
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)
     elif area_list:
         area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
@@ -751,8 +1279,7 @@ async def get_raid_timeseries(
             raise HTTPException(400, f"❌ Area not found: {area}")
         area_offsets = resolved
 
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
             start_dt = filtering_keys.parse_time_input(start_time, offset)
             end_dt   = filtering_keys.parse_time_input(end_time,   offset)
@@ -766,10 +1293,21 @@ async def get_raid_timeseries(
                 raid_form=raid_form_set,
                 raid_level=raid_level_set,
             )
-            results[area_name] = await raid_timeseries.raid_retrieve_timeseries()
+            return await result_cache.cached_retrieval(
+                "timeseries", raid_timeseries, lambda r: r.raid_retrieve_timeseries(), "minute", offset,
+            )
         except Exception as e:
-            results[area_name] = {"mode": mode, "error": str(e)}
+            return {"mode": mode, "error": str(e)}
 
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_series("raids", area_offsets, start_time, end_time)
+    async with admission.admitted("RAID_GET_TIMESERIES", cost):
+        results = await fan_out.fan_out("RAID_GET_TIMESERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
+
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt)
     if resp_fmt == "json":
         return results if len(results) != 1 else next(iter(results.values()))
     else:
@@ -782,15 +1320,20 @@ async def get_raid_timeseries(
     dependencies=dependencies_list
 )
 @time_execution(label="INVASION_GET_TIMESERIES")
+@single_flight.coalesced("INVASION_GET_TIMESERIES")
 async def get_invasion_timeseries(
     start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
     end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
     mode: str = Query("sum", description="Aggregation mode: 'sum' or 'grouped' or (for hourly only) 'surged'."),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, arrow, msgpack or text"),
     area: str = Query("global", description="Area to filter"),
     display: str = Query("all", description="all or Invasion Display ID"),
     grunt: str = Query("all", description="all or Grunt ID"),
     confirmed: str = Query("all", description="0 or 1 (confirmed or not details)."),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the entries of these display_type:grunt:confirmed groups (CSV), e.g. 1:4:1"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param()
 ):
     # Validate secret parameters
@@ -802,8 +1345,8 @@ async def get_invasion_timeseries(
 
     if mode not in ["sum", "grouped", "surged"]:
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be one of 'sum', 'grouped', or 'surged'.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", *columnar.FORMATS, "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, arrow, msgpack or text.")
 
     # Parse multi-select (None means "all")
     displays_set = _parse_csv_param(display)
@@ -813,7 +1356,9 @@ async def get_invasion_timeseries(
     area_is_global = area.strip().lower() in ["global", "all"]
     area_list = None if area_is_global else _parse_csv_param(area)
 
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets("invasions")
+    elif area_is_global:
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)
     elif area_list:
         area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
@@ -825,8 +1370,7 @@ async def get_invasion_timeseries(
             raise HTTPException(400, f"❌ Area not found: {area}")
         area_offsets = resolved
 
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
             start_dt = filtering_keys.parse_time_input(start_time, offset)
             end_dt   = filtering_keys.parse_time_input(end_time,   offset)
@@ -841,10 +1385,21 @@ async def get_invasion_timeseries(
                 confirmed=confirmed,
             )
 
-            results[area_name] = await invasion_timeseries.invasion_retrieve_timeseries()
+            return await result_cache.cached_retrieval(
+                "timeseries", invasion_timeseries, lambda r: r.invasion_retrieve_timeseries(), "minute", offset,
+            )
         except Exception as e:
-            results[area_name] = {"mode": mode, "error": str(e)}
+            return {"mode": mode, "error": str(e)}
+
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_series("invasions", area_offsets, start_time, end_time)
+    async with admission.admitted("INVASION_GET_TIMESERIES", cost):
+        results = await fan_out.fan_out("INVASION_GET_TIMESERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
 
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt)
     if resp_fmt == "json":
         return results if len(results) != 1 else next(iter(results.values()))
     else:
@@ -857,14 +1412,19 @@ async def get_invasion_timeseries(
     dependencies=dependencies_list
 )
 @time_execution(label="QUEST_GET_TIMESERIES")
+@single_flight.coalesced("QUEST_GET_TIMESERIES")
 async def get_quest_timeseries(
     start_time: str = Query(..., description="Start time as ISO format (e.g., 2023-03-05T00:00:00) or relative (e.g., '1 month', '10 days')"),
     end_time: str = Query(..., description="End time as ISO format (e.g., 2023-03-15T23:59:59) or relative (e.g., 'now')"),
     mode: str = Query("sum", description="Aggregation mode: 'sum' or 'grouped' or (for hourly only) 'surged'."),
-    response_format: str = Query("json", description="Response format: json or text"),
+    response_format: str = Query("json", description="Response format: json, arrow, msgpack or text"),
     area: str = Query("global", description="Area to filter"),
     quest_mode: str = Query("all", description="all or AR or NORMAL"),
     quest_type: str = Query("all", description="all or Quest Type ID"),
+    sort: str = Query("none", description="Grouped mode only: order of the entries: count_desc, count_asc, key, or none (result order)"),
+    limit: Optional[int] = Query(None, ge=1, description="Grouped mode only: entries per page (per area)"),
+    page_offset: int = Query(0, ge=0, alias="offset", description="Grouped mode only: entries skipped before the page"),
+    metric_filter: str = Query("all", description="Grouped mode only: keep the series whose key ends in one of these reward Pokémon forms (CSV), e.g. 0"),
     api_secret_header: Optional[str] = secure_api.get_secret_header_param()
 ):
     # Validate secret parameters
@@ -875,8 +1435,8 @@ async def get_quest_timeseries(
     resp_fmt = response_format.lower()
     if mode not in ["sum", "grouped", "surged"]:
         raise HTTPException(status_code=400, detail="❌ Invalid mode. Must be one of 'sum', 'grouped', or 'surged'.")
-    if resp_fmt not in ["json", "text"]:
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if resp_fmt not in ["json", *columnar.FORMATS, "text"]:
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, arrow, msgpack or text.")
 
     # Parse multi-select (None means "all")
     quest_types_set = _parse_csv_param(quest_type)
@@ -885,7 +1445,9 @@ async def get_quest_timeseries(
     area_is_global = area.strip().lower() in ["global", "all"]
     area_list = None if area_is_global else _parse_csv_param(area)
 
-    if area_is_global:
+    if global_rollup.is_global_area(area):
+        area_offsets = _global_rollup_offsets("quests")
+    elif area_is_global:
         area_offsets = filtering_keys.get_area_offset("global", global_state.geofences)
     elif area_list:
         area_offsets = filtering_keys.get_area_offsets_for_list(list(area_list), global_state.geofences)
@@ -897,8 +1459,7 @@ async def get_quest_timeseries(
             raise HTTPException(400, f"❌ Area not found: {area}")
         area_offsets = resolved
 
-    results = {}
-    for area_name, offset in area_offsets.items():
+    async def _run_area(area_name: str, offset: int) -> dict:
         try:
             start_dt = filtering_keys.parse_time_input(start_time, offset)
             end_dt   = filtering_keys.parse_time_input(end_time,   offset)
@@ -912,10 +1473,21 @@ async def get_quest_timeseries(
                 field_details=quest_types_set,
             )
 
-            results[area_name] = await quest_timeseries.quest_retrieve_timeseries()
+            return await result_cache.cached_retrieval(
+                "timeseries", quest_timeseries, lambda r: r.quest_retrieve_timeseries(), "minute", offset,
+            )
         except Exception as e:
-            results[area_name] = {"mode": mode, "error": str(e)}
+            return {"mode": mode, "error": str(e)}
+
+    page = paging.PageSpec.parse(mode, sort, limit, page_offset, metric_filter)
+    cost = await admission.estimate_series("quests", area_offsets, start_time, end_time)
+    async with admission.admitted("QUEST_GET_TIMESERIES", cost):
+        results = await fan_out.fan_out("QUEST_GET_TIMESERIES", area_offsets, _run_area)
+    if page:
+        results = page.apply(results)
 
+    if resp_fmt in columnar.FORMATS:
+        return columnar.series_response(results, resp_fmt)
     if resp_fmt == "json":
         return results if len(results) != 1 else next(iter(results.values()))
     else:
@@ -931,7 +1503,7 @@ async def get_quest_timeseries(
 async def get_pokemon_heatmap_data(
     start_time: str = Query(..., description="ISO or relative (e.g., '10 hours')"),
     end_time: str   = Query(..., description="ISO or 'now' / relative"),
-    response_format: str = Query("json", description="json or text"),
+    response_format: str = Query("json", description="json, json_stream, arrow, msgpack or text"),
     area: str       = Query(..., description="Single area name (exactly one; no lists)"),
     pokemon_id: str = Query("all", description="CSV of Pokémon IDs or 'all'"),
     form: str       = Query("all", description="CSV of forms or 'all'"),
@@ -944,8 +1516,8 @@ async def get_pokemon_heatmap_data(
     await secure_api.check_secret_header_value(api_secret_header)
 
     fmt = (response_format or "json").lower()
-    if fmt not in ("json", "text"):
-        raise HTTPException(status_code=400, detail="❌ response_format must be json or text")
+    if fmt not in ("json", json_stream.STREAM_FORMAT, *columnar.FORMATS, "text"):
+        raise HTTPException(status_code=400, detail="❌ response_format must be json, json_stream, arrow, msgpack or text")
 
     # area to id - one area only
     area_norm = (area or "").strip()
@@ -992,6 +1564,10 @@ async def get_pokemon_heatmap_data(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"❌ Query failed: {e}")
 
+    if fmt in columnar.FORMATS:
+        return columnar.rows_response(result, fmt)
+    if fmt == json_stream.STREAM_FORMAT:
+        return json_stream.streaming_response(result)
     if fmt == "json":
         return result
 
@@ -1080,7 +1656,7 @@ async def get_shiny_rate_data(
 async def get_raid_data(
     start_time: str = Query(..., description="ISO or relative (e.g., '10 hours')"),
     end_time: str   = Query(..., description="ISO or 'now' / relative"),
-    response_format: str = Query("json", description="json or text"),
+    response_format: str = Query("json", description="json, json_stream, arrow, msgpack or text"),
     area: str = Query(..., description="Single area name (exactly one; no lists)"),
     gym_id: str = Query("all"), raid_pokemon: str = Query("all"),
     raid_level: str = Query("all"), raid_form: str = Query("all"),
@@ -1093,8 +1669,8 @@ async def get_raid_data(
     await secure_api.check_secret_header_value(api_secret_header)
 
     fmt = (response_format or "json").lower()
-    if fmt not in ("json", "text"):
-        raise HTTPException(status_code=400, detail="❌ response_format must be json or text.")
+    if fmt not in ("json", json_stream.STREAM_FORMAT, *columnar.FORMATS, "text"):
+        raise HTTPException(status_code=400, detail="❌ response_format must be json, json_stream, arrow, msgpack or text.")
 
     # Area to id - exactly one area
     area_norm = (area or "").strip()
@@ -1161,6 +1737,10 @@ async def get_raid_data(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"❌ Query failed: {e}")
 
+    if fmt in columnar.FORMATS:
+        return columnar.rows_response(result, fmt)
+    if fmt == json_stream.STREAM_FORMAT:
+        return json_stream.streaming_response(result)
     if fmt == "json":
         return result
 
@@ -1184,7 +1764,7 @@ async def get_raid_data(
 async def get_invasion_data(
     start_time: str = Query(..., description="ISO or relative (e.g., '10 hours')"),
     end_time: str   = Query(..., description="ISO or 'now' / relative"),
-    response_format: str = Query("json", description="json or text"),
+    response_format: str = Query("json", description="json, json_stream, arrow, msgpack or text"),
     area: str = Query(..., description="Single area name (exactly one; no lists)"),
     pokestop_id: str = Query("all", description="CSV of pokestop ids or 'all'"),
     display_type: str = Query("all", description="CSV of invasion display types or 'all'"),
@@ -1198,8 +1778,8 @@ async def get_invasion_data(
     await secure_api.check_secret_header_value(api_secret_header)
 
     fmt = (response_format or "json").lower()
-    if fmt not in ("json", "text"):
-        raise HTTPException(status_code=400, detail="❌ response_format must be json or text.")
+    if fmt not in ("json", json_stream.STREAM_FORMAT, *columnar.FORMATS, "text"):
+        raise HTTPException(status_code=400, detail="❌ response_format must be json, json_stream, arrow, msgpack or text.")
 
     # one area only
     area_norm = (area or "").strip()
@@ -1256,6 +1836,10 @@ async def get_invasion_data(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"❌ Query failed: {e}")
 
+    if fmt in columnar.FORMATS:
+        return columnar.rows_response(result, fmt)
+    if fmt == json_stream.STREAM_FORMAT:
+        return json_stream.streaming_response(result)
     if fmt == "json":
         return result
 
@@ -1278,7 +1862,7 @@ async def get_invasion_data(
 async def get_quest_data(
     start_time: str = Query(..., description="ISO or relative (e.g., '10 hours')"),
     end_time: str   = Query(..., description="ISO or 'now' / relative"),
-    response_format: str = Query("json", description="json or text"),
+    response_format: str = Query("json", description="json, json_stream, arrow, msgpack or text"),
     area: str = Query(..., description="Single area name (exactly one; no lists)"),
     pokestop_id: str = Query("all", description="CSV of pokestop IDs or 'all'"),
     quest_type: str = Query("all", description="'all' | 'ar' | 'normal'"),
@@ -1295,8 +1879,8 @@ async def get_quest_data(
     await secure_api.check_secret_header_value(api_secret_header)
 
     fmt = (response_format or "json").lower()
-    if fmt not in ("json", "text"):
-        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json or text.")
+    if fmt not in ("json", json_stream.STREAM_FORMAT, *columnar.FORMATS, "text"):
+        raise HTTPException(status_code=400, detail="❌ Invalid response_format. Must be json, json_stream, arrow, msgpack or text.")
 
     # area
     area_norm = (area or "").strip()
@@ -1384,6 +1968,10 @@ async def get_quest_data(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"❌ Query failed: {e}")
 
+    if fmt in columnar.FORMATS:
+        return columnar.rows_response(result, fmt)
+    if fmt == json_stream.STREAM_FORMAT:
+        return json_stream.streaming_response(result)
     if fmt == "json":
         return result
 
@@ -1400,3 +1988,36 @@ async def get_quest_data(
         lines.append(f"{r['latitude']},{r['longitude']} -> {r['count']} "
                      f"(pokestop={r['pokestop']} mode={r['mode']} task_type={r['task_type']})")
     return "\n".join(lines)
+
+
+# Allowed GET routes a batch can't answer with a JSON result
+_NOT_BATCHABLE = {"/api/redis/live_counters"}
+
+def _batch_endpoints() -> dict:
+    """The data endpoints a batch may call: every other allowed GET route of this router."""
+    return {
+        route.path: route.endpoint
+        for route in router.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods
+        and route.path in secure_api.ALLOWED_PATHS and route.path not in _NOT_BATCHABLE
+    }
+
+
+@router.post(
+    "/api/batch",
+    tags=["Batch"],
+    dependencies=dependencies_list
+)
+@time_execution(label="BATCH")
+async def post_batch(
+    payload: dict = Body(..., description='{"queries": [{"id": "...", "endpoint": "/api/redis/...", "params": {...}}]}. Results come back keyed by id (or position) as {"status", "result"} or {"status", "error"}.'),
+    api_secret_header: Optional[str] = secure_api.get_secret_header_param()
+):
+    """
+    Run several data queries in one request. Queries run concurrently under a shared budget and are answered as JSON.
+    """
+    await secure_api.check_secret_header_value(api_secret_header)
+    if not AppConfig.batch_enabled:
+        raise HTTPException(status_code=400, detail="❌ Batch queries are not enabled.")
+    results = await batch.run_batch(payload.get("queries"), _batch_endpoints(), api_secret_header)
+    return {"data": results}
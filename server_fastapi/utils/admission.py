@@ -0,0 +1,303 @@
+"""
+Query cost estimation and admission control for the counter and timeseries endpoints
+(ADMISSION in config.json).
+
+Before a query runs, its cost is estimated from the keys it will read:
+
+- Counter series read one hash per area and bucket of the interval (hour, day, Monday-aligned
+  week, month; the weather counters one per boost as well):
+    keys = areas * buckets in the range, fields = keys * average fields of such a hash
+- Timeseries read every series hash of the area (one per metric, Pokémon and form, ...) and the
+  minute fields of the range:
+    keys = series hashes of the areas, fields = keys * min(average fields, minutes in the range)
+
+Key counts and average field counts per family and area come from the latest memory report
+(MEMORY_REPORT), with defaults while there is none. Filters are not taken into account, so the
+estimate is an upper bound.
+
+- Above max_fields a query is rejected with 413 and its estimate.
+- Above heavy_fields a query is "heavy": it needs one of max_heavy_per_client slots of its client
+  and one of max_heavy_global slots of the worker. When they are taken it waits up to
+  queue_seconds for them, then gets 429. The heavy queries of one batch request share their
+  client's slots, so they run one after the other (with the default of one slot per client).
+
+Lighter queries run as before, so the dashboard's usual requests are unaffected while a few
+careless range scans can't take all of Redis away from the ingest pipeline.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from math import ceil
+from time import monotonic
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException, Request
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils.filtering_keys import parse_time_input
+from my_redis.utils.memory_report import get_memory_report
+from utils.logger import logger
+
+# How long a worker uses a memory report before reading the latest one again
+REPORT_REFRESH_SECONDS = 300
+# Used while there is no memory report (or it has no entry for the family)
+DEFAULT_COUNTER_FIELDS = 2000
+DEFAULT_SERIES_KEYS = 2000
+DEFAULT_SERIES_FIELDS = 1440
+
+# (endpoint family, counter_type, interval) -> (counter key family, keys per area and bucket)
+COUNTER_KEYS = {
+    ("pokemon", "totals", "hourly"):    ("counter:pokemon_hourly", 1),
+    ("pokemon", "totals", "daily"):     ("counter:pokemon_daily", 1),
+    ("pokemon", "totals", "weekly"):    ("counter:pokemon_total", 1),
+    ("pokemon", "tth", "hourly"):       ("counter:tth_pokemon_hourly", 1),
+    ("pokemon", "tth", "daily"):        ("counter:tth_pokemon_daily", 1),
+    ("pokemon", "tth", "weekly"):       ("counter:tth_pokemon", 1),
+    ("pokemon", "weather", "monthly"):  ("counter:pokemon_weather_iv", 10),
+    ("raids", "totals", "hourly"):      ("counter:raid_hourly", 1),
+    ("raids", "totals", "daily"):       ("counter:raid_daily", 1),
+    ("raids", "totals", "weekly"):      ("counter:raid_total", 1),
+    ("invasions", "totals", "hourly"):  ("counter:invasion_hourly", 1),
+    ("invasions", "totals", "daily"):   ("counter:invasion_daily", 1),
+    ("invasions", "totals", "weekly"):  ("counter:invasion", 1),
+    ("quests", "totals", "hourly"):     ("counter:quest_hourly", 1),
+    ("quests", "totals", "daily"):      ("counter:quest_daily", 1),
+    ("quests", "totals", "weekly"):     ("counter:quest", 1),
+}
+
+# endpoint family -> timeseries key family
+SERIES_KEYS = {
+    "pokemon":   "ts:pokemon",
+    "tth":       "ts:tth_pokemon",
+    "raids":     "ts:raids_total",
+    "invasions": "ts:invasion",
+    "quests":    "ts:quests_total",
+}
+
+# The client of the current request, set by the remember_client dependency
+current_client: ContextVar[Optional[str]] = ContextVar("admission_client", default=None)
+
+_report: Optional[dict] = None
+_report_read_at: Optional[float] = None
+
+_heavy_slots = asyncio.Semaphore(AppConfig.admission_max_heavy_global)
+_heavy_running = 0
+_heavy_per_client: Dict[str, int] = {}              # heavy queries running per client
+_client_slots: Dict[str, asyncio.Semaphore] = {}    # per-client slots, while the client has heavy queries
+_client_users: Dict[str, int] = {}                  # heavy queries waiting or running per client
+
+stats = {
+    "estimated": 0,
+    "heavy_admitted": 0,
+    "queued": 0,
+    "rejected_too_large": 0,   # 413: over max_fields
+    "rejected_busy": 0,        # 429: no heavy slot for the client or the worker
+}
+
+
+class Cost:
+    """Estimated keys and hash fields a query reads."""
+
+    def __init__(self, keys: int, fields: int):
+        self.keys = keys
+        self.fields = fields
+
+    @property
+    def heavy(self) -> bool:
+        return self.fields > AppConfig.admission_heavy_fields
+
+    def __str__(self) -> str:
+        return f"~{self.keys:,} keys / ~{self.fields:,} hash fields"
+
+
+def admission_stats() -> dict:
+    return {
+        "enabled": AppConfig.admission_enabled,
+        "max_fields": AppConfig.admission_max_fields,
+        "heavy_fields": AppConfig.admission_heavy_fields,
+        "heavy_running": _heavy_running,
+        "heavy_per_client": dict(_heavy_per_client),
+        "report_age_seconds": None if _report_read_at is None else round(monotonic() - _report_read_at),
+        **stats,
+    }
+
+
+async def remember_client(request: Request) -> None:
+    """Route dependency: records the client address for the per-client heavy query limit."""
+    current_client.set(request.client.host if request.client else None)
+
+
+async def _memory_report() -> Optional[dict]:
+    global _report, _report_read_at
+    if _report_read_at is None or monotonic() - _report_read_at > REPORT_REFRESH_SECONDS:
+        _report_read_at = monotonic()
+        try:
+            client = await RedisManager(POOL_QUERY).get_read_client()
+            if client:
+                _report = await get_memory_report(client)
+        except Exception as e:
+            logger.warning(f"⚠️ Admission could not read the memory report: {e}")
+    return _report
+
+
+def _group(report: Optional[dict], family: str, area: str) -> tuple[dict, dict]:
+    """(area stats, family stats) of the report, {} where it has none."""
+    if not report:
+        return {}, {}
+    area_stats = report.get("areas", {}).get(family, {}).get(area) or {}
+    return area_stats, report.get("families", {}).get(family, {})
+
+
+def _monday(dt: datetime):
+    return dt.date() - timedelta(days=dt.weekday())
+
+
+def _buckets(unit: str, start: datetime, end: datetime) -> int:
+    if end < start:
+        return 0
+    if unit == "hour":
+        return int((end - start).total_seconds() // 3600) + 1
+    if unit == "day":
+        return (end.date() - start.date()).days + 1
+    if unit == "week":
+        return (_monday(end) - _monday(start)).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def _range(start_time: Optional[str], end_time: Optional[str]) -> Optional[tuple]:
+    # Area offsets move a range by a few hours, which doesn't matter for an estimate
+    try:
+        return parse_time_input(start_time), parse_time_input(end_time)
+    except (AttributeError, ValueError):
+        return None  # the endpoint reports the invalid input itself
+
+
+async def estimate_counter(family: str, counter_type: str, interval: str, area_offsets: Dict[str, int],
+                           start_time: Optional[str], end_time: Optional[str],
+                           last_hours: Optional[int] = None) -> Optional[Cost]:
+    """The cost of a counter series query, None when it can't be estimated (or ADMISSION is off)."""
+    spec = COUNTER_KEYS.get((family, counter_type, interval))
+    if not AppConfig.admission_enabled or spec is None:
+        return None
+    key_family, keys_per_bucket = spec
+    if last_hours:
+        buckets = last_hours
+    else:
+        time_range = _range(start_time, end_time)
+        if time_range is None:
+            return None
+        unit = {"hourly": "hour", "daily": "day", "weekly": "week", "monthly": "month"}[interval]
+        buckets = _buckets(unit, *time_range)
+
+    report = await _memory_report()
+    keys = fields = 0
+    for area in area_offsets:
+        area_stats, family_stats = _group(report, key_family, area)
+        avg_fields = area_stats.get("avg_fields") or family_stats.get("avg_fields") or DEFAULT_COUNTER_FIELDS
+        area_keys = buckets * keys_per_bucket
+        keys += area_keys
+        fields += int(area_keys * avg_fields)
+    stats["estimated"] += 1
+    return Cost(keys, fields)
+
+
+async def estimate_series(family: str, area_offsets: Dict[str, int],
+                          start_time: Optional[str], end_time: Optional[str]) -> Optional[Cost]:
+    """The cost of a timeseries query, None when it can't be estimated (or ADMISSION is off)."""
+    key_family = SERIES_KEYS.get(family)
+    if not AppConfig.admission_enabled or key_family is None:
+        return None
+    time_range = _range(start_time, end_time)
+    if time_range is None:
+        return None
+    minutes = max(0, ceil((time_range[1] - time_range[0]).total_seconds() / 60))
+
+    report = await _memory_report()
+    keys = fields = 0
+    for area in area_offsets:
+        area_stats, family_stats = _group(report, key_family, area)
+        area_keys = area_stats.get("keys") or DEFAULT_SERIES_KEYS
+        avg_fields = area_stats.get("avg_fields") or family_stats.get("avg_fields") or DEFAULT_SERIES_FIELDS
+        keys += area_keys
+        fields += int(area_keys * min(avg_fields, minutes))
+    stats["estimated"] += 1
+    return Cost(keys, fields)
+
+
+async def _acquire(slots: asyncio.Semaphore, deadline: float, cost: Cost, busy: str) -> None:
+    """Takes one of the slots, waiting until the deadline; 429 when none frees up by then."""
+    if not slots.locked():
+        await slots.acquire()
+        return
+    stats["queued"] += 1
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=max(0.0, deadline - monotonic()))
+    except asyncio.TimeoutError:
+        stats["rejected_busy"] += 1
+        raise HTTPException(
+            status_code=429,
+            detail=(
+                f"❌ Heavy query ({cost} estimated): {busy} stayed busy for "
+                f"{AppConfig.admission_queue_seconds:g}s, try again later."
+            ),
+            headers={"Retry-After": str(max(1, ceil(AppConfig.admission_queue_seconds)))},
+        )
+
+
+@asynccontextmanager
+async def admitted(label: str, cost: Optional[Cost]) -> AsyncIterator[None]:
+    """
+    Runs the body if the query is admitted: 413 above max_fields, 429 when a heavy query gets no
+    slot of its client and of the worker within queue_seconds.
+    """
+    global _heavy_running
+    if cost is None:
+        yield
+        return
+
+    if cost.fields > AppConfig.admission_max_fields:
+        stats["rejected_too_large"] += 1
+        logger.warning(f"⚠️ {label} rejected: {cost} estimated")
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"❌ Query too large: {cost} estimated, the limit is {AppConfig.admission_max_fields:,} fields. "
+                "Narrow the time range or the areas, or use a coarser interval."
+            ),
+        )
+    if not cost.heavy:
+        yield
+        return
+
+    client = current_client.get() or "-"
+    deadline = monotonic() + AppConfig.admission_queue_seconds
+    client_slots = _client_slots.setdefault(client, asyncio.Semaphore(AppConfig.admission_max_heavy_per_client))
+    _client_users[client] = _client_users.get(client, 0) + 1
+    try:
+        await _acquire(client_slots, deadline, cost,
+                       f"the {AppConfig.admission_max_heavy_per_client} heavy query slots of this client")
+        try:
+            await _acquire(_heavy_slots, deadline, cost,
+                           f"all {AppConfig.admission_max_heavy_global} heavy query slots")
+            stats["heavy_admitted"] += 1
+            logger.info(f"🏋️ {label} admitted as heavy query: {cost} estimated")
+            _heavy_running += 1
+            _heavy_per_client[client] = _heavy_per_client.get(client, 0) + 1
+            try:
+                yield
+            finally:
+                _heavy_running -= 1
+                _heavy_per_client[client] -= 1
+                if not _heavy_per_client[client]:
+                    del _heavy_per_client[client]
+                _heavy_slots.release()
+        finally:
+            client_slots.release()
+    finally:
+        _client_users[client] -= 1
+        if not _client_users[client]:
+            del _client_users[client]
+            del _client_slots[client]
@@ -0,0 +1,133 @@
+"""
+Batch queries (POST /api/batch, BATCH in config.json).
+
+One request carries up to max_queries query specs, each naming a data endpoint and its query
+parameters:
+
+  {"queries": [{"id": "2025-01-01", "endpoint": "/api/redis/get_pokemon_counterseries",
+                "params": {"counter_type": "totals", "interval": "hourly", ...}}, ...]}
+
+Every query is answered by calling the endpoint itself, so it is validated, result-cached and
+coalesced with identical queries like a request of its own. Queries run concurrently, at most
+max_concurrency at a time, and the per-area retrievals of all of them share one fan-out budget.
+With ADMISSION on, the queries count as the batch caller's: heavy ones queue for the caller's
+heavy query slots like separate requests would (up to queue_seconds each, then 429), so with
+max_heavy_per_client=1 a batch's heavy queries run one at a time.
+Results are JSON and keyed by id (the query's position in the list when it has none):
+
+  {"2025-01-01": {"status": 200, "result": {...}}, "2025-01-02": {"status": 400, "error": "..."}}
+"""
+
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import ValidationError, create_model
+
+import config as AppConfig
+from server_fastapi.utils import fan_out
+from utils.logger import logger
+
+SECRET_PARAM = "api_secret_header"
+
+# endpoint path -> pydantic model of its query parameters
+_param_models: Dict[str, Any] = {}
+
+
+def _params_model(path: str, endpoint: Callable) -> Any:
+    model = _param_models.get(path)
+    if model is None:
+        # The endpoint's own Query() declarations: same defaults, types and bounds as over HTTP
+        fields = {
+            name: (param.annotation, param.default)
+            for name, param in inspect.signature(endpoint).parameters.items()
+            if name != SECRET_PARAM
+        }
+        model = create_model(f"BatchParams{len(_param_models)}", **fields)
+        _param_models[path] = model
+    return model
+
+
+def _query_value(value: Any) -> Optional[str]:
+    """A JSON parameter value as it would arrive in a query string."""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v) for v in value)
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+async def _call(query: Any, endpoints: Dict[str, Callable], secret: Optional[str]) -> Any:
+    if not isinstance(query, dict):
+        raise HTTPException(status_code=400, detail="❌ Each query must be an object with endpoint and params.")
+    path = query.get("endpoint")
+    endpoint = endpoints.get(path)
+    if endpoint is None:
+        raise HTTPException(status_code=404, detail=f"❌ Unknown or non-batchable endpoint: {path}")
+    params = query.get("params") or {}
+    if not isinstance(params, dict):
+        raise HTTPException(status_code=400, detail="❌ params must be an object.")
+
+    model = _params_model(path, endpoint)
+    fields = model.model_fields if hasattr(model, "model_fields") else model.__fields__
+    # Parameters are named as in the query string, i.e. by their alias where they have one
+    accepted = {getattr(field, "alias", None) or name for name, field in fields.items()}
+    unknown = sorted(set(params) - accepted)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"❌ Unknown parameters for {path}: {', '.join(unknown)}")
+    values = {name: _query_value(value) for name, value in params.items()}
+    if "response_format" in accepted:
+        if str(values.get("response_format") or "json").lower() != "json":
+            raise HTTPException(status_code=400, detail="❌ Batch queries are answered as JSON; response_format must be json.")
+        values["response_format"] = "json"
+
+    kwargs = dict(model(**values))
+    kwargs[SECRET_PARAM] = secret
+    result = await endpoint(**kwargs)
+    if isinstance(result, Response):
+        raise HTTPException(status_code=400, detail=f"❌ {path} did not return a JSON result.")
+    return result
+
+
+async def run_batch(queries: List[Any], endpoints: Dict[str, Callable], secret: Optional[str]) -> Dict[str, dict]:
+    """
+    {id: {"status": 200, "result": ...} or {"status": code, "error": ...}} for every query.
+    endpoints maps the paths a batch may call to their endpoint functions; secret is passed on
+    to them as the already checked secret header.
+    """
+    if not isinstance(queries, list) or not queries:
+        raise HTTPException(status_code=400, detail="❌ queries must be a non-empty list.")
+    if len(queries) > AppConfig.batch_max_queries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"❌ A batch holds at most {AppConfig.batch_max_queries} queries, got {len(queries)}.",
+        )
+    ids = [str(q["id"]) if isinstance(q, dict) and q.get("id") is not None else str(i) for i, q in enumerate(queries)]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="❌ Query ids must be unique.")
+
+    semaphore = asyncio.Semaphore(AppConfig.batch_max_concurrency)
+
+    async def _run(query_id: str, query: Any) -> dict:
+        async with semaphore:
+            try:
+                return {"status": 200, "result": await _call(query, endpoints, secret)}
+            except HTTPException as e:
+                return {"status": e.status_code, "error": e.detail}
+            except ValidationError as e:
+                return {"status": 422, "error": str(e)}
+            except Exception as e:
+                logger.error(f"❌ Batch query {query_id} failed: {e}")
+                return {"status": 500, "error": str(e)}
+
+    # Tasks started by gather() copy the context, so every fan-out in this batch sees the shared budget
+    token = fan_out.shared_budget.set(asyncio.Semaphore(fan_out.concurrency_limit()))
+    try:
+        results = await asyncio.gather(*(_run(query_id, query) for query_id, query in zip(ids, queries)))
+    finally:
+        fan_out.shared_budget.reset(token)
+    return dict(zip(ids, results))
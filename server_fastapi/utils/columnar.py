@@ -0,0 +1,159 @@
+"""
+Column-oriented binary responses (response_format=arrow or msgpack).
+
+Counter and timeseries results are nested dicts keyed by strings like "422:0:total" or "hour 13";
+they are flattened into one row per count:
+
+  area | time_bucket | pid | form | metric | count
+
+time_bucket is taken from path components that name a time ("hour 13", "2025010112",
+"2025-01-01"). For the Pokémon endpoints the remaining "pid:form:metric" / "metric" + "pid:form"
+components fill pid, form and metric; for the others pid and form stay empty and metric holds
+the remaining path joined with ":" (e.g. "raid_level:5").
+
+SQL range results (lists of row dicts) keep their own columns, plus a "table" column when a
+result holds more than one list (quests: items and pokemon). Scalars next to the rows (range,
+row counts) and per-area errors go into the metadata.
+
+arrow:   Arrow IPC stream, metadata in the schema (JSON-encoded values)
+msgpack: {"columns": {name: [values]}, "meta": {...}}
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+FORMATS = ("arrow", "msgpack")
+SERIES_COLUMNS = ("area", "time_bucket", "pid", "form", "metric", "count")
+
+_TIME_RE = re.compile(r"^(hour \d{1,2}|\d{8}|\d{10}|\d{4}-\d{2}-\d{2}.*)$")
+_PID_FORM_RE = re.compile(r"^(\d+):([^:]+)$")
+_PID_FORM_METRIC_RE = re.compile(r"^(\d+):([^:]+):([^:]+)$")
+
+
+def _is_count(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def pokemon_key(parts: List[str]) -> tuple:
+    """(pid, form, metric) of the non-time path of a Pokémon count."""
+    pid = form = None
+    metric_parts = []
+    for part in parts:
+        m = _PID_FORM_METRIC_RE.match(part)
+        if m:
+            pid, form = int(m.group(1)), m.group(2)
+            metric_parts.append(m.group(3))
+            continue
+        m = _PID_FORM_RE.match(part)
+        if m:
+            pid, form = int(m.group(1)), m.group(2)
+            continue
+        metric_parts.append(part)
+    return pid, form, ":".join(metric_parts) or None
+
+
+def generic_key(parts: List[str]) -> tuple:
+    return None, None, ":".join(parts) or None
+
+
+def series_columns(results: Dict[str, Any], split_key: Callable[[List[str]], tuple] = generic_key) -> tuple:
+    """Columns of per-area counter/timeseries results ({area: {"mode", "data"}}) and the per-area errors."""
+    columns: Dict[str, list] = {name: [] for name in SERIES_COLUMNS}
+    errors: Dict[str, str] = {}
+
+    def _walk(area: str, node: Any, time_bucket: Optional[str], path: List[str]) -> None:
+        if isinstance(node, dict):
+            for k, v in node.items():
+                k = str(k)
+                if time_bucket is None and _TIME_RE.match(k):
+                    _walk(area, v, k, path)
+                else:
+                    _walk(area, v, time_bucket, path + [k])
+        elif _is_count(node):
+            pid, form, metric = split_key(path)
+            for name, value in zip(SERIES_COLUMNS, (area, time_bucket, pid, form, metric, node)):
+                columns[name].append(value)
+
+    for area, result in results.items():
+        if not isinstance(result, dict):
+            continue
+        if "error" in result:
+            errors[area] = str(result["error"])
+            continue
+        _walk(area, result.get("data", {}), None, [])
+    return columns, errors
+
+
+def rows_columns(result: Dict[str, Any]) -> tuple:
+    """Columns of the row lists in a SQL range result, and the scalars next to them."""
+    tables: Dict[str, list] = {}
+    meta: Dict[str, Any] = {}
+
+    def _walk(node: Any, path: List[str]) -> None:
+        for k, v in node.items():
+            if isinstance(v, list) and (not v or isinstance(v[0], dict)):
+                tables[".".join(path + [k])] = v
+            elif isinstance(v, dict):
+                _walk(v, path + [k])
+            else:
+                meta[".".join(path + [k])] = v
+
+    _walk(result, [])
+
+    names: List[str] = ["table"] if len(tables) > 1 else []
+    for rows in tables.values():
+        for row in rows[:1]:
+            names.extend(n for n in row if n not in names)
+
+    columns: Dict[str, list] = {name: [] for name in names}
+    for table, rows in tables.items():
+        for row in rows:
+            for name in names:
+                columns[name].append(table if name == "table" else row.get(name))
+    return columns, meta
+
+
+def _arrow_value(value: Any) -> Any:
+    # Decimal columns from MySQL would otherwise become Arrow decimals of varying precision
+    return float(value) if type(value).__name__ == "Decimal" else value
+
+
+def encode(columns: Dict[str, list], meta: Dict[str, Any], fmt: str) -> Response:
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise HTTPException(status_code=400, detail="❌ response_format=msgpack needs the msgpack package installed.")
+        body = msgpack.packb({"columns": columns, "meta": meta}, default=str)
+        return Response(content=body, media_type="application/msgpack")
+
+    if pa is None:
+        raise HTTPException(status_code=400, detail="❌ response_format=arrow needs the pyarrow package installed.")
+    table = pa.table({name: pa.array([_arrow_value(v) for v in values]) for name, values in columns.items()})
+    table = table.replace_schema_metadata({k: json.dumps(v, default=str) for k, v in meta.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type="application/vnd.apache.arrow.stream")
+
+
+def series_response(results: Dict[str, Any], fmt: str, pokemon: bool = False) -> Response:
+    columns, errors = series_columns(results, pokemon_key if pokemon else generic_key)
+    return encode(columns, {"errors": errors} if errors else {}, fmt)
+
+
+def rows_response(result: Dict[str, Any], fmt: str) -> Response:
+    columns, meta = rows_columns(result)
+    return encode(columns, meta, fmt)
@@ -0,0 +1,205 @@
+"""
+Response compression for the API (COMPRESSION in config.json).
+
+Responses under /api/ of at least min_bytes are compressed with the best encoding both sides
+support: the client's Accept-Encoding q-values first, then the order of encodings (zstd, br,
+gzip by default). zstd and br need the zstandard and brotli packages; without them only gzip is
+offered. Responses carry Vary: Accept-Encoding.
+
+Compressed bodies are remembered per worker (memo_max_mb, keyed by the hash of the uncompressed
+body and the encoding), so repeated hits on the same result, e.g. closed ranges answered from
+the result cache, skip the compression itself. Bodies of OFFLOAD_BYTES and more are hashed and
+compressed in the thread pool, off the event loop.
+
+With CONDITIONAL_GET on, the data endpoints' responses are encoded by ConditionalGetMiddleware
+through encode(): the body is buffered once and the ETag hash doubles as the memo key. This
+middleware then only handles the responses it left alone (Vary: Accept-Encoding not yet set).
+
+The ETag of a compressed response names its encoding ("<hash>-gzip"): a client that sends it back
+in If-None-Match gets 304 the same way (see conditional.py). Streamed responses
+(response_format=json_stream, the live counter events) are passed through untouched.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import config as AppConfig
+from server_fastapi.utils.json_stream import STREAM_FORMAT
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+API_PREFIX = "/api/"
+# Bodies at least this large are compressed in the thread pool
+OFFLOAD_BYTES = 64 * 1024
+# Already compressed or streamed: sent as they are
+SKIPPED_TYPES = ("text/event-stream", "image/", "application/gzip", "application/zstd")
+
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    compressors = {"gzip": lambda body: gzip.compress(body, compresslevel=AppConfig.compression_gzip_level, mtime=0)}
+    if brotli is not None:
+        compressors["br"] = lambda body: brotli.compress(body, quality=AppConfig.compression_brotli_quality)
+    if zstandard is not None:
+        # A ZstdCompressor must not be shared between threads
+        compressors["zstd"] = lambda body: zstandard.ZstdCompressor(level=AppConfig.compression_zstd_level).compress(body)
+    return compressors
+
+
+COMPRESSORS = _compressors()
+# Offered encodings in the order of preference, those whose package is missing left out
+ENCODINGS = [e for e in AppConfig.compression_encodings if e in COMPRESSORS]
+
+# (hash of the uncompressed body, encoding) -> compressed body
+_memo: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_memo_bytes = 0
+_memo_lock = threading.Lock()
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """{coding: q} of an Accept-Encoding header."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The encoding to answer with, None for identity."""
+    if not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def encoding_etag(etag: str, encoding: str) -> str:
+    """The ETag of the encoded representation: "abc" -> "abc-gzip"."""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def identity_etag(etag: str) -> str:
+    """The ETag of the uncompressed representation, the inverse of encoding_etag."""
+    for encoding in COMPRESSORS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def _compress(body: bytes, encoding: str, body_hash: Optional[str] = None) -> bytes:
+    # Runs in the thread pool for large bodies, hence the lock around the memo
+    global _memo_bytes
+    key = (body_hash or hashlib.sha1(body).hexdigest(), encoding)
+    with _memo_lock:
+        compressed = _memo.get(key)
+        if compressed is not None:
+            _memo.move_to_end(key)
+            return compressed
+
+    compressed = COMPRESSORS[encoding](body)
+    max_bytes = AppConfig.compression_memo_max_mb * 1024 * 1024
+    if len(compressed) <= max_bytes:
+        with _memo_lock:
+            if key not in _memo:
+                _memo[key] = compressed
+                _memo_bytes += len(compressed)
+            while _memo_bytes > max_bytes:
+                _memo_bytes -= len(_memo.popitem(last=False)[1])
+    return compressed
+
+
+def choose_encoding(request: Request, body_size: int) -> Optional[str]:
+    """The encoding a body of body_size is sent with, None when it is sent as it is."""
+    if not AppConfig.compression_enabled or body_size < AppConfig.compression_min_bytes:
+        return None
+    return negotiate(request.headers.get("accept-encoding"))
+
+
+async def encode(request: Request, body: bytes, status_code: int, headers: Dict[str, str],
+                 body_hash: Optional[str] = None) -> Response:
+    """
+    The response for an already buffered body, compressed when the client accepts an encoding.
+    body_hash (sha1 hex of body), when the caller has it, saves hashing the body again.
+    """
+    headers = {k.lower(): v for k, v in headers.items() if k.lower() != "content-length"}
+    if AppConfig.compression_enabled:
+        _add_vary(headers)
+    encoding = choose_encoding(request, len(body))
+    if encoding is None:
+        return Response(content=body, status_code=status_code, headers=headers)
+
+    headers["content-encoding"] = encoding
+    if "etag" in headers:
+        headers["etag"] = encoding_etag(headers["etag"], encoding)
+    if len(body) >= OFFLOAD_BYTES:
+        compressed = await run_in_threadpool(_compress, body, encoding, body_hash)
+    else:
+        compressed = _compress(body, encoding, body_hash)
+    return Response(content=compressed, status_code=status_code, headers=headers)
+
+
+def _applies(request: Request, response: Response) -> bool:
+    content_type = response.headers.get("content-type", "")
+    return (
+        AppConfig.compression_enabled
+        and request.url.path.startswith(API_PREFIX)
+        and "content-encoding" not in response.headers
+        # Already negotiated by ConditionalGetMiddleware
+        and "accept-encoding" not in response.headers.get("vary", "").lower()
+        and response.status_code not in (204, 304)
+        and str(request.query_params.get("response_format", "")).lower() != STREAM_FORMAT
+        and not content_type.startswith(SKIPPED_TYPES)
+    )
+
+
+def _add_vary(headers) -> None:
+    # A dict with lower-case names or the case-insensitive headers of a response
+    vary = headers.get("vary")
+    if not vary:
+        headers["vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if not _applies(request, response):
+            return response
+        if negotiate(request.headers.get("accept-encoding")) is None:
+            # Nothing to compress with: sent as it is, without buffering the body
+            _add_vary(response.headers)
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        return await encode(request, body, response.status_code, dict(response.headers))
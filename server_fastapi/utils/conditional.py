@@ -0,0 +1,113 @@
+"""
+Conditional GET for the data endpoints (CONDITIONAL_GET in config.json).
+
+Successful GET responses under /api/redis/ and /api/sql/ carry:
+
+- ETag: a hash of the response body, the same in every worker for the same result.
+- Last-Modified: when this worker first served that body for the same query.
+
+A client that sends the ETag back in If-None-Match (or, without one, the time in If-Modified-Since)
+gets 304 Not Modified without a body while the result is unchanged. Compressed responses carry
+the ETag of their encoding (see compression.py), which matches here as well.
+
+The query still runs to find out whether the result changed. Closed ranges are served from the
+result cache, so for repeated polls the saving is mostly the transfer and the client-side decoding.
+Streamed responses (response_format=json_stream, the live counter events) are passed through untouched.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import config as AppConfig
+from server_fastapi.utils import compression
+from server_fastapi.utils.json_stream import STREAM_FORMAT
+from server_fastapi.utils.single_flight import request_key
+
+DATA_PREFIXES = ("/api/redis/", "/api/sql/")
+# Queries whose Last-Modified time a worker remembers
+MEMO_ENTRIES = 4096
+
+# request key -> (etag, first time this worker served it)
+_versions: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+
+def _applies(request: Request, response: Response) -> bool:
+    return (
+        AppConfig.conditional_get_enabled
+        and request.method == "GET"
+        and response.status_code == 200
+        and request.url.path.startswith(DATA_PREFIXES)
+        and str(request.query_params.get("response_format", "")).lower() != STREAM_FORMAT
+        and not response.headers.get("content-type", "").startswith("text/event-stream")
+    )
+
+
+def _last_modified(key: str, etag: str) -> float:
+    seen = _versions.get(key)
+    if seen is not None and seen[0] == etag:
+        _versions.move_to_end(key)
+        return seen[1]
+    modified = float(int(time.time()))  # HTTP dates have a resolution of one second
+    _versions[key] = (etag, modified)
+    _versions.move_to_end(key)
+    while len(_versions) > MEMO_ENTRIES:
+        _versions.popitem(last=False)
+    return modified
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 asks for If-None-Match; a compressed representation's tag
+    # ("<hash>-gzip") matches the body it was compressed from
+    candidates = (compression.identity_etag(tag.strip().removeprefix("W/")) for tag in if_none_match.split(","))
+    return any(tag == etag.removeprefix("W/") for tag in candidates)
+
+
+def _modified_since(if_modified_since: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    since = _modified_since(request.headers.get("if-modified-since", ""))
+    return since is not None and last_modified <= since
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if not _applies(request, response):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        digest = hashlib.sha1(body).hexdigest()
+        etag = f'"{digest}"'
+        last_modified = _last_modified(request_key(request.url.path, dict(request.query_params)), etag)
+        validators = {"etag": etag, "last-modified": formatdate(last_modified, usegmt=True)}
+
+        if not_modified(request, etag, last_modified):
+            # The client holds the representation it would get now, compressed or not
+            encoding = compression.choose_encoding(request, len(body))
+            if encoding:
+                validators["etag"] = compression.encoding_etag(etag, encoding)
+            if AppConfig.compression_enabled:
+                validators["vary"] = "Accept-Encoding"
+            return Response(status_code=304, headers=validators)
+
+        # Compressed here (when COMPRESSION is on) so the body is buffered and hashed only once
+        headers = dict(response.headers)
+        headers.update(validators)
+        return await compression.encode(request, body, response.status_code, headers, body_hash=digest)
@@ -96,4 +96,14 @@ TAGS_METADATA = [
         "description": "Obtain Quest Data from SQL.",
         "summary": "Get Quest data.",
     },
+    {
+        "name": "Live Counters",
+        "description": "Stream live per-area counter deltas (Server-Sent Events).",
+        "summary": "Live counter deltas.",
+    },
+    {
+        "name": "Batch",
+        "description": "Run several data queries in one request.",
+        "summary": "Batch queries.",
+    },
 ]
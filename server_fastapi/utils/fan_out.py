@@ -0,0 +1,50 @@
+"""
+Concurrent per-area execution for the multi-area data_api endpoints (QUERY_FAN_OUT in config.json).
+
+area=global (or a CSV list) runs one retrieval per area. They run concurrently, with at most
+max_concurrency in flight per request, and never more than half of the worker's query pool so a
+single global request can't starve the others. Results keep the order of area_offsets, and each
+area reports its own failure as before.
+
+Within a batch request (POST /api/batch) the areas of all its queries share one such budget.
+"""
+
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from utils.logger import logger
+
+# Set for the duration of a batch request: the semaphore all of its fan-outs draw from
+shared_budget: ContextVar[Optional[asyncio.Semaphore]] = ContextVar("fan_out_shared_budget", default=None)
+
+
+def concurrency_limit() -> int:
+    pool_budget = RedisManager(POOL_QUERY).connection_budget()
+    return max(1, min(AppConfig.query_fan_out_max_concurrency, pool_budget // 2))
+
+
+async def fan_out(label: str, area_offsets: Dict[str, int],
+                  run_area: Callable[[str, int], Awaitable[Any]]) -> Dict[str, Any]:
+    """
+    {area: await run_area(area, offset)} for every area, run concurrently within the limit.
+    run_area is expected to catch its own errors and return them as the area's result.
+    """
+    semaphore = shared_budget.get()
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(concurrency_limit())
+
+    async def _timed(area: str, offset: int) -> Any:
+        async with semaphore:
+            started = time.perf_counter()
+            result = await run_area(area, offset)
+            logger.debug(f"⏱️ {label} [{area}] took {(time.perf_counter() - started) * 1000:.1f} ms")
+            return result
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_timed(area, offset) for area, offset in area_offsets.items()))
+    logger.debug(f"⏱️ {label} fan-out over {len(area_offsets)} areas took {(time.perf_counter() - started) * 1000:.1f} ms")
+    return dict(zip(area_offsets, results))
@@ -0,0 +1,96 @@
+"""
+Streaming JSON responses (response_format=json_stream).
+
+Large results (heatmaps, grouped counters) are written out in pieces instead of being encoded
+into one string after FastAPI's jsonable_encoder has made a full copy of them: lists are encoded
+in batches of BATCH_ROWS rows, big dicts entry by entry, and the pieces are sent in chunks of
+about CHUNK_BYTES. Encoding uses orjson when it is installed, the json module otherwise.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterator
+
+from fastapi.responses import StreamingResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STREAM_FORMAT = "json_stream"
+BATCH_ROWS = 1000
+CHUNK_BYTES = 64 * 1024
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def _is_large(value: Any) -> bool:
+    if isinstance(value, list):
+        return len(value) > BATCH_ROWS
+    if isinstance(value, dict):
+        return len(value) > BATCH_ROWS or any(isinstance(v, (list, dict)) and _is_large(v) for v in value.values())
+    return False
+
+
+def iter_json(value: Any) -> Iterator[bytes]:
+    """JSON of value in pieces; small values are encoded in one go."""
+    if isinstance(value, dict) and _is_large(value):
+        yield b"{"
+        sep, batch = b"", {}
+        for k, v in value.items():
+            if _is_large(v):
+                if batch:
+                    yield sep + encode(batch)[1:-1]
+                    sep, batch = b",", {}
+                yield sep + encode(str(k)) + b":"
+                yield from iter_json(v)
+                sep = b","
+                continue
+            batch[k] = v
+            if len(batch) >= BATCH_ROWS:
+                yield sep + encode(batch)[1:-1]
+                sep, batch = b",", {}
+        if batch:
+            yield sep + encode(batch)[1:-1]
+        yield b"}"
+    elif isinstance(value, list) and _is_large(value):
+        yield b"["
+        for i in range(0, len(value), BATCH_ROWS):
+            # Encoded as a list, without its brackets
+            yield (b"," if i else b"") + encode(value[i:i + BATCH_ROWS])[1:-1]
+        yield b"]"
+    else:
+        yield encode(value)
+
+
+def _chunks(pieces: Iterator[bytes]) -> Iterator[bytes]:
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def streaming_response(value: Any) -> StreamingResponse:
+    """Stream value as JSON. The generator is synchronous, so Starlette encodes it in its threadpool."""
+    return StreamingResponse(_chunks(iter_json(value)), media_type="application/json")
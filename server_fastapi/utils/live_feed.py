@@ -0,0 +1,148 @@
+"""
+Live counter deltas over Server-Sent Events (/api/redis/live_counters, LIVE_STREAM in config.json).
+
+While a worker has subscribers it runs one reader of the live:events stream. The reader sums the
+entries per family, area and minute, and every flush_seconds pushes the sums to the subscribers
+whose filters match:
+
+  event: delta
+  data: {"family": "pokemon", "area": "Lisbon", "minute": "202501061342", "counts": {"total": 41, "iv100": 1}}
+
+N viewers cost one stream read per worker instead of N counter queries. Clients fetch their totals
+once from the counter endpoints and add the deltas to them. A subscriber that falls queue_size
+messages behind has its queue emptied and gets a "resync" event: it should refetch its totals.
+"""
+
+import asyncio
+import json
+from collections import Counter, defaultdict
+from time import monotonic
+from typing import AsyncIterator, Dict, Optional, Set
+
+from fastapi import HTTPException, Request
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils import live_stream
+from utils.logger import logger
+
+READ_COUNT = 1000
+HEARTBEAT_SECONDS = 15
+RETRY_SECONDS = 1
+
+stats = {
+    "entries_read": 0,
+    "messages_sent": 0,
+    "resyncs": 0,
+    "redis_errors": 0,
+}
+
+
+class Subscriber:
+    """One SSE connection: its filters (None means all) and the messages waiting to be sent."""
+
+    def __init__(self, families: Optional[Set[str]], areas: Optional[Set[str]]):
+        self.families = families
+        self.areas = areas
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=AppConfig.live_stream_queue_size)
+
+    def wants(self, family: str, area: str) -> bool:
+        return (self.families is None or family in self.families) and (self.areas is None or area in self.areas)
+
+    def push(self, event: str, data: dict) -> None:
+        try:
+            self.queue.put_nowait((event, data))
+            stats["messages_sent"] += 1
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("resync", {}))
+            stats["resyncs"] += 1
+
+
+_subscribers: Set[Subscriber] = set()
+_reader: Optional[asyncio.Task] = None
+
+
+def live_stats() -> dict:
+    return {
+        "enabled": AppConfig.live_stream_enabled,
+        "subscribers": len(_subscribers),
+        "reader_running": _reader is not None and not _reader.done(),
+        **stats,
+    }
+
+
+def _flush(deltas: Dict[tuple, Counter]) -> None:
+    for (family, area, minute), counts in deltas.items():
+        message = {"family": family, "area": area, "minute": minute, "counts": dict(counts)}
+        for subscriber in list(_subscribers):
+            if subscriber.wants(family, area):
+                subscriber.push("delta", message)
+
+
+async def _start_id(client) -> str:
+    # Entries added after the last one already in the stream; "$" would miss those written between reads
+    last = await client.xrevrange(live_stream.STREAM_KEY, count=1)
+    return last[0][0] if last else "0-0"
+
+
+async def _read_loop() -> None:
+    last_id = None
+    deltas: Dict[tuple, Counter] = defaultdict(Counter)
+    next_flush = monotonic() + AppConfig.live_stream_flush_seconds
+
+    while _subscribers:
+        try:
+            client = await RedisManager(POOL_QUERY).check_redis_connection()
+            if not client:
+                await asyncio.sleep(RETRY_SECONDS)
+                continue
+            if last_id is None:
+                last_id = await _start_id(client)
+            block_ms = max(1, int((next_flush - monotonic()) * 1000))
+            reply = await client.xread({live_stream.STREAM_KEY: last_id}, count=READ_COUNT, block=block_ms)
+            for _, entries in reply or []:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    family, area, minute, metrics = live_stream.parse_entry(fields)
+                    deltas[(family, area, minute)].update(metrics)
+                    stats["entries_read"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats["redis_errors"] += 1
+            logger.warning(f"⚠️ Live stream read failed: {e}")
+            await asyncio.sleep(RETRY_SECONDS)
+
+        if monotonic() >= next_flush:
+            _flush(deltas)
+            deltas = defaultdict(Counter)
+            next_flush = monotonic() + AppConfig.live_stream_flush_seconds
+
+
+def subscribe(families: Optional[Set[str]], areas: Optional[Set[str]]) -> Subscriber:
+    global _reader
+    if len(_subscribers) >= AppConfig.live_stream_max_subscribers:
+        raise HTTPException(status_code=503, detail="❌ Too many live counter subscribers on this worker, try again later.")
+    subscriber = Subscriber(families, areas)
+    _subscribers.add(subscriber)
+    # The reader stops on its own once the last subscriber has gone
+    if _reader is None or _reader.done():
+        _reader = asyncio.create_task(_read_loop())
+    return subscriber
+
+
+async def event_stream(subscriber: Subscriber, request: Request) -> AsyncIterator[str]:
+    """SSE messages for one subscriber until the client disconnects, with a comment line as heartbeat."""
+    try:
+        yield "event: ready\ndata: {}\n\n"
+        while not await request.is_disconnected():
+            try:
+                event, data = await asyncio.wait_for(subscriber.queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    finally:
+        _subscribers.discard(subscriber)
@@ -0,0 +1,115 @@
+"""
+Server-side paging of grouped results (sort, limit, offset and metric_filter on the grouped counter
+and timeseries endpoints).
+
+A grouped result is paged over its entries, the counts at its leaves: "25:0:shiny" of a Pokémon
+counter, or "shiny" -> "25:0" of a Pokémon timeseries.
+
+- metric_filter keeps the entries whose first path component, or last ":" part of the leaf key,
+  is one of the given metrics, or that sit under a given "breakdown:value" ("raid_level:5").
+- sort orders the entries (count_desc, count_asc, key). none keeps the order of the result.
+- offset and limit then cut out one page. With a limit, only the first offset + limit entries are
+  selected (heapq.nlargest / nsmallest) instead of sorting all of them.
+
+Each area's page keeps the shape of its result (entries of a nested result are regrouped under
+their parents) and reports how many entries matched:
+
+  {"mode": "grouped", "data": {...}, "page": {"total": 12840, "offset": 0, "limit": 25, "sort": "count_desc"}}
+"""
+
+import heapq
+import re
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+SORTS = ("none", "count_desc", "count_asc", "key")
+
+_DIGITS_RE = re.compile(r"(\d+)")
+
+Entry = Tuple[Tuple[str, ...], Any]
+
+
+def _is_count(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _entries(node: dict, path: Tuple[str, ...] = ()) -> Iterator[Entry]:
+    for k, v in node.items():
+        if isinstance(v, dict):
+            yield from _entries(v, path + (str(k),))
+        elif _is_count(v):
+            yield path + (str(k),), v
+
+
+def _matches(path: Tuple[str, ...], metrics: Set[str]) -> bool:
+    if path[0] in metrics or path[-1].rsplit(":", 1)[-1] in metrics:
+        return True
+    # "raid_level:5" names a breakdown and one of its values
+    return any(f"{a}:{b}" in metrics for a, b in zip(path, path[1:]))
+
+
+def _natural_key(entry: Entry) -> tuple:
+    # "2:0:total" before "10:0:total"
+    return tuple(
+        tuple(int(p) if p.isdigit() else p for p in _DIGITS_RE.split(part))
+        for part in entry[0]
+    )
+
+
+def _rebuild(entries: List[Entry]) -> dict:
+    data: Dict[str, Any] = {}
+    for path, count in entries:
+        node = data
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        node[path[-1]] = count
+    return data
+
+
+class PageSpec:
+    """The paging parameters of one request."""
+
+    def __init__(self, sort: str, limit: Optional[int], offset: int, metrics: Optional[Set[str]]):
+        self.sort = sort
+        self.limit = limit
+        self.offset = offset
+        self.metrics = metrics
+
+    @classmethod
+    def parse(cls, mode: str, sort: str, limit: Optional[int], offset: int, metric_filter: str) -> Optional["PageSpec"]:
+        """The paging requested, None when there is none. Paging applies to mode=grouped only."""
+        sort = (sort or "none").strip().lower()
+        metric_filter = (metric_filter or "all").strip()
+        metrics = None if metric_filter.lower() == "all" else {m.strip() for m in metric_filter.split(",") if m.strip()}
+        if sort not in SORTS:
+            raise HTTPException(status_code=400, detail=f"❌ Invalid sort. Must be one of: {', '.join(SORTS)}.")
+        if sort == "none" and limit is None and not offset and metrics is None:
+            return None
+        if mode != "grouped":
+            raise HTTPException(status_code=400, detail="❌ sort, limit, offset and metric_filter are only supported in grouped mode.")
+        return cls(sort, limit, offset, metrics)
+
+    def _select(self, entries: List[Entry]) -> List[Entry]:
+        stop = None if self.limit is None else self.offset + self.limit
+        if self.sort == "none":
+            return list(islice(entries, self.offset, stop))
+        if self.sort == "key":
+            ordered = heapq.nsmallest(stop, entries, key=_natural_key) if stop is not None else sorted(entries, key=_natural_key)
+        elif self.sort == "count_asc":
+            ordered = heapq.nsmallest(stop, entries, key=lambda e: e[1]) if stop is not None else sorted(entries, key=lambda e: e[1])
+        else:
+            ordered = heapq.nlargest(stop, entries, key=lambda e: e[1]) if stop is not None else sorted(entries, key=lambda e: e[1], reverse=True)
+        return ordered[self.offset:]
+
+    def apply_one(self, result: Any) -> Any:
+        if not isinstance(result, dict) or "error" in result or not isinstance(result.get("data"), dict):
+            return result
+        entries = [e for e in _entries(result["data"]) if self.metrics is None or _matches(e[0], self.metrics)]
+        page = {"total": len(entries), "offset": self.offset, "limit": self.limit, "sort": self.sort}
+        return {**result, "data": _rebuild(self._select(entries)), "page": page}
+
+    def apply(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """One page of every area's result."""
+        return {area: self.apply_one(result) for area, result in results.items()}
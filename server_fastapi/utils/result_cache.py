@@ -0,0 +1,251 @@
+"""
+Closed-period result cache for the counter and timeseries endpoints (RESULT_CACHE in config.json).
+
+Buckets that closed more than grace_seconds ago no longer change, so the result for a range of
+closed buckets is cached under the endpoint, area, filters and the bucket-aligned range:
+
+  start ............ boundary ........ end
+  |--- closed: cached ---|--- open: live ---|
+
+When the counts of two adjacent ranges can simply be added up (counter totals), a range that
+reaches into the open period is answered as cached(start, boundary) + live(boundary, end).
+Other results (TTH averages, timeseries) are only cached when the whole range is closed.
+
+Layers: a per-worker LRU bounded by memory_max_mb, then optionally Redis (cache:result:*,
+shared by all workers, expiring after redis_ttl_seconds). Events that arrive later than the grace
+period are not reflected in results cached before they arrived.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from my_redis.utils import global_rollup
+from utils.logger import logger
+
+REDIS_KEY_PREFIX = "cache:result"
+# Bump when the shape of cached results changes
+CACHE_VERSION = 1
+
+# Attributes of a retrieval object that are not part of what it is asked for
+NON_QUERY_ATTRS = {"start", "end", "window", "script_sha"}
+
+
+def floor_to(dt: datetime, unit: str) -> datetime:
+    """Start of the bucket (minute, hour, day, week starting Monday, month) that holds dt."""
+    dt = dt.replace(second=0, microsecond=0)
+    if unit == "minute":
+        return dt
+    dt = dt.replace(minute=0)
+    if unit == "hour":
+        return dt
+    dt = dt.replace(hour=0)
+    if unit == "week":
+        return dt - timedelta(days=dt.weekday())
+    if unit == "month":
+        return dt.replace(day=1)
+    return dt
+
+
+def ceil_to(dt: datetime, unit: str) -> datetime:
+    floor = floor_to(dt, unit)
+    if floor == dt:
+        return dt
+    if unit == "minute":
+        return floor + timedelta(minutes=1)
+    if unit == "hour":
+        return floor + timedelta(hours=1)
+    if unit == "week":
+        return floor + timedelta(days=7)
+    if unit == "month":
+        return (floor + timedelta(days=32)).replace(day=1)
+    return floor + timedelta(days=1)
+
+
+def closed_boundary(unit: str, offset_hours: int) -> datetime:
+    """Start of the oldest bucket that may still change, in the area-shifted basis of the stored keys."""
+    now = datetime.fromtimestamp(time.time() + offset_hours * 3600 - AppConfig.result_cache_grace_seconds)
+    return floor_to(now, unit)
+
+
+def merge_additive(closed: Any, live: Any) -> Any:
+    """Add two results of the same shape: numbers are summed, dicts merged key by key."""
+    if isinstance(closed, dict) and isinstance(live, dict):
+        merged = dict(closed)
+        for k, v in live.items():
+            merged[k] = merge_additive(merged[k], v) if k in merged else v
+        return merged
+    if isinstance(closed, (int, float)) and isinstance(live, (int, float)) \
+            and not isinstance(closed, bool) and not isinstance(live, bool):
+        return closed + live
+    return live
+
+
+class ResultCache:
+    """Per-worker LRU of JSON-encoded results, bounded by total size, plus the optional Redis layer."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.bytes = 0
+        self.stats = {
+            "memory_hits": 0, "redis_hits": 0, "misses": 0,
+            "split_queries": 0, "live_only": 0, "evictions": 0, "redis_errors": 0,
+        }
+
+    def _get_local(self, key: str) -> Optional[bytes]:
+        raw = self._entries.get(key)
+        if raw is not None:
+            self._entries.move_to_end(key)
+        return raw
+
+    def _put_local(self, key: str, raw: bytes) -> None:
+        if len(raw) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= len(old)
+        self._entries[key] = raw
+        self.bytes += len(raw)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    async def _redis_client(self):
+        if not AppConfig.result_cache_redis_enabled:
+            return None
+        return await RedisManager(POOL_QUERY).check_redis_connection()
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = self._get_local(key)
+        if raw is not None:
+            self.stats["memory_hits"] += 1
+            return json.loads(raw)
+
+        client = await self._redis_client()
+        if client:
+            try:
+                raw = await client.get(f"{REDIS_KEY_PREFIX}:{key}")
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Result cache Redis read failed: {e}")
+                raw = None
+            if raw is not None:
+                raw = raw.encode() if isinstance(raw, str) else raw
+                self._put_local(key, raw)
+                self.stats["redis_hits"] += 1
+                return json.loads(raw)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, value: Any) -> None:
+        raw = json.dumps(value, separators=(",", ":")).encode()
+        self._put_local(key, raw)
+
+        client = await self._redis_client()
+        if client:
+            try:
+                await client.set(f"{REDIS_KEY_PREFIX}:{key}", raw, ex=AppConfig.result_cache_redis_ttl_seconds)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Result cache Redis write failed: {e}")
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["memory_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["redis_hits"]
+        return {
+            "enabled": AppConfig.result_cache_enabled,
+            "redis_enabled": AppConfig.result_cache_redis_enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            **self.stats,
+        }
+
+
+result_cache = ResultCache(AppConfig.result_cache_memory_max_mb * 1024 * 1024)
+
+
+def cache_stats() -> dict:
+    return result_cache.snapshot()
+
+
+def _cache_key(parts: tuple, start: datetime, end: datetime) -> str:
+    payload = json.dumps(
+        [CACHE_VERSION, parts, start.isoformat(), end.isoformat()],
+        default=lambda v: sorted(map(str, v)) if isinstance(v, (set, frozenset)) else str(v),
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+async def _cached(parts: tuple, start: datetime, end: datetime, norm_start: datetime, norm_end: datetime,
+                  compute: Callable[[datetime, datetime], Awaitable[dict]]) -> dict:
+    key = _cache_key(parts, norm_start, norm_end)
+    cached = await result_cache.get(key)
+    if cached is not None:
+        return cached
+    result = await compute(start, end)
+    # Failed retrievals come back as empty or error results; don't pin those
+    if isinstance(result, dict) and result.get("data") and "error" not in result:
+        await result_cache.put(key, result)
+    return result
+
+
+async def cached_range(parts: tuple, unit: str, offset: int, start: datetime, end: datetime,
+                       compute: Callable[[datetime, datetime], Awaitable[dict]], additive: bool = False) -> dict:
+    """
+    Result of compute(start, end), with its closed part served from the cache.
+
+    parts:    everything besides the range that determines the result (endpoint, area, filters, mode)
+    unit:     bucket size of the keys the range is read from (minute, hour, day, week, month)
+    additive: compute() of two adjacent ranges can be combined with merge_additive()
+    """
+    if not AppConfig.result_cache_enabled or start is None or end is None:
+        return await compute(start, end)
+
+    boundary = closed_boundary(unit, offset)
+    norm_start = ceil_to(start, unit)
+    norm_end = ceil_to(end, unit)
+
+    if norm_end <= boundary:
+        return await _cached(parts, start, end, norm_start, norm_end, compute)
+    if not additive or norm_start >= boundary:
+        result_cache.stats["live_only"] += 1
+        return await compute(start, end)
+
+    result_cache.stats["split_queries"] += 1
+    closed = await _cached(parts, start, boundary, norm_start, boundary, compute)
+    live = await compute(boundary, end)
+    if not closed.get("data"):
+        return live
+    if not live.get("data"):
+        return closed
+    return {**closed, **live, "data": merge_additive(closed.get("data"), live.get("data"))}
+
+
+async def cached_retrieval(name: str, retrieval, retrieve: Callable[[Any], Awaitable[dict]], unit: str,
+                           offset: int, additive: bool = False) -> dict:
+    """
+    cached_range() for a counter or timeseries retrieval object: the range is read from and set on its
+    start/end, everything else it holds (area, mode, filters) is part of the cache key.
+    __all__ buckets mix the shifted times of every area, so they close with the area furthest behind UTC.
+    """
+    if global_rollup.is_global_area(retrieval.area):
+        offset = global_rollup.min_area_offset()
+    parts = (name, type(retrieval).__name__,
+             {k: v for k, v in vars(retrieval).items() if k not in NON_QUERY_ATTRS})
+
+    async def compute(start: datetime, end: datetime) -> dict:
+        retrieval.start, retrieval.end = start, end
+        return await retrieve(retrieval)
+
+    return await cached_range(parts, unit, offset, retrieval.start, retrieval.end, compute, additive)
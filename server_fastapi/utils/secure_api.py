@@ -25,10 +25,19 @@ ALLOWED_PATHS = [
     "/docs", # Allow default docs FastAPI page
     "/api/redis/get_cached_pokestops",
     "/api/redis/get_cached_geofences",
+    "/api/redis/pool_stats",
+    "/api/redis/memory_report",
+    "/api/redis/result_cache_stats",
+    "/api/redis/single_flight_stats",
+    "/api/redis/admission_stats",
+    "/api/redis/live_stats",
+    "/api/redis/live_counters",
     "/api/redis/get_pokemon_counterseries",
     "/api/redis/get_raids_counterseries",
     "/api/redis/get_invasions_counterseries",
     "/api/redis/get_quest_counterseries",
+    "/api/redis/get_unique_counts",
+    "/api/redis/get_top_k",
     "/api/redis/get_pokemon_timeseries",
     "/api/redis/get_pokemon_tth_timeseries",
     "/api/redis/get_raid_timeseries",
@@ -39,6 +48,7 @@ ALLOWED_PATHS = [
     "/api/sql/get_raid_data",
     "/api/sql/get_invasion_data",
     "/api/sql/get_quest_data",
+    "/api/batch",
 ]
 
 async def validate_path(request: Request):
@@ -0,0 +1,159 @@
+"""
+Single-flight coalescing of identical API queries (SINGLE_FLIGHT in config.json).
+
+Requests to the same endpoint with the same (normalized) query parameters that arrive while one
+of them is still being computed wait for that computation instead of repeating the Redis scan and
+aggregation:
+
+- In a worker, the first request runs the endpoint and later ones await the same task.
+- With redis_enabled, the first worker takes sf:lock:{key} (SET NX) and publishes its result
+  under sf:result:{key} for result_ttl_seconds. Workers that find the lock taken poll for the
+  result, and compute it themselves if the lock goes away without one or after wait_seconds.
+
+Only requests that overlap in time share a result, so nothing is served later than a request
+started while it was being computed.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import uuid
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict
+
+import config as AppConfig
+from my_redis.connect_redis import RedisManager, POOL_QUERY
+from server_fastapi.utils.json_stream import STREAM_FORMAT
+from utils.logger import logger
+
+# A streamed response can only be sent once, so those requests always run on their own
+UNSHARED_FORMATS = {STREAM_FORMAT}
+
+LOCK_PREFIX = "sf:lock"
+RESULT_PREFIX = "sf:result"
+POLL_SECONDS = 0.05
+
+_in_flight: Dict[str, asyncio.Task] = {}
+stats = {
+    "executed": 0,          # computations run by this worker
+    "coalesced_local": 0,   # requests that joined a computation in this worker
+    "coalesced_redis": 0,   # requests answered with another worker's result
+    "redis_fallbacks": 0,   # waited on another worker, then computed anyway
+    "redis_errors": 0,
+}
+
+
+def single_flight_stats() -> dict:
+    return {
+        "enabled": AppConfig.single_flight_enabled,
+        "redis_enabled": AppConfig.single_flight_redis_enabled,
+        "in_flight": len(_in_flight),
+        **stats,
+    }
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        if "," in value:
+            # CSV filters: order and spacing don't change the result
+            return ",".join(sorted(p.strip() for p in value.split(",") if p.strip()))
+    return value
+
+
+def request_key(label: str, params: dict) -> str:
+    payload = json.dumps([label, {k: _normalize(v) for k, v in params.items()}], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+async def _compute(compute: Callable[[], Awaitable[Any]]) -> Any:
+    stats["executed"] += 1
+    return await compute()
+
+
+async def _run_across_workers(key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    client = await RedisManager(POOL_QUERY).check_redis_connection()
+    if not client:
+        return await _compute(compute)
+
+    lock_key, result_key = f"{LOCK_PREFIX}:{key}", f"{RESULT_PREFIX}:{key}"
+    token = uuid.uuid4().hex
+    try:
+        acquired = await client.set(lock_key, token, nx=True, ex=AppConfig.single_flight_wait_seconds)
+    except Exception as e:
+        stats["redis_errors"] += 1
+        logger.warning(f"⚠️ Single-flight lock failed: {e}")
+        return await _compute(compute)
+
+    if acquired:
+        try:
+            result = await _compute(compute)
+            try:
+                await client.set(result_key, json.dumps(result), ex=AppConfig.single_flight_result_ttl_seconds)
+            except TypeError:
+                pass  # Not JSON (e.g. a Response object): only this worker's waiters share it
+            except Exception as e:
+                stats["redis_errors"] += 1
+                logger.warning(f"⚠️ Single-flight result write failed: {e}")
+            return result
+        finally:
+            try:
+                if await client.get(lock_key) == token:
+                    await client.delete(lock_key)
+            except Exception:
+                pass
+
+    deadline = monotonic() + AppConfig.single_flight_wait_seconds
+    try:
+        while monotonic() < deadline:
+            # Lock first: the holder writes the result before releasing it
+            lock_held = await client.exists(lock_key)
+            raw = await client.get(result_key)
+            if raw is not None:
+                stats["coalesced_redis"] += 1
+                return json.loads(raw)
+            if not lock_held:
+                break
+            await asyncio.sleep(POLL_SECONDS)
+    except Exception as e:
+        stats["redis_errors"] += 1
+        logger.warning(f"⚠️ Single-flight wait failed: {e}")
+
+    stats["redis_fallbacks"] += 1
+    return await _compute(compute)
+
+
+def _forget(key: str, task: asyncio.Task) -> None:
+    _in_flight.pop(key, None)
+    if not task.cancelled():
+        task.exception()  # Retrieved here in case every waiter went away
+
+
+async def run(key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Result of compute(), shared with every request for the same key that overlaps it."""
+    task = _in_flight.get(key)
+    if task is not None:
+        stats["coalesced_local"] += 1
+    else:
+        if AppConfig.single_flight_redis_enabled:
+            task = asyncio.ensure_future(_run_across_workers(key, compute))
+        else:
+            task = asyncio.ensure_future(_compute(compute))
+        _in_flight[key] = task
+        task.add_done_callback(functools.partial(_forget, key))
+    # A client that disconnects must not cancel the computation the others are waiting for
+    return await asyncio.shield(task)
+
+
+def coalesced(label: str):
+    """Endpoint decorator: identical concurrent calls (same keyword arguments) share one execution."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not AppConfig.single_flight_enabled or \
+                    str(kwargs.get("response_format", "")).lower() in UNSHARED_FORMATS:
+                return await func(*args, **kwargs)
+            return await run(request_key(label, kwargs), lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -7,8 +7,8 @@ from contextlib import asynccontextmanager
 from server_fastapi.routes import data_api, webhook_router
 from server_fastapi.routes.webhook_router import cleanup_semaphore
 from server_fastapi import global_state
-from my_redis.connect_redis import RedisManager
-from server_fastapi.utils import details, secure_api
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
+from server_fastapi.utils import compression, conditional, details, secure_api
 from fastapi.openapi.docs import get_swagger_ui_html
 from utils.logger import setup_logging, logger
 from utils.koji_geofences import KojiGeofences
@@ -26,6 +26,12 @@ from sql.tasks.quest_stops_flusher import QuestsBufferFlusher
 from sql.tasks.raid_gyms_flusher import RaidsBufferFlusher
 from my_redis.utils.expire_timeseries import periodic_cleanup
 from my_redis.utils.redis_backup_service import RedisBackupService, RedisRestoreService
+from my_redis.utils.counter_rollup import CounterRollupService, clear_rollup_state
+from my_redis.utils.counter_window import CounterWindowService, clear_window_state
+from my_redis.utils.field_ttl import detect_field_ttl_support
+from my_redis.utils.hour_histograms import init_hour_histograms
+from my_redis.utils.memory_report import MemoryReportService
+from my_redis.utils.timeseries_tiers import TimeseriesTierService
 from tzlocal import get_localzone
 from datetime import datetime, timedelta
 from utils.supersivor import Service, start_services, stop_services
@@ -55,7 +61,7 @@ logger.info(f"[W-{os.getpid()}] Worker process started (module imported)")
 # - Global state is shared via Redis (geofences, timezone, pokestops)
 # - All workers handle webhooks and API requests
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_BACKGROUND)
 
 def detect_and_store_local_timezone():
     """Detects and loads the local machine's timezone (e.g., 'Europe/Lisbon')."""
@@ -118,14 +124,20 @@ async def lifespan(app: FastAPI):
     logger.info(f"[{worker_id}] Initializing database connection pool...")
     await ConnectDB.init_db()
 
-    # Initialize Redis connection
-    logger.info(f"[{worker_id}] Initializing Redis connection...")
-    redis_client = await redis_manager.init_redis()
+    # Initialize Redis pools (ingest, query, background)
+    logger.info(f"[{worker_id}] Initializing Redis connection pools...")
+    redis_client = await RedisManager.init_pools()
     if not redis_client:
         logger.error(f"[{worker_id}] ❌ Failed to initialize Redis connection. Exiting application.")
         raise Exception("❌ Failed to initialize Redis connection, stopping application.")
     logger.info(f"[{worker_id}] Redis connection established")
 
+    # Timeseries field TTL (HEXPIRE) needs Redis 7.4+; falls back to the Lua cleanup otherwise
+    await detect_field_ttl_support(await redis_manager.check_redis_connection())
+
+    # Surged queries read the hour-of-day histograms only for days written after they were enabled
+    await init_hour_histograms(await redis_manager.check_redis_connection())
+
     # Set up GlobalStateManager with Redis
     GlobalStateManager.set_redis_manager(redis_manager)
 
@@ -225,6 +237,31 @@ async def lifespan(app: FastAPI):
 
         redis_backup_service = RedisBackupService(redis_manager, interval=AppConfig.redis_backup_interval)
 
+        # Initialize counter rollups leader only
+
+        counter_rollup_service = CounterRollupService(redis_manager, interval=AppConfig.counter_rollup_interval_seconds)
+        if not AppConfig.counter_rollup_enabled:
+            # Legacy triple-write is active again, so any previous rollup progress is stale
+            rollup_client = await redis_manager.check_redis_connection()
+            if rollup_client:
+                await clear_rollup_state(rollup_client)
+
+        # Initialize rolling 24h counter windows leader only
+
+        counter_window_service = CounterWindowService(redis_manager, interval=AppConfig.counter_window_interval_seconds)
+        if not AppConfig.counter_window_enabled:
+            window_client = await redis_manager.check_redis_connection()
+            if window_client:
+                await clear_window_state(window_client)
+
+        # Initialize timeseries tier compaction leader only
+
+        timeseries_tier_service = TimeseriesTierService(redis_manager, interval=AppConfig.timeseries_tiers_interval_seconds)
+
+        # Initialize memory report leader only
+
+        memory_report_service = MemoryReportService(redis_manager, interval=AppConfig.memory_report_interval_seconds)
+
         # Ensure partitions exist on first run leader only
 
         for tbl in (
@@ -276,6 +313,18 @@ async def lifespan(app: FastAPI):
             # Redis → MySQL Backup
             Service("backup:redis_mysql", AppConfig.redis_mysql_backups,
                     redis_backup_service.start, redis_backup_service.stop),
+            # Counter rollups hourly -> daily -> weekly
+            Service("rollup:counters", AppConfig.counter_rollup_enabled,
+                    counter_rollup_service.start, counter_rollup_service.stop),
+            # Rolling 24h counter windows per area
+            Service("window:counters", AppConfig.counter_window_enabled,
+                    counter_window_service.start, counter_window_service.stop),
+            # Timeseries downsampling 1m -> 15m -> 1h
+            Service("compact:timeseries_tiers", AppConfig.timeseries_tiers_enabled,
+                    timeseries_tier_service.start, timeseries_tier_service.stop),
+            # Memory accounting per key family / area
+            Service("report:memory", AppConfig.memory_report_enabled,
+                    memory_report_service.start, memory_report_service.stop),
         ]
 
         await start_services(services)
@@ -332,7 +381,7 @@ async def lifespan(app: FastAPI):
     # Clean up semaphore to prevent "leaked semaphore" warnings
     cleanup_semaphore()
     # Close Redis pools all workers
-    await redis_manager.close_redis()
+    await RedisManager.close_pools()
     # Close DB connection all workers
     await ConnectDB.close_db()
 
@@ -373,6 +422,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Added first so they run inside the path check; compression wraps the conditional GET check
+app.add_middleware(conditional.ConditionalGetMiddleware)
+app.add_middleware(compression.CompressionMiddleware)
 app.add_middleware(secure_api.AllowedPathsMiddleware)
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui():
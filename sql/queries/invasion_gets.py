@@ -90,12 +90,11 @@ async def fetch_invasions_range(
                 limit=limit_per_day,
             )
 
-    per_day_lists = await asyncio.gather(*[asyncio.create_task(_task(d)) for d in days])
-
     # merge on pokestop, display_type, character
     acc: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
-    for rows in per_day_lists:
-        for r in rows:
+    # Days are merged as they complete, so only the days still in flight are held at once
+    for day_rows in asyncio.as_completed([_task(d) for d in days]):
+        for r in await day_rows:
             key = (str(r["pokestop_name"]), int(r["display_type"]), int(r["character"]))
             if key not in acc:
                 acc[key] = {
@@ -110,7 +109,7 @@ async def fetch_invasions_range(
                 acc[key]["count"] += int(r.get("cnt", 0))
 
     data = list(acc.values())
-    data.sort(key=lambda x: (-x["count"], x["display_type"]))
+    data.sort(key=lambda x: (-x["count"], x["display_type"], x["character"], x["pokestop_name"]))
 
     return {
         "start_time": seen_from.isoformat(sep=" "),
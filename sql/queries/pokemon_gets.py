@@ -106,12 +106,11 @@ async def fetch_pokemon_heatmap_range(
                 limit=limit_per_day,
             )
 
-    per_day_lists = await asyncio.gather(*[asyncio.create_task(_task(d)) for d in days])
-
     # merge on spawnpoint, pokemon_id, form
     acc: Dict[Tuple[int, int, str], Dict[str, Any]] = {}
-    for rows in per_day_lists:
-        for r in rows:
+    # Days are merged as they complete, so only the days still in flight are held at once
+    for day_rows in asyncio.as_completed([_task(d) for d in days]):
+        for r in await day_rows:
             key = (int(r["spawnpoint"]), int(r["pokemon_id"]), str(r["form"]))
             if key not in acc:
                 acc[key] = {
@@ -126,7 +125,8 @@ async def fetch_pokemon_heatmap_range(
                 acc[key]["count"] += int(r.get("cnt", 0))
 
     data = list(acc.values())
-    data.sort(key=lambda x: (-x["count"], x["pokemon_id"]))
+    # Ties ordered by the full key, not by which day finished first
+    data.sort(key=lambda x: (-x["count"], x["pokemon_id"], x["form"], x["spawnpoint"]))
 
     return {
         "start_time": seen_from.isoformat(sep=" "),
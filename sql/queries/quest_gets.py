@@ -196,37 +196,31 @@ async def fetch_quests_range(
                 seen_from=seen_from, seen_to=seen_to, limit=limit_per_day,
             )
 
-    items_lists, mons_lists = await asyncio.gather(
-        asyncio.gather(*[asyncio.create_task(_items_task(d)) for d in days]),
-        asyncio.gather(*[asyncio.create_task(_mon_task(d)) for d in days]),
-    )
-
-    # merge items on pokestop, mode, task_type
+    # merge items and mons on pokestop, mode, task_type as the day queries complete,
+    # so only the days still in flight are held at once
     items_acc: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
-    for rows in items_lists:
-        for r in rows:
-            key = (str(r["pokestop_name"]), int(r["mode"]), int(r["task_type"]))
-            items_acc.setdefault(key, {
-                "pokestop_name": key[0], "mode": key[1], "task_type": key[2],
-                "latitude": r.get("latitude"), "longitude": r.get("longitude"),
-                "count": 0,
-            })["count"] += int(r.get("cnt", 0))
-    items_data = list(items_acc.values())
-    items_data.sort(key=lambda x: (x["mode"], -x["count"], x["task_type"]))
-
-    # merge mons on pokestop, mode, task_type
     mons_acc: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
-    for rows in mons_lists:
+
+    async def _tagged(acc: dict, query):
+        return acc, await query
+
+    tasks = [_tagged(items_acc, _items_task(d)) for d in days] + [_tagged(mons_acc, _mon_task(d)) for d in days]
+    for done in asyncio.as_completed(tasks):
+        acc, rows = await done
         for r in rows:
             key = (str(r["pokestop_name"]), int(r["mode"]), int(r["task_type"]))
-            mons_acc.setdefault(key, {
+            acc.setdefault(key, {
                 "pokestop_name": key[0], "mode": key[1], "task_type": key[2],
                 "latitude": r.get("latitude"), "longitude": r.get("longitude"),
                 "count": 0,
             })["count"] += int(r.get("cnt", 0))
 
+    # pokestop_name last, so equal counts don't come out in day completion order
+    items_data = list(items_acc.values())
+    items_data.sort(key=lambda x: (x["mode"], -x["count"], x["task_type"], x["pokestop_name"]))
+
     mons_data = list(mons_acc.values())
-    mons_data.sort(key=lambda x: (x["mode"], -x["count"], x["task_type"]))
+    mons_data.sort(key=lambda x: (x["mode"], -x["count"], x["task_type"], x["pokestop_name"]))
 
     return {
         "start_time": seen_from.isoformat(sep=" "),
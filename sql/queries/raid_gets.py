@@ -97,12 +97,11 @@ async def fetch_raids_range(
                 limit=limit_per_day,
             )
 
-    per_day_lists = await asyncio.gather(*[asyncio.create_task(_task(d)) for d in days])
-
     # merge on gym, raid_pokemon, raid_form, raid_level
     acc: Dict[Tuple[str, int, int, int], Dict[str, Any]] = {}
-    for rows in per_day_lists:
-        for r in rows:
+    # Days are merged as they complete, so only the days still in flight are held at once
+    for day_rows in asyncio.as_completed([_task(d) for d in days]):
+        for r in await day_rows:
             key = (str(r["gym_name"]), int(r["raid_pokemon"]), int(r["raid_form"]), int(r["raid_level"]))
             if key not in acc:
                 acc[key] = {
@@ -118,7 +117,7 @@ async def fetch_raids_range(
                 acc[key]["count"] += int(r.get("cnt", 0))
 
     data = list(acc.values())
-    data.sort(key=lambda x: (-x["count"], x["raid_pokemon"]))
+    data.sort(key=lambda x: (-x["count"], x["raid_pokemon"], x["raid_form"], x["raid_level"], x["gym_name"]))
 
     return {
         "start_time": seen_from.isoformat(sep=" "),
@@ -6,7 +6,7 @@ import config as AppConfig
 from utils.logger import logger
 from server_fastapi import global_state
 from utils.koji_geofences import KojiGeofences
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
 
 # Import for multi-worker state sharing (imported lazily to avoid circular imports)
 _global_state_manager = None
@@ -52,7 +52,7 @@ async def get_golbat_mysql_pool():
     return pool
 
 class GolbatSQLPokestops:
-    redis_manager = RedisManager()
+    redis_manager = RedisManager(POOL_BACKGROUND)
     koji_instance = KojiGeofences(AppConfig.geofence_refresh_cache_seconds)
     cache_key = "cached_pokestops"
     cache_expiry = AppConfig.pokestop_cache_expiry_seconds if hasattr(AppConfig, "pokestop_cache_expiry_seconds") else 300
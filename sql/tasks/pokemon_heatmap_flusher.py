@@ -1,7 +1,7 @@
 import asyncio
 import time
 from utils.logger import logger
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
 from my_redis.queries.buffer.pokemon_bulk_buffer import PokemonIVRedisBuffer
 
 class PokemonIVBufferFlusher:
@@ -19,7 +19,7 @@ class PokemonIVBufferFlusher:
         cycle = 0
         while self._running:
             try:
-                redis = await RedisManager().check_redis_connection()
+                redis = await RedisManager(POOL_BACKGROUND).check_redis_connection()
                 if not redis:
                     logger.warning("⚠️ Redis not ready. Skipping flush cycle.")
                     await asyncio.sleep(self.flush_interval)
@@ -70,7 +70,7 @@ class PokemonIVBufferFlusher:
 
         # Final flush
         try:
-            redis = await RedisManager().check_redis_connection()
+            redis = await RedisManager(POOL_BACKGROUND).check_redis_connection()
             if redis:
                 start = time.perf_counter()
                 count = await PokemonIVRedisBuffer.force_flush(redis)
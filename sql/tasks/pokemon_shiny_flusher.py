@@ -1,7 +1,7 @@
 import time
 import asyncio
 from utils.logger import logger
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
 from my_redis.queries.buffer.pokemon_bulk_buffer import ShinyRateRedisBuffer
 
 class ShinyRateBufferFlusher:
@@ -13,7 +13,7 @@ class ShinyRateBufferFlusher:
     async def flush_loop(self):
         """Periodically flush the shiny rate buffer."""
         self._running = True
-        redis_manager = RedisManager()
+        redis_manager = RedisManager(POOL_BACKGROUND)
         shiny_buffer = ShinyRateRedisBuffer()
 
         cycle = 0
@@ -70,7 +70,7 @@ class ShinyRateBufferFlusher:
 
         # Final flush
         try:
-            client = await RedisManager().check_redis_connection()
+            client = await RedisManager(POOL_BACKGROUND).check_redis_connection()
             if client:
                 start = time.perf_counter()
                 count = await ShinyRateRedisBuffer.force_flush(client)
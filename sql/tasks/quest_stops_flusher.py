@@ -1,7 +1,7 @@
 import asyncio
 import time
 from utils.logger import logger
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
 from my_redis.queries.buffer.quests_bulk_buffer import QuestsRedisBuffer
 
 
@@ -19,7 +19,7 @@ class QuestsBufferFlusher:
         cycle = 0
         while self._running:
             try:
-                redis = await RedisManager().check_redis_connection()
+                redis = await RedisManager(POOL_BACKGROUND).check_redis_connection()
                 if not redis:
                     logger.warning("⚠️ Redis not ready. Skipping quests flush cycle.")
                     await asyncio.sleep(self.flush_interval)
@@ -63,7 +63,7 @@ class QuestsBufferFlusher:
         self._running = False
 
         try:
-            redis = await RedisManager().check_redis_connection()
+            redis = await RedisManager(POOL_BACKGROUND).check_redis_connection()
             if redis:
                 start = time.perf_counter()
                 count = await QuestsRedisBuffer.force_flush(redis)
@@ -1,7 +1,7 @@
 import asyncio
 import time
 from utils.logger import logger
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
 from my_redis.queries.buffer.raids_bulk_buffer import RaidsRedisBuffer
 
 
@@ -20,7 +20,7 @@ class RaidsBufferFlusher:
         cycle = 0
         while self._running:
             try:
-                redis = await RedisManager().check_redis_connection()
+                redis = await RedisManager(POOL_BACKGROUND).check_redis_connection()
                 if not redis:
                     logger.warning("⚠️ Redis not ready. Skipping raids flush cycle.")
                     await asyncio.sleep(self.flush_interval)
@@ -65,7 +65,7 @@ class RaidsBufferFlusher:
         self._running = False
 
         try:
-            redis = await RedisManager().check_redis_connection()
+            redis = await RedisManager(POOL_BACKGROUND).check_redis_connection()
             if redis:
                 start = time.perf_counter()
                 count = await RaidsRedisBuffer.force_flush(redis)
@@ -7,7 +7,7 @@ from shapely import area
 import config as AppConfig
 from datetime import datetime, timedelta
 from utils.logger import logger
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_BACKGROUND
 from sql.connect_db import execute, fetch_one
 from dataclasses import dataclass
 from server_fastapi import global_state
@@ -45,7 +45,7 @@ class KojiGeofences:
     bearer_token = AppConfig.koji_bearer_token
     geofence_api_url = AppConfig.koji_geofence_api_url
     koji_url = AppConfig.koji_url
-    redis_manager = RedisManager()  # Singleton
+    redis_manager = RedisManager(POOL_BACKGROUND)  # Singleton
     tf = TimezoneFinder()
     _instance = None  # Singleton instance
 
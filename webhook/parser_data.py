@@ -30,7 +30,8 @@ from my_redis.queries.updates.quests import (
     quests_hourly_counterseries,
     quests_daily_counterseries
 )
-from my_redis.connect_redis import RedisManager
+from my_redis.connect_redis import RedisManager, POOL_INGEST
+from my_redis.utils import global_rollup, live_stream, top_k, unique_sketches
 from my_redis.queries.buffer.pokemon_bulk_buffer import PokemonIVRedisBuffer, ShinyRateRedisBuffer
 from my_redis.queries.buffer.quests_bulk_buffer import QuestsRedisBuffer
 from my_redis.queries.buffer.raids_bulk_buffer import RaidsRedisBuffer
@@ -38,13 +39,76 @@ from my_redis.queries.buffer.invasions_bulk_buffer import InvasionsRedisBuffer
 from utils.logger import logger
 from utils.retry_functions import retry
 
-redis_manager = RedisManager()
+redis_manager = RedisManager(POOL_INGEST)
 pokemon_buffer = PokemonIVRedisBuffer()
 shiny_buffer = ShinyRateRedisBuffer()
 quests_buffer = QuestsRedisBuffer()
 raids_buffer = RaidsRedisBuffer()
 invasions_buffer = InvasionsRedisBuffer()
 
+async def queue_global_pokemon_rollups(filtered_data, pipe):
+    """
+    Queue the Pokémon writes a second time under the global rollup area (GLOBAL_ROLLUP),
+    for the families that have it enabled.
+    """
+    data = global_rollup.as_global(filtered_data)
+    if global_rollup.global_rollup_enabled("pokemon"):
+        if AppConfig.store_pokemon_timeseries:
+            await pokemon_timeseries.add_pokemon_timeseries_event(data, pipe)
+        if not AppConfig.counter_rollup_enabled:
+            await pokemon_counterseries.update_total_pokemon_counter(data, pipe)
+            await pokemon_daily_counterseries.update_daily_pokemon_counter(data, pipe)
+        await pokemon_hourly_counterseries.update_pokemon_hourly_counter(data, pipe)
+        await unique_sketches.add_unique_events("pokemon", data, pipe)
+        await top_k.add_top_k_events("pokemon", data, pipe)
+    if global_rollup.global_rollup_enabled("pokemon_tth"):
+        if AppConfig.store_pokemon_tth_timeseries:
+            await pokemon_tth_timeseries.add_tth_timeseries_pokemon_event(data, pipe)
+        if not AppConfig.counter_rollup_enabled:
+            await pokemon_tth_counterseries.update_tth_pokemon_counter(data, pipe)
+            await pokemon_tth_daily_counterseries.update_tth_pokemon_daily_counter(data, pipe)
+        await pokemon_tth_hourly_counterseries.update_tth_pokemon_hourly_counter(data, pipe)
+    if global_rollup.global_rollup_enabled("pokemon_weather"):
+        await pokemon_weather_iv_counterseries.update_pokemon_weather_iv(data, pipe)
+
+async def queue_global_raid_rollups(filtered_data, pipe):
+    """Queue the Raid writes a second time under the global rollup area."""
+    if not global_rollup.global_rollup_enabled("raids"):
+        return
+    data = global_rollup.as_global(filtered_data)
+    if AppConfig.store_raids_timeseries:
+        await raids_timeseries.add_raid_timeseries_event(data, pipe)
+    await raids_counterseries.update_raid_counter(data, pipe)
+    await raids_hourly_counterseries.update_raid_hourly_counter(data, pipe)
+    await raids_daily_counterseries.update_raid_daily_counter(data, pipe)
+    await unique_sketches.add_unique_events("raids", data, pipe)
+    await top_k.add_top_k_events("raids", data, pipe)
+
+async def queue_global_quest_rollups(filtered_data, pipe):
+    """Queue the Quest writes a second time under the global rollup area."""
+    if not global_rollup.global_rollup_enabled("quests"):
+        return
+    data = global_rollup.as_global(filtered_data)
+    if AppConfig.store_quests_timeseries:
+        await quests_timeseries.add_timeseries_quest_event(data, pipe)
+    await quests_counterseries.update_quest_counter(data, pipe)
+    await quests_hourly_counterseries.update_quest_hourly_counter(data, pipe)
+    await quests_daily_counterseries.update_quest_daily_counter(data, pipe)
+    await top_k.add_top_k_events("quests", data, pipe)
+
+async def queue_global_invasion_rollups(filtered_data, pipe):
+    """Queue the Invasion writes a second time under the global rollup area."""
+    if not global_rollup.global_rollup_enabled("invasions"):
+        return
+    data = global_rollup.as_global(filtered_data)
+    if AppConfig.store_invasions_timeseries:
+        await invasions_timeseries.add_timeseries_invasion_event(data, pipe)
+    await invasions_counterseries.update_invasion_counter(data, pipe)
+    await invasions_hourly_counterseries.update_invasion_hourly_counter(data, pipe)
+    await invasions_daily_counterseries.update_invasion_daily_counter(data, pipe)
+    await unique_sketches.add_unique_events("invasions", data, pipe)
+    await top_k.add_top_k_events("invasions", data, pipe)
+
 async def process_pokemon_data(filtered_data):
     """
     Process the filtered Pokémon event by updating both the time series and the counter series in a single Redis transaction + SQL as optional.
@@ -65,15 +129,28 @@ async def process_pokemon_data(filtered_data):
         # Binary Time Series with Hash
         if AppConfig.store_pokemon_timeseries:
             pokemon_timeseries_update = await pokemon_timeseries.add_pokemon_timeseries_event(filtered_data, pipe)
-        pokemon_counterseries_update = await pokemon_counterseries.update_total_pokemon_counter(filtered_data, pipe)
+        # With counter rollups the leader builds daily/weekly from the hourly keys
+        if AppConfig.counter_rollup_enabled:
+            pokemon_counterseries_update = "ROLLUP"
+            pokemon_daily_counterseries_update = "ROLLUP"
+        else:
+            pokemon_counterseries_update = await pokemon_counterseries.update_total_pokemon_counter(filtered_data, pipe)
+            pokemon_daily_counterseries_update = await pokemon_daily_counterseries.update_daily_pokemon_counter(filtered_data, pipe)
         pokemon_hourly_counterseries_update = await pokemon_hourly_counterseries.update_pokemon_hourly_counter(filtered_data, pipe)
-        pokemon_daily_counterseries_update = await pokemon_daily_counterseries.update_daily_pokemon_counter(filtered_data, pipe)
         if AppConfig.store_pokemon_tth_timeseries:
             pokemon_tth_timeseries_update = await pokemon_tth_timeseries.add_tth_timeseries_pokemon_event(filtered_data, pipe)
-        pokemon_tth_counterseries_update = await pokemon_tth_counterseries.update_tth_pokemon_counter(filtered_data, pipe)
+        if AppConfig.counter_rollup_enabled:
+            pokemon_tth_counterseries_update = "ROLLUP"
+            pokemon_tth_daily_counterseries_update = "ROLLUP"
+        else:
+            pokemon_tth_counterseries_update = await pokemon_tth_counterseries.update_tth_pokemon_counter(filtered_data, pipe)
+            pokemon_tth_daily_counterseries_update = await pokemon_tth_daily_counterseries.update_tth_pokemon_daily_counter(filtered_data, pipe)
         pokemon_tth_hourly_counterseries_update = await pokemon_tth_hourly_counterseries.update_tth_pokemon_hourly_counter(filtered_data, pipe)
-        pokemon_tth_daily_counterseries_update = await pokemon_tth_daily_counterseries.update_tth_pokemon_daily_counter(filtered_data, pipe)
         pokemon_weather_counterseries_update = await pokemon_weather_iv_counterseries.update_pokemon_weather_iv(filtered_data, pipe)
+        await unique_sketches.add_unique_events("pokemon", filtered_data, pipe)
+        await top_k.add_top_k_events("pokemon", filtered_data, pipe)
+        await live_stream.add_live_event("pokemon", filtered_data, pipe)
+        await queue_global_pokemon_rollups(filtered_data, pipe)
 
         # Execute all Redis commands in a single batch
         results = await retry(pipe.execute, max_attempts=5, delay=2)
@@ -147,6 +224,10 @@ async def process_raid_data(filtered_data):
             raid_counterseries_update = await raids_counterseries.update_raid_counter(filtered_data, pipe)
             raid_hourly_counterseries_update = await raids_hourly_counterseries.update_raid_hourly_counter(filtered_data, pipe)
             raid_daily_counterseries_update = await raids_daily_counterseries.update_raid_daily_counter(filtered_data, pipe)
+            await unique_sketches.add_unique_events("raids", filtered_data, pipe)
+            await top_k.add_top_k_events("raids", filtered_data, pipe)
+            await live_stream.add_live_event("raids", filtered_data, pipe)
+            await queue_global_raid_rollups(filtered_data, pipe)
 
             # Execute all Redis commands in a single batch wrapped in retry function for startup exception connection handling
             await retry(pipe.execute, max_attempts=5, delay=2)
@@ -201,6 +282,9 @@ async def process_quest_data(filtered_data):
             quest_counterseries_update = await quests_counterseries.update_quest_counter(filtered_data, pipe)
             quest_hourly_counterseries_update = await quests_hourly_counterseries.update_quest_hourly_counter(filtered_data, pipe)
             quest_daily_counterseries_update = await quests_daily_counterseries.update_quest_daily_counter(filtered_data, pipe)
+            await top_k.add_top_k_events("quests", filtered_data, pipe)
+            await live_stream.add_live_event("quests", filtered_data, pipe)
+            await queue_global_quest_rollups(filtered_data, pipe)
 
             # Execute all Redis commands in a single batch wrapped in retry function for startup exception connection handling
             await retry(pipe.execute, max_attempts=5, delay=2)
@@ -261,6 +345,10 @@ async def process_invasion_data(filtered_data):
             invasion_counterseries_update = await invasions_counterseries.update_invasion_counter(filtered_data, pipe)
             invasion_hourly_counterseries_update = await invasions_hourly_counterseries.update_invasion_hourly_counter(filtered_data, pipe)
             invasion_daily_counterseries_update = await invasions_daily_counterseries.update_invasion_daily_counter(filtered_data, pipe)
+            await unique_sketches.add_unique_events("invasions", filtered_data, pipe)
+            await top_k.add_top_k_events("invasions", filtered_data, pipe)
+            await live_stream.add_live_event("invasions", filtered_data, pipe)
+            await queue_global_invasion_rollups(filtered_data, pipe)
 
             # Execute all Redis commands in a single batch wrapped in retry function for startup exception connection handling
             await retry(pipe.execute, max_attempts=5, delay=2)